@@ -0,0 +1,315 @@
+"""
+ChatLove - Usage Accounting
+Registro de uso fora do caminho da resposta: os endpoints de proxy
+enfileiram o uso e respondem assim que o Lovable aceita; um worker grava
+em lote (UsageLog + créditos da conta hub) com retries e outbox em disco
+"""
+
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import glob
+import os
+import uuid
+import orjson
+
+from sqlalchemy import case, insert, update
+
+from database import SessionLocal, UsageLog, HubAccount
+
+
+OnApplied = Callable[[str, float], Awaitable[None]]
+
+# Segmento do outbox fechado a partir deste tamanho; apagado quando todo aplicado
+SEGMENT_BYTES = 1024 * 1024
+
+
+class UsageAccountant:
+    """
+    record() -> enfileira o uso para o journal (outbox JSONL) e o worker
+
+    O outbox é um journal em segmentos `<outbox>.<n>.seg`. Um writer grava
+    os registros em grupo fora do event loop (write + fsync numa thread) e
+    só então os entrega ao worker. Um segmento é fechado ao passar de
+    segment_bytes e apagado quando todos os seus registros foram
+    aplicados, então o journal fica limitado ao que ainda falta gravar no
+    banco mesmo sob tráfego contínuo.
+
+    Durabilidade: um registro está no disco (fsync) poucos ms depois de
+    record(); uma queda da máquina dentro dessa janela pode perdê-lo. Após
+    queda ou restart, start() reaplica os segmentos; registros já gravados
+    são ignorados pelo client_record_id (único em UsageLog). Lotes que
+    falham em todas as tentativas vão para `<outbox>.failed`.
+    """
+
+    def __init__(
+        self,
+        outbox_path: str,
+        on_applied: Optional[OnApplied] = None,
+        batch_size: int = 100,
+        max_attempts: int = 5,
+        retry_delay: float = 0.5,
+        segment_bytes: int = SEGMENT_BYTES
+    ):
+        self.outbox_path = outbox_path
+        self.on_applied = on_applied
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.segment_bytes = segment_bytes
+        self._queue: asyncio.Queue = asyncio.Queue()  # (segmento, registro)
+        self._pending = 0
+        self._unwritten: List[dict] = []
+        self._written = asyncio.Event()
+        self._segment_pending: Dict[str, int] = {}
+        self._segment_index = 0
+        self._segment_path: Optional[str] = None
+        self._outbox = None
+        self._task: Optional[asyncio.Task] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._closing = False
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def start(self):
+        if self._task is not None:
+            return
+
+        if self.outbox_path:
+            replayed = self._replay()
+            self._open_segment()
+            self._writer = asyncio.create_task(self._write_loop())
+            if replayed:
+                print(f"[ACCOUNTING] {replayed} registros pendentes do outbox reenfileirados")
+
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Para o worker; o que não foi aplicado continua no outbox para o próximo start"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        if self._writer:
+            # O writer grava o que ainda está em memória e encerra
+            self._closing = True
+            self._written.set()
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+            self._closing = False
+
+        if self._outbox:
+            self._outbox.close()
+            self._outbox = None
+
+    def record(
+        self,
+        license_key: str,
+        license_id: int,
+        tokens_saved: float,
+        message_length: int,
+        hub_account_id: Optional[int] = None,
+        original_project_id: Optional[str] = None,
+        hub_project_id: Optional[str] = None
+    ):
+        entry = {
+            "client_record_id": f"srv_{uuid.uuid4().hex}",
+            "license_key": license_key,
+            "license_id": license_id,
+            "tokens_saved": float(tokens_saved),
+            "message_length": message_length,
+            "hub_account_id": hub_account_id,
+            "original_project_id": original_project_id,
+            "hub_project_id": hub_project_id
+        }
+
+        self._pending += 1
+
+        if self._writer:
+            # Gravado no journal pelo writer antes de ir para o worker
+            self._unwritten.append(entry)
+            self._written.set()
+        else:
+            self._queue.put_nowait((None, entry))
+
+    def _segment_file(self, index: int) -> str:
+        return f"{self.outbox_path}.{index:06d}.seg"
+
+    def _replay(self) -> int:
+        # Arquivo único das versões anteriores + segmentos, em ordem
+        paths = sorted(glob.glob(f"{glob.escape(self.outbox_path)}.*.seg"))
+        if os.path.exists(self.outbox_path):
+            paths.insert(0, self.outbox_path)
+
+        for path in paths:
+            count = 0
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        entry = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        continue  # Linha incompleta de uma queda no meio da escrita
+                    count += 1
+                    self._queue.put_nowait((path, entry))
+
+            if count:
+                self._segment_pending[path] = count
+                self._pending += count
+            else:
+                os.remove(path)
+
+            if path != self.outbox_path:
+                self._segment_index = max(self._segment_index, int(path.rsplit(".", 2)[-2]))
+
+        return self._pending
+
+    def _open_segment(self):
+        self._segment_index += 1
+        self._segment_path = self._segment_file(self._segment_index)
+        self._outbox = open(self._segment_path, "ab")
+
+    def _write(self, entries: List[dict]):
+        """Em thread: um write + fsync para o grupo"""
+        self._outbox.write(b"".join(orjson.dumps(entry) + b"\n" for entry in entries))
+        self._outbox.flush()
+        os.fsync(self._outbox.fileno())
+
+    async def _write_loop(self):
+        while True:
+            await self._written.wait()
+            self._written.clear()
+            if not self._unwritten:
+                if self._closing:
+                    return
+                continue
+
+            entries, self._unwritten = self._unwritten, []
+            try:
+                await asyncio.to_thread(self._write, entries)
+            except OSError as e:
+                print(f"[ACCOUNTING] Falha ao gravar outbox ({len(entries)} registros só em memória): {e}")
+
+            path = self._segment_path
+            self._segment_pending[path] = self._segment_pending.get(path, 0) + len(entries)
+            for entry in entries:
+                self._queue.put_nowait((path, entry))
+
+            if self._closing:
+                return
+
+            if self._outbox.tell() >= self.segment_bytes:
+                self._outbox.close()
+                self._open_segment()
+
+    def _release_segments(self, batch: List[Tuple[Optional[str], dict]]):
+        """Apaga segmentos fechados cujos registros já foram todos aplicados"""
+        for path, _ in batch:
+            if path is None:
+                continue
+            self._segment_pending[path] -= 1
+            if self._segment_pending[path] == 0 and path != self._segment_path:
+                del self._segment_pending[path]
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"[ACCOUNTING] Não foi possível apagar {path}: {e}")
+
+    async def _loop(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            applied = await self._apply_with_retries([entry for _, entry in batch])
+
+            self._pending -= len(batch)
+            self._release_segments(batch)
+
+            if self.on_applied:
+                totals: Dict[str, float] = {}
+                for entry in applied:
+                    totals[entry["license_key"]] = totals.get(entry["license_key"], 0.0) + entry["tokens_saved"]
+                for license_key, tokens_saved in totals.items():
+                    try:
+                        await self.on_applied(license_key, tokens_saved)
+                    except Exception as e:
+                        print(f"[ACCOUNTING] Erro ao notificar créditos: {e}")
+
+    async def _apply_with_retries(self, batch: List[dict]) -> List[dict]:
+        for attempt in range(self.max_attempts):
+            try:
+                return await asyncio.to_thread(self._apply, batch)
+            except Exception as e:
+                print(f"[ACCOUNTING] Falha ao gravar lote de {len(batch)} (tentativa {attempt + 1}): {e}")
+                await asyncio.sleep(self.retry_delay * 2 ** attempt)
+
+        self._dead_letter(batch)
+        return []
+
+    def _apply(self, batch: List[dict]) -> List[dict]:
+        """Uma transação: UsageLog dos registros novos + desconto agregado por conta hub"""
+        db = SessionLocal()
+        try:
+            ids = [entry["client_record_id"] for entry in batch]
+            existing = {
+                record_id for (record_id,) in db.query(UsageLog.client_record_id).filter(
+                    UsageLog.client_record_id.in_(ids)
+                )
+            }
+            new_entries = []
+            for entry in batch:
+                if entry["client_record_id"] not in existing:
+                    existing.add(entry["client_record_id"])
+                    new_entries.append(entry)
+            if not new_entries:
+                return []
+
+            db.execute(insert(UsageLog), [
+                {
+                    "license_id": entry["license_id"],
+                    "client_record_id": entry["client_record_id"],
+                    "tokens_saved": entry["tokens_saved"],
+                    "message_length": entry["message_length"],
+                    "request_count": 1,
+                    "hub_account_id": entry["hub_account_id"],
+                    "original_project_id": entry["original_project_id"],
+                    "hub_project_id": entry["hub_project_id"]
+                }
+                for entry in new_entries
+            ])
+
+            debits: Dict[int, float] = {}
+            for entry in new_entries:
+                if entry["hub_account_id"] is not None:
+                    debits[entry["hub_account_id"]] = debits.get(entry["hub_account_id"], 0.0) + entry["tokens_saved"]
+
+            # Desconto atômico no banco (sem ler-modificar-escrever entre réplicas)
+            for account_id, amount in debits.items():
+                db.execute(
+                    update(HubAccount)
+                    .where(HubAccount.id == account_id)
+                    .values(credits_remaining=case(
+                        (HubAccount.credits_remaining > amount, HubAccount.credits_remaining - amount),
+                        else_=0.0
+                    ))
+                )
+
+            db.commit()
+            return new_entries
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _dead_letter(self, batch: List[dict]):
+        path = f"{self.outbox_path or 'accounting_outbox.jsonl'}.failed"
+        try:
+            with open(path, "ab") as f:
+                for entry in batch:
+                    f.write(orjson.dumps(entry) + b"\n")
+            print(f"[ACCOUNTING] Lote de {len(batch)} registros movido para {path}")
+        except OSError as e:
+            print(f"[ACCOUNTING] Registros perdidos ({len(batch)}): {e}")
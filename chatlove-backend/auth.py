@@ -8,6 +8,7 @@ from datetime import datetime, timedelta
 from typing import Optional
 import secrets
 import hashlib
+import os
 
 # Security
 pwd_context = CryptContext(
@@ -16,7 +17,11 @@ pwd_context = CryptContext(
     bcrypt__rounds=12,
     bcrypt__ident="2b"
 )
-SECRET_KEY = secrets.token_urlsafe(32)
+# Defina SECRET_KEY igual em todas as réplicas; sem ela, tokens valem só neste processo
+SECRET_KEY_CONFIGURED = bool(os.getenv("SECRET_KEY"))
+SECRET_KEY = os.getenv("SECRET_KEY") or secrets.token_urlsafe(32)
+if not SECRET_KEY_CONFIGURED:
+    print("[AUTH] ⚠️  SECRET_KEY não definida: chave aleatória, tokens inválidos após reinício e em outras réplicas")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 30  # 30 days
 
@@ -0,0 +1,81 @@
+"""
+Microbenchmark: serialização da lista de licenças do admin
+Compara o caminho padrão do FastAPI (jsonable_encoder + JSONResponse)
+com o caminho rápido (orjson) e mostra o tamanho comprimido
+
+Uso: python bench_serialization.py [linhas] [repetições]
+"""
+
+from datetime import datetime, timedelta
+import sys
+import time
+import gzip
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+import orjson
+
+from responses import GZIP_LEVEL, BROTLI_QUALITY, brotli
+
+
+def build_rows(count: int) -> list:
+    """Linhas no mesmo formato de /api/admin/licenses"""
+    now = datetime.utcnow()
+    rows = []
+    for i in range(count):
+        rows.append({
+            "id": i + 1,
+            "license_key": f"{i:04X}-ABCD-EF01-{(i * 7) % 65536:04X}",
+            "user_name": f"Usuário {i}",
+            "is_active": i % 5 != 0,
+            "is_used": i % 3 == 0,
+            "license_type": "trial" if i % 4 == 0 else "full",
+            "expires_at": (now + timedelta(minutes=15)).isoformat() if i % 4 == 0 else None,
+            "is_expired": False,
+            "created_at": now.isoformat(),
+            "activated_at": now.isoformat() if i % 3 == 0 else None,
+            "tokens_saved": float(i % 100) * 1.25
+        })
+    return rows
+
+
+def cpu_time(func, repeat: int) -> float:
+    """Menor tempo de CPU (ms) entre as repetições"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        func()
+        best = min(best, time.process_time() - start)
+    return best * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    rows = build_rows(count)
+
+    default_ms = cpu_time(lambda: JSONResponse(jsonable_encoder(rows)).body, repeat)
+    fast_ms = cpu_time(lambda: orjson.dumps(rows), repeat)
+
+    body = orjson.dumps(rows)
+    gzip_ms = cpu_time(lambda: gzip.compress(body, compresslevel=GZIP_LEVEL), repeat)
+
+    print("=" * 60)
+    print(f"SERIALIZAÇÃO: {count} licenças (melhor de {repeat})")
+    print("=" * 60)
+    print(f"jsonable_encoder + JSONResponse: {default_ms:8.2f} ms CPU")
+    print(f"orjson:                          {fast_ms:8.2f} ms CPU")
+    print(f"CPU economizada:                 {default_ms - fast_ms:8.2f} ms ({default_ms / fast_ms:.1f}x)")
+    print("-" * 60)
+    print(f"JSON:   {len(body):>10} bytes")
+    print(f"gzip:   {len(gzip.compress(body, compresslevel=GZIP_LEVEL)):>10} bytes ({gzip_ms:.2f} ms CPU)")
+
+    if brotli is not None:
+        br_ms = cpu_time(lambda: brotli.compress(body, quality=BROTLI_QUALITY), repeat)
+        print(f"brotli: {len(brotli.compress(body, quality=BROTLI_QUALITY)):>10} bytes ({br_ms:.2f} ms CPU)")
+    else:
+        print("brotli: não instalado")
+
+
+if __name__ == "__main__":
+    main()
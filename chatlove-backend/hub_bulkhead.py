@@ -0,0 +1,186 @@
+"""
+ChatLove - Hub Account Bulkheads
+Limite de chats simultâneos por conta hub, com fila de admissão curta
+e concorrência adaptativa (AIMD) quando o Lovable devolve 429
+"""
+
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+import asyncio
+import time
+
+
+class HubSaturated(Exception):
+    """Conta hub sem capacidade dentro do prazo de admissão"""
+
+    def __init__(self, account_id: int, retry_after: float):
+        super().__init__(f"Hub account {account_id} saturated")
+        self.account_id = account_id
+        self.retry_after = retry_after
+
+
+class AccountBulkhead:
+    """
+    Semáforo assíncrono com limite adaptativo para uma conta hub
+
+    O limite é um float para o AIMD: cresce 1/limit a cada sucesso
+    (~+1 por janela cheia) e é multiplicado por `decrease_factor` em 429,
+    no máximo uma vez por `cooldown` segundos.
+    """
+
+    def __init__(
+        self,
+        account_id: int,
+        max_in_flight: int,
+        max_queue: int,
+        min_limit: int = 1,
+        decrease_factor: float = 0.5,
+        cooldown: float = 5.0
+    ):
+        self.account_id = account_id
+        self.max_limit = max(min_limit, max_in_flight)
+        self.min_limit = min_limit
+        self.limit = float(self.max_limit)
+        self.max_queue = max_queue
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+
+        self.in_flight = 0
+        self.avg_hold = 1.0  # EWMA do tempo de uso de um slot (s)
+        self._waiters: deque = deque()
+        self._last_decrease = 0.0
+
+    @property
+    def capacity(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def has_free_slot(self) -> bool:
+        return self.in_flight < self.capacity and not self._waiters
+
+    def is_saturated(self) -> bool:
+        return not self.has_free_slot() and self.queued >= self.max_queue
+
+    def resize(self, max_in_flight: int):
+        """Aplica novo máximo configurado (ex: editado no admin)"""
+        self.max_limit = max(self.min_limit, max_in_flight)
+        self.limit = min(self.limit, float(self.max_limit))
+
+    def expected_wait(self) -> float:
+        """Estimativa de espera para quem entrar agora na fila"""
+        return (self.queued + 1) / self.capacity * self.avg_hold
+
+    async def acquire(self, timeout: float):
+        if self.has_free_slot():
+            self.in_flight += 1
+            return
+
+        # Shedding antecipado: fila cheia ou espera estimada além do prazo
+        if self.queued >= self.max_queue or self.expected_wait() > timeout:
+            raise HubSaturated(self.account_id, retry_after=self.expected_wait())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+
+        try:
+            await asyncio.wait_for(waiter, timeout=timeout)
+        except asyncio.TimeoutError:
+            raise HubSaturated(self.account_id, retry_after=self.expected_wait())
+        except asyncio.CancelledError:
+            # Cancelado logo após receber o slot: devolve para o próximo
+            if waiter.done() and not waiter.cancelled():
+                self.in_flight -= 1
+                self._wake()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+        # Slot transferido por _wake(): in_flight já contabilizado
+
+    def release(self, hold_time: float):
+        self.in_flight -= 1
+        self.avg_hold = 0.8 * self.avg_hold + 0.2 * hold_time
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < self.capacity:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def on_success(self):
+        """Aumento aditivo"""
+        if self.limit < self.max_limit:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            self._wake()
+
+    def on_throttled(self):
+        """Diminuição multiplicativa (429 do Lovable)"""
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+        print(f"[BULKHEAD] Conta {self.account_id}: 429 recebido, limite → {self.capacity}")
+
+    def snapshot(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "concurrency_limit": self.capacity,
+            "max_concurrency": self.max_limit
+        }
+
+
+class HubBulkheads:
+    """Registro de bulkheads por conta hub"""
+
+    def __init__(self, default_max_in_flight: int = 4, max_queue: int = 8, admission_timeout: float = 5.0):
+        self.default_max_in_flight = default_max_in_flight
+        self.max_queue = max_queue
+        self.admission_timeout = admission_timeout
+        self._accounts: Dict[int, AccountBulkhead] = {}
+
+    def get(self, account_id: int, max_in_flight: Optional[int] = None) -> AccountBulkhead:
+        configured = max_in_flight or self.default_max_in_flight
+        bulkhead = self._accounts.get(account_id)
+
+        if bulkhead is None:
+            bulkhead = AccountBulkhead(account_id, configured, self.max_queue)
+            self._accounts[account_id] = bulkhead
+        elif bulkhead.max_limit != configured:
+            bulkhead.resize(configured)
+
+        return bulkhead
+
+    def find(self, account_id: int) -> Optional[AccountBulkhead]:
+        """Bulkhead já criado, sem aplicar limite (a configuração da conta vem do banco)"""
+        return self._accounts.get(account_id)
+
+    def throttle(self, account_id: int):
+        """429 avisado por outra réplica; conta ainda sem bulkhead aqui é ignorada"""
+        bulkhead = self.find(account_id)
+        if bulkhead is not None:
+            bulkhead.on_throttled()
+
+    def forget(self, account_id: int):
+        self._accounts.pop(account_id, None)
+
+    @asynccontextmanager
+    async def slot(self, account_id: int, max_in_flight: Optional[int] = None, timeout: Optional[float] = None):
+        """Segura um slot de chat da conta durante o bloco"""
+        bulkhead = self.get(account_id, max_in_flight)
+        await bulkhead.acquire(self.admission_timeout if timeout is None else timeout)
+
+        start = time.monotonic()
+        try:
+            yield bulkhead
+        finally:
+            bulkhead.release(time.monotonic() - start)
@@ -0,0 +1,154 @@
+"""
+ChatLove - Hub Token Health Prober
+Valida periodicamente o session_token de cada conta hub ativa e desativa
+contas com token morto antes que um usuário receba o erro
+"""
+
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+import asyncio
+import random
+import time
+import httpx
+
+from database import SessionLocal, HubAccount
+
+
+# Respostas que indicam token inválido/expirado (as demais são falhas transitórias)
+AUTH_FAILURE_STATUSES = (401, 403)
+
+
+class HubHealthProber:
+    """
+    Loop em background que faz um GET autenticado barato por conta hub
+
+    - Probes concorrentes, cada um atrasado por um jitter aleatório
+    - Registra status, latência e horário em HubAccount.health_*
+    - Após `failure_threshold` falhas de autenticação seguidas, marca a conta inativa
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        probe_path: str = "/projects",
+        interval: float = 300.0,
+        jitter: float = 10.0,
+        timeout: float = 10.0,
+        failure_threshold: int = 2,
+        on_change: Optional[Callable[[], Awaitable[None]]] = None
+    ):
+        self.api_url = api_url
+        self.probe_path = probe_path
+        self.interval = interval
+        self.jitter = jitter
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.on_change = on_change  # Chamado após gravar um ciclo de resultados
+        self._task: Optional[asyncio.Task] = None
+        self._auth_failures: Dict[int, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+            print(f"[HEALTH] Prober iniciado (a cada {self.interval:.0f}s)")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.probe_all()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[HEALTH] Erro no ciclo de verificação: {e}")
+
+            await asyncio.sleep(self.interval)
+
+    async def probe_all(self):
+        """Verifica todas as contas hub ativas concorrentemente"""
+        db = SessionLocal()
+        try:
+            accounts = [
+                (account.id, account.session_token)
+                for account in db.query(HubAccount).filter(HubAccount.is_active == True).all()
+            ]
+        finally:
+            db.close()
+
+        if not accounts:
+            return
+
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            results = await asyncio.gather(*[
+                self._probe(client, account_id, session_token)
+                for account_id, session_token in accounts
+            ])
+
+        self._record(results)
+
+        if self.on_change:
+            await self.on_change()
+
+    async def _probe(self, client: httpx.AsyncClient, account_id: int, session_token: str) -> dict:
+        # Jitter espalha os probes para não bater no Lovable em rajada
+        await asyncio.sleep(random.uniform(0, self.jitter))
+
+        start = time.monotonic()
+        try:
+            response = await client.get(
+                f"{self.api_url}{self.probe_path}",
+                headers={"Authorization": f"Bearer {session_token}"}
+            )
+            status_code = response.status_code
+            error = None if status_code == 200 else f"HTTP {status_code}"
+        except httpx.HTTPError as e:
+            status_code = None
+            error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+
+        return {
+            "account_id": account_id,
+            "status_code": status_code,
+            "latency_ms": (time.monotonic() - start) * 1000,
+            "error": error
+        }
+
+    def _record(self, results: list):
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            for result in results:
+                account = db.query(HubAccount).filter(HubAccount.id == result["account_id"]).first()
+                if not account:
+                    continue
+
+                account.health_checked_at = now
+                account.health_latency_ms = round(result["latency_ms"], 1)
+                account.health_error = result["error"]
+
+                if result["status_code"] in AUTH_FAILURE_STATUSES:
+                    failures = self._auth_failures.get(account.id, 0) + 1
+                    self._auth_failures[account.id] = failures
+                    account.health_status = "token_invalid"
+
+                    if failures >= self.failure_threshold and account.is_active:
+                        account.is_active = False
+                        print(f"[HEALTH] Conta {account.name} desativada: token inválido ({result['error']})")
+                elif result["status_code"] == 200:
+                    self._auth_failures.pop(account.id, None)
+                    account.health_status = "healthy"
+                else:
+                    # Timeout/5xx: não é prova de token morto
+                    account.health_status = "degraded"
+
+            db.commit()
+        finally:
+            db.close()
@@ -0,0 +1,253 @@
+"""
+ChatLove - Hub Project Pool
+Mantém projetos em branco pré-criados em cada conta hub para que o
+primeiro envio de um projeto novo não espere pelo POST /projects
+"""
+
+from typing import Awaitable, Callable, Optional
+from datetime import datetime
+import asyncio
+import secrets
+import httpx
+
+from database import SessionLocal, HubAccount, ProjectMapping, PooledHubProject
+
+
+REFILL_LOCK_KEY = "pool:refill:lock"
+
+
+class HubProjectPool:
+    """
+    Provisionador em background de projetos hub
+
+    - claim(): entrega um projeto do pool instantaneamente (ou None se vazio)
+    - rename_in_background(): renomeia o projeto reivindicado sem bloquear o usuário
+    - loop de reposição: completa o pool até target_size por conta ativa
+
+    Com `shared` (estado compartilhado entre réplicas), a reposição roda
+    sob um lock: uma réplica por vez conta e completa o pool, as outras
+    pulam a rodada em vez de provisionar os mesmos projetos em dobro.
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        target_size: int = 3,
+        refill_interval: float = 60.0,
+        on_change: Optional[Callable[[], Awaitable[None]]] = None,
+        shared=None,
+        lock_ttl: float = 300.0
+    ):
+        self.api_url = api_url
+        self.target_size = target_size
+        self.refill_interval = refill_interval
+        self.on_change = on_change  # Chamado após renomear um projeto mapeado
+        self.shared = shared
+        self.lock_ttl = lock_ttl  # Margem para uma reposição inteira (POSTs de 30s)
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._background: set = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.target_size > 0
+
+    # =========================================================================
+    # LIFECYCLE
+    # =========================================================================
+
+    def start(self):
+        """Inicia o loop de reposição (chamado no startup da app)"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._refill_loop())
+            print(f"[POOL] Provisionador iniciado (alvo: {self.target_size} por conta)")
+
+    async def stop(self):
+        """Cancela o loop de reposição e renomeações pendentes"""
+        tasks = list(self._background)
+        if self._task:
+            tasks.append(self._task)
+            self._task = None
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # =========================================================================
+    # CLAIM
+    # =========================================================================
+
+    def claim(self, db, hub_account: HubAccount) -> Optional[str]:
+        """Retira um projeto do pool da conta hub, se houver"""
+        if not self.enabled:
+            return None
+
+        while True:
+            pooled = db.query(PooledHubProject).filter(
+                PooledHubProject.hub_account_id == hub_account.id
+            ).order_by(
+                PooledHubProject.id.asc()
+            ).first()
+
+            if not pooled:
+                self._wakeup.set()
+                return None
+
+            hub_project_id = pooled.hub_project_id
+
+            # DELETE condicional: só um request ganha cada projeto do pool
+            deleted = db.query(PooledHubProject).filter(
+                PooledHubProject.id == pooled.id
+            ).delete(synchronize_session=False)
+            db.commit()
+
+            if deleted:
+                self._wakeup.set()
+                print(f"[POOL] Projeto reivindicado: {hub_project_id}")
+                return hub_project_id
+
+    def rename_in_background(
+        self,
+        hub_project_id: str,
+        hub_session_token: str,
+        original_project_id: str,
+        user_session_token: str
+    ):
+        """Agenda renomeação do projeto reivindicado para o nome do original"""
+        task = asyncio.create_task(self._rename(
+            hub_project_id, hub_session_token, original_project_id, user_session_token
+        ))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _rename(
+        self,
+        hub_project_id: str,
+        hub_session_token: str,
+        original_project_id: str,
+        user_session_token: str
+    ):
+        try:
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                original_response = await client.get(
+                    f"{self.api_url}/projects/{original_project_id}",
+                    headers={"Authorization": f"Bearer {user_session_token}"}
+                )
+                if original_response.status_code != 200:
+                    return
+
+                project_name = original_response.json().get("name", "Projeto")
+
+                await client.patch(
+                    f"{self.api_url}/projects/{hub_project_id}",
+                    headers={
+                        "Authorization": f"Bearer {hub_session_token}",
+                        "Content-Type": "application/json"
+                    },
+                    json={"name": f"[HUB] {project_name}"}
+                )
+        except Exception as e:
+            print(f"[POOL] Não foi possível renomear {hub_project_id}: {e}")
+            return
+
+        db = SessionLocal()
+        try:
+            db.query(ProjectMapping).filter(
+                ProjectMapping.hub_project_id == hub_project_id
+            ).update({"project_name": project_name}, synchronize_session=False)
+            db.commit()
+            print(f"[POOL] Projeto renomeado: {hub_project_id} → {project_name}")
+        finally:
+            db.close()
+
+        if self.on_change:
+            await self.on_change()
+
+    # =========================================================================
+    # REFILL
+    # =========================================================================
+
+    async def _refill_loop(self):
+        while True:
+            # Limpa antes: um claim durante a reposição dispara a próxima rodada
+            self._wakeup.clear()
+            try:
+                await self.refill()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[POOL] Erro na reposição: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.refill_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def refill(self):
+        """Completa o pool de todas as contas hub ativas (uma réplica por vez)"""
+        if self.shared is None:
+            await self._fill()
+            return
+
+        token = secrets.token_hex(16).encode()
+        if not await self.shared.set_if_absent(REFILL_LOCK_KEY, token, ttl=self.lock_ttl):
+            return  # Outra réplica está repondo
+
+        try:
+            await self._fill()
+        finally:
+            await self.shared.delete_if_equals(REFILL_LOCK_KEY, token)
+
+    async def _fill(self):
+        db = SessionLocal()
+        try:
+            accounts = db.query(HubAccount).filter(HubAccount.is_active == True).all()
+            missing = []
+            for account in accounts:
+                pooled = db.query(PooledHubProject).filter(
+                    PooledHubProject.hub_account_id == account.id
+                ).count()
+                if pooled < self.target_size:
+                    missing.append((account.id, account.session_token, self.target_size - pooled))
+        finally:
+            db.close()
+
+        if not missing:
+            return
+
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            await asyncio.gather(*[
+                self._provision(client, account_id, session_token, count)
+                for account_id, session_token, count in missing
+            ])
+
+    async def _provision(self, client: httpx.AsyncClient, account_id: int, session_token: str, count: int):
+        for _ in range(count):
+            response = await client.post(
+                f"{self.api_url}/projects",
+                headers={
+                    "Authorization": f"Bearer {session_token}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "name": f"[HUB] Pool {datetime.utcnow().strftime('%Y%m%d%H%M%S')}",
+                    "template": "blank"
+                }
+            )
+
+            if response.status_code not in [200, 201]:
+                print(f"[POOL] Conta {account_id}: erro ao criar projeto ({response.status_code})")
+                return
+
+            hub_project_id = response.json().get("id")
+            if not hub_project_id:
+                return
+
+            db = SessionLocal()
+            try:
+                db.add(PooledHubProject(hub_account_id=account_id, hub_project_id=hub_project_id))
+                db.commit()
+            finally:
+                db.close()
+
+            print(f"[POOL] Conta {account_id}: projeto provisionado {hub_project_id}")
@@ -0,0 +1,174 @@
+"""
+ChatLove - Idempotency Keys
+Bounded TTL store that deduplicates retried proxy sends
+"""
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+import asyncio
+import base64
+import hashlib
+import secrets
+import time
+import orjson
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+
+class IdempotencyStore:
+    """
+    In-memory store of in-flight and completed idempotency keys
+
+    - Key in flight: duplicates wait on the original request
+    - Key completed: duplicates receive the stored result until the TTL expires
+    - Key failed: the error is shared with waiters and the key is released,
+      so a later retry can try again
+
+    With a `shared` state backend, completed results and in-flight locks are
+    also visible to the other backend replicas. func only runs while this
+    replica holds the key's lock; a duplicate that cannot get it within
+    lock_ttl fails with 409 instead of sending the request again.
+    """
+
+    def __init__(self, ttl_seconds: float = 600.0, max_entries: int = 10000, shared=None, lock_ttl: float = 90.0):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.shared = shared
+        self.lock_ttl = lock_ttl
+        self._inflight: dict = {}
+        self._completed: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def run(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run func once per key and return its (possibly stored) result"""
+        self._purge_expired()
+
+        cached = self._completed.get(key)
+        if cached is not None:
+            return cached[1]
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+
+        try:
+            result = await self._run_shared(key, func) if self.shared else await func()
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                # Evita "Future exception was never retrieved" quando não há duplicatas
+                future.exception()
+            raise
+        else:
+            self._store(key, result)
+            if not future.done():
+                future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _run_shared(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        done_key, lock_key = f"idem:done:{key}", f"idem:lock:{key}"
+        token = secrets.token_hex(16).encode()
+        deadline = time.monotonic() + self.lock_ttl
+
+        while True:
+            stored = await self.shared.get(done_key)
+            if stored is not None:
+                return decode_result(stored)
+
+            if await self.shared.set_if_absent(lock_key, token, ttl=self.lock_ttl):
+                break
+
+            # Outra réplica está enviando: aguarda o resultado dela
+            if time.monotonic() > deadline:
+                raise HTTPException(
+                    status_code=409,
+                    detail="Requisição com esta Idempotency-Key ainda em processamento"
+                )
+            await asyncio.sleep(0.1)
+
+        try:
+            # A réplica anterior pode ter concluído entre o get e o lock
+            stored = await self.shared.get(done_key)
+            if stored is not None:
+                return decode_result(stored)
+
+            result = await func()
+            await self.shared.set(done_key, encode_result(result), ttl=self.ttl_seconds)
+            return result
+        finally:
+            await self.shared.delete_if_equals(lock_key, token)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return stored result for key, if still valid"""
+        self._purge_expired()
+        cached = self._completed.get(key)
+        return cached[1] if cached else None
+
+    def __len__(self) -> int:
+        return len(self._completed) + len(self._inflight)
+
+    def _store(self, key: str, result: Any):
+        self._completed[key] = (time.monotonic() + self.ttl_seconds, result)
+        self._completed.move_to_end(key)
+
+        while len(self._completed) > self.max_entries:
+            self._completed.popitem(last=False)
+
+    def _purge_expired(self):
+        now = time.monotonic()
+
+        # TTL fixo: ordem de inserção == ordem de expiração
+        while self._completed:
+            key, (expires_at, _) = next(iter(self._completed.items()))
+            if expires_at > now:
+                break
+            self._completed.popitem(last=False)
+
+
+def encode_result(result: Any) -> bytes:
+    """Serialize an endpoint result (Response, pydantic model or dict) for the shared store"""
+    if isinstance(result, Response):
+        status_code, body, media_type = result.status_code, result.body, result.media_type
+    else:
+        content = result.model_dump() if isinstance(result, BaseModel) else result
+        status_code, body, media_type = 200, orjson.dumps(content), "application/json"
+
+    return orjson.dumps({
+        "status_code": status_code,
+        "media_type": media_type,
+        "body": base64.b64encode(body).decode()
+    })
+
+
+def decode_result(data: bytes) -> Response:
+    stored = orjson.loads(data)
+    return Response(
+        base64.b64decode(stored["body"]),
+        status_code=stored["status_code"],
+        media_type=stored["media_type"]
+    )
+
+
+def resolve_idempotency_key(header_key: Optional[str], payload_key: Optional[str]) -> Optional[str]:
+    """Header takes precedence over payload field; blank keys are ignored"""
+    key = header_key or payload_key
+    if key:
+        key = key.strip()
+    return key or None
+
+
+def scoped_idempotency_key(route: str, credential: str, key: str) -> str:
+    """
+    Store key for an Idempotency-Key on one route and credential
+
+    The credential is hashed: with shared state the key becomes a Redis key
+    name, which must not carry tokens or license keys.
+    """
+    digest = hashlib.sha256(credential.encode()).hexdigest()
+    return f"{route}:{digest}:{key}"
@@ -0,0 +1,112 @@
+"""
+ChatLove - License Cache
+Cache em dois níveis do estado das licenças: L1 local (curto) e L2 no
+estado compartilhado, invalidado em todas as réplicas via pub/sub
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+import time
+import orjson
+
+from database import License
+from shared_state import SharedState
+
+
+INVALIDATE_CHANNEL = "license-invalidate"
+
+
+def license_snapshot(license: License) -> dict:
+    """Campos da licença necessários para validação (sem tocar no ORM depois)"""
+    return {
+        "id": license.id,
+        "license_key": license.license_key,
+        "user_id": license.user_id,
+        "is_active": license.is_active,
+        "is_used": license.is_used,
+        "license_type": license.license_type,
+        "expires_at": license.expires_at.isoformat() if license.expires_at else None
+    }
+
+
+def snapshot_expired(snapshot: dict) -> bool:
+    """Equivalente a License.is_expired() para um snapshot"""
+    expires_at = snapshot.get("expires_at")
+    return bool(expires_at) and datetime.utcnow() > datetime.fromisoformat(expires_at)
+
+
+class LicenseCache:
+    """
+    get() -> snapshot da licença ou None se não existir
+
+    Escritas em licenças devem chamar invalidate(license_key): a chave sai
+    do L2 e todas as réplicas descartam o L1 ao receber a mensagem.
+    """
+
+    def __init__(self, state: SharedState, ttl: float = 60.0, local_ttl: float = 5.0):
+        self.state = state
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self._local: Dict[str, tuple] = {}
+        state.subscribe(INVALIDATE_CHANNEL, self._on_invalidate)
+
+    async def get(self, db, license_key: str) -> Optional[dict]:
+        entry = self._local.get(license_key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+
+        cached = await self.state.get(self._key(license_key))
+        if cached is not None:
+            snapshot = orjson.loads(cached)
+        else:
+            license = db.query(License).filter(License.license_key == license_key).first()
+            if not license:
+                return None
+            snapshot = license_snapshot(license)
+            await self.state.set(self._key(license_key), orjson.dumps(snapshot), ttl=self.ttl)
+
+        self._local[license_key] = (time.monotonic() + self.local_ttl, snapshot)
+        return snapshot
+
+    async def get_many(self, db, license_keys: List[str]) -> Dict[str, dict]:
+        """
+        Snapshots de várias licenças: L1, depois um MGET no L2 e, para o que
+        faltar, uma única query IN (...). Chaves inexistentes ficam de fora.
+        """
+        now = time.monotonic()
+        found: Dict[str, dict] = {}
+
+        for license_key in license_keys:
+            entry = self._local.get(license_key)
+            if entry and entry[0] > now:
+                found[license_key] = entry[1]
+
+        missing = [key for key in license_keys if key not in found]
+        if missing:
+            cached = await self.state.get_many([self._key(key) for key in missing])
+            for license_key, value in zip(missing, cached):
+                if value is not None:
+                    found[license_key] = orjson.loads(value)
+                    self._local[license_key] = (now + self.local_ttl, found[license_key])
+
+        missing = [key for key in license_keys if key not in found]
+        if missing:
+            for license in db.query(License).filter(License.license_key.in_(missing)).all():
+                snapshot = license_snapshot(license)
+                found[license.license_key] = snapshot
+                self._local[license.license_key] = (now + self.local_ttl, snapshot)
+                await self.state.set(self._key(license.license_key), orjson.dumps(snapshot), ttl=self.ttl)
+
+        return found
+
+    async def invalidate(self, license_key: str):
+        self._local.pop(license_key, None)
+        await self.state.delete(self._key(license_key))
+        await self.state.publish(INVALIDATE_CHANNEL, license_key)
+
+    async def _on_invalidate(self, license_key: str):
+        self._local.pop(license_key, None)
+
+    @staticmethod
+    def _key(license_key: str) -> str:
+        return f"license:{license_key}"
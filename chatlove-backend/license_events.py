@@ -0,0 +1,105 @@
+"""
+ChatLove - License Events
+Canal push (Server-Sent Events) de status da licença para as extensões:
+revogação, expiração de trial e créditos, sem polling de /api/validate-license
+"""
+
+from datetime import datetime
+from typing import AsyncIterator, Dict, Optional, Set
+import asyncio
+import orjson
+
+from shared_state import SharedState
+
+
+EVENTS_CHANNEL = "license-events"
+
+
+def sse_event(event: str, data: dict) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+class LicenseEventHub:
+    """
+    Assinantes locais por license_key; publicações passam pelo estado
+    compartilhado para alcançar conexões abertas em qualquer réplica
+    """
+
+    def __init__(self, state: SharedState, heartbeat: float = 25.0, queue_size: int = 16):
+        self.state = state
+        self.heartbeat = heartbeat
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        state.subscribe(EVENTS_CHANNEL, self._on_message)
+
+    @property
+    def connections(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    async def publish(self, license_key: str, event: str, data: dict):
+        """event: "license" (mesmo formato de /api/validate-license) ou "credits" """
+        message = orjson.dumps({"license_key": license_key, "event": event, "data": data})
+        await self.state.publish(EVENTS_CHANNEL, message.decode())
+
+    async def _on_message(self, message: str):
+        payload = orjson.loads(message)
+        for queue in self._subscribers.get(payload["license_key"], ()):
+            try:
+                queue.put_nowait((payload["event"], payload["data"]))
+            except asyncio.QueueFull:
+                pass  # Cliente lento: o próximo evento "license" traz o estado completo
+
+    async def stream(self, license_key: str, status: dict) -> AsyncIterator[bytes]:
+        """
+        Gera o stream SSE de uma conexão
+
+        Envia o status atual, depois cada evento publicado, um "license" de
+        expiração quando o trial vence e comentários de heartbeat.
+        Encerra quando a licença deixa de ser válida.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(license_key, set()).add(queue)
+
+        try:
+            yield b"retry: 5000\n\n" + sse_event("license", status)
+            if not status.get("valid"):
+                return
+
+            expires_at = _expiry(status)
+
+            while True:
+                timeout = self.heartbeat
+                if expires_at:
+                    timeout = max(0.0, min(timeout, (expires_at - datetime.utcnow()).total_seconds()))
+
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    if expires_at and datetime.utcnow() >= expires_at:
+                        yield sse_event("license", {
+                            "success": False,
+                            "valid": False,
+                            "message": "Licença de teste expirada (15 minutos)"
+                        })
+                        return
+                    yield b": ping\n\n"
+                    continue
+
+                yield sse_event(event, data)
+
+                if event == "license":
+                    if not data.get("valid"):
+                        return
+                    expires_at = _expiry(data)
+        finally:
+            queues = self._subscribers.get(license_key)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[license_key]
+
+
+def _expiry(status: dict) -> Optional[datetime]:
+    if status.get("license_type") == "trial" and status.get("expires_at"):
+        return datetime.fromisoformat(status["expires_at"])
+    return None
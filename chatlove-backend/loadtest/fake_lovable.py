@@ -0,0 +1,103 @@
+"""
+Fake Lovable API para testes de carga
+Imita /projects, /projects/{id} e /projects/{id}/chat (202 Accepted)
+
+Configuração (variáveis de ambiente):
+    FAKE_LOVABLE_LATENCY_MS    latência base por requisição (padrão: 50)
+    FAKE_LOVABLE_JITTER_MS     variação aleatória somada à latência (padrão: 20)
+    FAKE_LOVABLE_ERROR_RATE    fração de requisições com erro, 0.0-1.0 (padrão: 0)
+    FAKE_LOVABLE_ERROR_STATUS  status devolvido nos erros injetados (padrão: 500)
+    FAKE_LOVABLE_PORT          porta do servidor (padrão: 8100)
+
+Uso:
+    python loadtest/fake_lovable.py
+    LOVABLE_API_URL=http://127.0.0.1:8100 python main.py
+"""
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from datetime import datetime
+import asyncio
+import os
+import random
+import uuid
+import uvicorn
+
+LATENCY_MS = float(os.getenv("FAKE_LOVABLE_LATENCY_MS", 50))
+JITTER_MS = float(os.getenv("FAKE_LOVABLE_JITTER_MS", 20))
+ERROR_RATE = float(os.getenv("FAKE_LOVABLE_ERROR_RATE", 0))
+ERROR_STATUS = int(os.getenv("FAKE_LOVABLE_ERROR_STATUS", 500))
+
+app = FastAPI(title="Fake Lovable API")
+
+projects = {}
+stats = {"requests": 0, "chats": 0, "errors_injected": 0}
+
+
+@app.middleware("http")
+async def simulate_upstream(request: Request, call_next):
+    """Latência e erros injetados em todas as rotas, exceto /_stats"""
+    if request.url.path == "/_stats":
+        return await call_next(request)
+
+    stats["requests"] += 1
+    await asyncio.sleep((LATENCY_MS + random.random() * JITTER_MS) / 1000)
+
+    if not request.headers.get("authorization", "").startswith("Bearer "):
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+
+    if ERROR_RATE and random.random() < ERROR_RATE:
+        stats["errors_injected"] += 1
+        return JSONResponse({"error": "injected failure"}, status_code=ERROR_STATUS)
+
+    return await call_next(request)
+
+
+@app.post("/projects")
+async def create_project(data: dict):
+    project_id = str(uuid.uuid4())
+    projects[project_id] = {
+        "id": project_id,
+        "name": data.get("name", "Projeto"),
+        "created_at": datetime.utcnow().isoformat()
+    }
+    return JSONResponse(projects[project_id], status_code=201)
+
+
+@app.get("/projects")
+async def list_projects():
+    return list(projects.values())[:20]
+
+
+@app.get("/projects/{project_id}")
+async def get_project(project_id: str):
+    # Projetos "do usuário" não existem aqui: devolve um nome estável
+    return projects.get(project_id, {"id": project_id, "name": f"Projeto {project_id[:8]}"})
+
+
+@app.patch("/projects/{project_id}")
+async def update_project(project_id: str, data: dict):
+    project = projects.setdefault(project_id, {"id": project_id})
+    project.update({k: v for k, v in data.items() if k == "name"})
+    return project
+
+
+@app.post("/projects/{project_id}/chat")
+async def chat(project_id: str, data: dict):
+    if not data.get("message"):
+        raise HTTPException(status_code=400, detail="message is required")
+
+    stats["chats"] += 1
+    return JSONResponse({"status": "accepted"}, status_code=202)
+
+
+@app.get("/_stats")
+async def get_stats():
+    return {**stats, "projects": len(projects)}
+
+
+if __name__ == "__main__":
+    port = int(os.getenv("FAKE_LOVABLE_PORT", 8100))
+    print(f"[FAKE LOVABLE] http://127.0.0.1:{port} "
+          f"(latência {LATENCY_MS}+{JITTER_MS}ms, erros {ERROR_RATE:.0%} → {ERROR_STATUS})")
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
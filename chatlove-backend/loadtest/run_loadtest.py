@@ -0,0 +1,163 @@
+"""
+Teste de carga dos endpoints de proxy e validação de licença
+Mede throughput e latência p50/p95/p99 contra um backend apontado
+para o fake Lovable (loadtest/fake_lovable.py)
+
+Uso:
+    python loadtest/fake_lovable.py
+    LOVABLE_API_URL=http://127.0.0.1:8100 python main.py
+    python loadtest/run_loadtest.py --requests 2000 --concurrency 50
+
+NÃO rode contra a API real do Lovable: cada requisição consome créditos.
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+import argparse
+import asyncio
+import time
+import uuid
+import httpx
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    latencies_ms: List[float] = field(default_factory=list)
+    statuses: Dict[int, int] = field(default_factory=dict)
+    elapsed_s: float = 0.0
+
+    def percentile(self, p: float) -> float:
+        """Percentil por nearest-rank"""
+        if not self.latencies_ms:
+            return 0.0
+        ordered = sorted(self.latencies_ms)
+        index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered))) - 1))
+        return ordered[index]
+
+    def report(self):
+        total = len(self.latencies_ms)
+        ok = sum(count for status, count in self.statuses.items() if 200 <= status < 300)
+        throughput = total / self.elapsed_s if self.elapsed_s else 0.0
+
+        print(f"\n[{self.name}]")
+        print(f"  requisições: {total} ({ok} ok) em {self.elapsed_s:.2f}s")
+        print(f"  throughput:  {throughput:.1f} req/s")
+        print(f"  latência:    p50 {self.percentile(50):.1f}ms | "
+              f"p95 {self.percentile(95):.1f}ms | p99 {self.percentile(99):.1f}ms")
+        print(f"  status:      {dict(sorted(self.statuses.items()))}")
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    name: str,
+    build_request: Callable[[int], dict],
+    total: int,
+    concurrency: int
+) -> ScenarioResult:
+    """Dispara `total` requisições com até `concurrency` simultâneas"""
+    result = ScenarioResult(name=name)
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            kwargs = build_request(i)
+            start = time.perf_counter()
+            try:
+                response = await client.request(**kwargs)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = 0  # erro de transporte
+            result.latencies_ms.append((time.perf_counter() - start) * 1000)
+            result.statuses[status] = result.statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    result.elapsed_s = time.perf_counter() - start
+    return result
+
+
+async def setup(client: httpx.AsyncClient, username: str, password: str) -> dict:
+    """Cria licença e conta hub de teste via API admin"""
+    login = await client.post("/api/admin/login", json={"username": username, "password": password})
+    login.raise_for_status()
+    headers = {"Authorization": f"Bearer {login.json()['token']}"}
+
+    license_response = await client.post("/api/admin/licenses", json={"license_type": "full"}, headers=headers)
+    license_response.raise_for_status()
+    license_key = license_response.json()["license"]["license_key"]
+
+    hub_response = await client.post("/api/admin/hub-accounts", headers=headers, json={
+        "name": "Loadtest Hub",
+        "email": f"loadtest-{uuid.uuid4().hex[:8]}@example.com",
+        "session_token": "loadtest-hub-token",
+        "credits_remaining": 1_000_000.0,
+        "priority": 0
+    })
+    hub_response.raise_for_status()
+
+    # Primeira validação ativa a licença
+    await client.post("/api/validate-license", json={"license_key": license_key})
+    return {"license_key": license_key}
+
+
+def build_scenarios(context: dict, projects: int) -> Dict[str, Callable[[int], dict]]:
+    license_key = context["license_key"]
+
+    return {
+        "validate-license": lambda i: {
+            "method": "POST",
+            "url": "/api/validate-license",
+            "json": {"license_key": license_key}
+        },
+        "master-proxy": lambda i: {
+            "method": "POST",
+            "url": "/api/master-proxy",
+            "json": {
+                "project_id": f"loadtest-project-{i % projects}",
+                "message": f"Mensagem de carga {i}",
+                "session_token": "loadtest-user-token",
+                "license_key": license_key
+            }
+        },
+        "proxy-hub": lambda i: {
+            "method": "POST",
+            "url": "/api/proxy-hub",
+            "json": {
+                "license_key": license_key,
+                "original_project_id": f"loadtest-project-{i % projects}",
+                "message": f"Mensagem de carga {i}",
+                "user_session_token": "loadtest-user-token"
+            }
+        }
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="ChatLove load test")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenario", action="append", choices=["validate-license", "master-proxy", "proxy-hub"],
+                        help="Cenário a executar (repetível; padrão: todos)")
+    parser.add_argument("--requests", type=int, default=1000, help="Requisições por cenário")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--projects", type=int, default=10, help="Projetos distintos usados nos envios")
+    parser.add_argument("--admin-user", default="admin")
+    parser.add_argument("--admin-password", default="admin123")
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60.0, limits=limits) as client:
+        context = await setup(client, args.admin_user, args.admin_password)
+        scenarios = build_scenarios(context, args.projects)
+
+        print("=" * 60)
+        print(f"LOAD TEST: {args.base_url} ({args.requests} req, concorrência {args.concurrency})")
+        print("=" * 60)
+
+        for name in args.scenario or list(scenarios):
+            result = await run_scenario(client, name, scenarios[name], args.requests, args.concurrency)
+            result.report()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
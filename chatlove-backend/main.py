@@ -3,31 +3,86 @@ ChatLove - Backend API
 FastAPI server with license management and Lovable proxy
 """
 
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, status, File, Form, UploadFile
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from typing import Optional, List
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta
 from starlette.middleware.cors import CORSMiddleware
 import uvicorn
 import os
 import httpx
+from dotenv import load_dotenv
+
+# Load environment variables (antes dos módulos locais, que leem o ambiente ao importar)
+load_dotenv()
 
-from database import get_db, init_db, create_default_admin, User, License, UsageLog, Admin, HubAccount, ProjectMapping
+from database import DATABASE_URL, SessionLocal, get_db, init_db, create_default_admin, User, License, UsageLog, Admin, HubAccount, ProjectMapping, PooledHubProject
 from auth import (
+    SECRET_KEY_CONFIGURED,
     verify_password, get_password_hash, create_access_token, verify_token,
     generate_license_key, generate_hardware_id, verify_hardware_id,
     calculate_tokens_saved
 )
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# Lovable API Configuration
-LOVABLE_API_URL = "https://api.lovable.dev"
+from idempotency import IdempotencyStore, resolve_idempotency_key, scoped_idempotency_key
+from hub_pool import HubProjectPool
+from hub_bulkhead import HubBulkheads, HubSaturated
+from hub_health import HubHealthProber
+from shared_state import create_shared_state, MemoryState, RateLimiter
+from license_cache import LicenseCache, license_snapshot, snapshot_expired
+from license_events import LicenseEventHub
+from responses import fast_json, not_modified, CollectionVersions
+from uploads import UploadLimitMiddleware, check_uploads, stream_files_json
+from accounting import UsageAccountant
+from read_replica import AnalyticsReplica
+
+# Lovable API Configuration (sobrescreva para apontar ao fake de loadtest/)
+LOVABLE_API_URL = os.getenv("LOVABLE_API_URL", "https://api.lovable.dev").rstrip("/")
+
+# Idempotency keys (retries da extensão não reenviam o prompt)
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", 600))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", 10000))
+
+# Pool de projetos pré-criados por conta hub (0 = desativado)
+HUB_PROJECT_POOL_SIZE = int(os.getenv("HUB_PROJECT_POOL_SIZE", 3))
+HUB_PROJECT_POOL_REFILL_SECONDS = float(os.getenv("HUB_PROJECT_POOL_REFILL_SECONDS", 60))
+
+# Bulkheads por conta hub (chats simultâneos, fila de admissão e prazo)
+HUB_MAX_IN_FLIGHT = int(os.getenv("HUB_MAX_IN_FLIGHT", 4))
+HUB_ADMISSION_QUEUE = int(os.getenv("HUB_ADMISSION_QUEUE", 8))
+HUB_ADMISSION_TIMEOUT_SECONDS = float(os.getenv("HUB_ADMISSION_TIMEOUT_SECONDS", 5))
+
+# Verificação periódica dos tokens hub (0 = desativado)
+HUB_HEALTH_INTERVAL_SECONDS = float(os.getenv("HUB_HEALTH_INTERVAL_SECONDS", 300))
+HUB_HEALTH_PROBE_PATH = os.getenv("HUB_HEALTH_PROBE_PATH", "/projects")
+
+# Estado compartilhado entre réplicas (memory:// ou redis://...)
+SHARED_STATE_URL = os.getenv("SHARED_STATE_URL", "memory://")
+if not SECRET_KEY_CONFIGURED and not SHARED_STATE_URL.startswith("memory://"):
+    # Cada réplica geraria a própria chave e rejeitaria os tokens das outras
+    raise RuntimeError("SECRET_KEY é obrigatória quando SHARED_STATE_URL aponta para um estado compartilhado")
+LICENSE_CACHE_TTL_SECONDS = float(os.getenv("LICENSE_CACHE_TTL_SECONDS", 60))
+LICENSE_RATE_LIMIT_PER_MINUTE = int(os.getenv("LICENSE_RATE_LIMIT_PER_MINUTE", 0))  # 0 = sem limite
+LICENSE_BATCH_MAX = int(os.getenv("LICENSE_BATCH_MAX", 100))  # Chaves por /api/validate-licenses
+USAGE_BATCH_MAX = int(os.getenv("USAGE_BATCH_MAX", 500))      # Registros por /api/credits/log/batch
+
+# Anexos multipart de /api/proxy/upload
+UPLOAD_MAX_FILES = int(os.getenv("UPLOAD_MAX_FILES", 10))
+UPLOAD_MAX_FILE_MB = int(os.getenv("UPLOAD_MAX_FILE_MB", 20))
+UPLOAD_MAX_TOTAL_MB = int(os.getenv("UPLOAD_MAX_TOTAL_MB", 50))
+
+# Registro de uso após a resposta (outbox por réplica; vazio = só memória)
+ACCOUNTING_OUTBOX_PATH = os.getenv("ACCOUNTING_OUTBOX_PATH", "accounting_outbox.jsonl")
+ACCOUNTING_BATCH_SIZE = int(os.getenv("ACCOUNTING_BATCH_SIZE", 100))
+
+# Leituras do admin fora do banco transacional
+ANALYTICS_DATABASE_URL = os.getenv("ANALYTICS_DATABASE_URL", "")  # Réplica dedicada (ex.: PostgreSQL standby)
+ANALYTICS_SNAPSHOT_PATH = os.getenv("ANALYTICS_SNAPSHOT_PATH", "./chatlove_analytics.db")
+ANALYTICS_SNAPSHOT_SECONDS = float(os.getenv("ANALYTICS_SNAPSHOT_SECONDS", 60))  # Só SQLite; 0 = ler do principal
 
 # =============================================================================
 # APP SETUP
@@ -36,7 +91,8 @@ LOVABLE_API_URL = "https://api.lovable.dev"
 app = FastAPI(
     title="ChatLove API",
     description="License management and Lovable proxy",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS - Using Starlette's CORSMiddleware directly
@@ -60,23 +116,111 @@ else:
         "https://lovable.dev"
     ]
 
+# Recusa uploads grandes antes do parsing multipart (registrado antes do
+# CORS para que o 413 também leve os headers CORS)
+app.add_middleware(
+    UploadLimitMiddleware,
+    paths={"/api/proxy/upload"},
+    max_body=UPLOAD_MAX_TOTAL_MB * 1024 * 1024
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["https://lovable.dev"],  # ← CORREÇÃO: Apenas um valor
     allow_origin_regex=r"chrome-extension://.*",  # Permitir todas extensions do Chrome
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Content-Type", "Authorization", "X-Requested-With"],
+    allow_headers=["Content-Type", "Authorization", "X-Requested-With", "Idempotency-Key"],
 )
 
 # Security
 security = HTTPBearer()
 
+# Estado compartilhado, cache de licenças e rate limit por licença
+shared_state = create_shared_state(SHARED_STATE_URL)
+license_cache = LicenseCache(shared_state, ttl=LICENSE_CACHE_TTL_SECONDS)
+license_rate_limiter = RateLimiter(shared_state, limit=LICENSE_RATE_LIMIT_PER_MINUTE)
+
+# Versões por coleção para ETags das leituras do admin
+collection_versions = CollectionVersions(shared_state)
+
+# Push de status da licença (SSE) para as extensões
+license_event_hub = LicenseEventHub(shared_state)
+
+# Deduplicação de envios para o Lovable
+idempotency_store = IdempotencyStore(
+    ttl_seconds=IDEMPOTENCY_TTL_SECONDS,
+    max_entries=IDEMPOTENCY_MAX_KEYS,
+    shared=None if isinstance(shared_state, MemoryState) else shared_state
+)
+
+# Provisionador de projetos hub
+hub_project_pool = HubProjectPool(
+    api_url=LOVABLE_API_URL,
+    target_size=HUB_PROJECT_POOL_SIZE,
+    refill_interval=HUB_PROJECT_POOL_REFILL_SECONDS,
+    on_change=lambda: collection_versions.bump("projects"),
+    shared=None if isinstance(shared_state, MemoryState) else shared_state
+)
+
+# Limite de concorrência por conta hub
+hub_bulkheads = HubBulkheads(
+    default_max_in_flight=HUB_MAX_IN_FLIGHT,
+    max_queue=HUB_ADMISSION_QUEUE,
+    admission_timeout=HUB_ADMISSION_TIMEOUT_SECONDS
+)
+
+# Verificação de tokens hub
+hub_health_prober = HubHealthProber(
+    api_url=LOVABLE_API_URL,
+    probe_path=HUB_HEALTH_PROBE_PATH,
+    interval=HUB_HEALTH_INTERVAL_SECONDS,
+    on_change=lambda: collection_versions.bump("hub_accounts")
+)
+
+async def on_hub_throttled(account_id: str):
+    """429 visto por qualquer réplica reduz o limite da conta em todas"""
+    hub_bulkheads.throttle(int(account_id))
+
+shared_state.subscribe("hub-throttled", on_hub_throttled)
+
+# Gravação de uso/créditos fora do caminho da resposta dos proxies
+usage_accountant = UsageAccountant(
+    outbox_path=ACCOUNTING_OUTBOX_PATH,
+    on_applied=lambda license_key, tokens_saved: push_credits(license_key, tokens_saved),
+    batch_size=ACCOUNTING_BATCH_SIZE
+)
+
+# Réplica/snapshot para as leituras de /api/admin/*
+analytics_replica = AnalyticsReplica(
+    primary_url=DATABASE_URL,
+    replica_url=ANALYTICS_DATABASE_URL,
+    snapshot_path=ANALYTICS_SNAPSHOT_PATH,
+    snapshot_interval=ANALYTICS_SNAPSHOT_SECONDS,
+    state=shared_state,
+    change_token=lambda: collection_versions.etag("users", "licenses", "usage", "hub_accounts", "projects")
+)
+
+
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
     init_db()
     create_default_admin()
+    await shared_state.start()
+    hub_project_pool.start()
+    hub_health_prober.start()
+    usage_accountant.start()
+    analytics_replica.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await hub_project_pool.stop()
+    await hub_health_prober.stop()
+    await usage_accountant.stop()
+    await analytics_replica.stop()
+    await shared_state.close()
 
 
 # =============================================================================
@@ -105,6 +249,7 @@ class ProxyRequest(BaseModel):
     message: str
     lovable_session: str
     files: Optional[List[dict]] = None
+    idempotency_key: Optional[str] = None
 
 
 class UserCreate(BaseModel):
@@ -122,6 +267,7 @@ class MasterProxyRequest(BaseModel):
     message: str
     session_token: str
     license_key: Optional[str] = None
+    idempotency_key: Optional[str] = None
 
 
 class MasterProxyResponse(BaseModel):
@@ -134,12 +280,24 @@ class ValidateLicenseRequest(BaseModel):
     license_key: str
 
 
+class ValidateLicensesRequest(BaseModel):
+    license_keys: List[str]
+
+
+class UsageRecord(BaseModel):
+    id: Optional[str] = None        # ID gerado pelo cliente (torna retries idempotentes)
+    license_key: str
+    tokens_saved: float = 0.0
+    message_length: int = 0
+
+
 class HubAccountCreate(BaseModel):
     name: str
     email: str
     session_token: str
     credits_remaining: float = 0.0
     priority: int = 0
+    max_concurrency: Optional[int] = None
 
 
 class HubAccountUpdate(BaseModel):
@@ -148,6 +306,7 @@ class HubAccountUpdate(BaseModel):
     credits_remaining: Optional[float] = None
     is_active: Optional[bool] = None
     priority: Optional[int] = None
+    max_concurrency: Optional[int] = None
 
 
 class ProxyHubRequest(BaseModel):
@@ -155,6 +314,7 @@ class ProxyHubRequest(BaseModel):
     original_project_id: str   # Projeto da conta do usuário
     message: str
     user_session_token: str    # Token da conta do usuário (para futura validação)
+    idempotency_key: Optional[str] = None  # Alternativa ao header Idempotency-Key
 
 
 # =============================================================================
@@ -191,27 +351,100 @@ def get_current_license(credentials: HTTPAuthorizationCredentials = Depends(secu
     return license
 
 
+def mark_license_used(license: License):
+    """Primeira validação: marca como usada e inicia o prazo do trial"""
+    license.is_used = True
+    license.activated_at = datetime.utcnow()
+    
+    # Se for trial, definir expiração
+    if license.license_type == "trial":
+        license.expires_at = datetime.utcnow() + timedelta(minutes=15)
+
+
+def license_status(license: Optional[dict]) -> dict:
+    """Resposta de /api/validate-license para um snapshot (também usada no push SSE)"""
+    if not license:
+        return {"success": False, "valid": False, "message": "Licença não encontrada"}
+    
+    if not license["is_active"]:
+        return {"success": False, "valid": False, "message": "Licença desativada pelo administrador"}
+    
+    if license["license_type"] == "trial" and snapshot_expired(license):
+        return {"success": False, "valid": False, "message": "Licença de teste expirada (15 minutos)"}
+    
+    return {
+        "success": True,
+        "valid": True,
+        "message": "Licença válida",
+        "license_type": license["license_type"],
+        "expires_at": license["expires_at"]
+    }
+
+
+async def push_credits(license_key: str, tokens_saved: float):
+    """Notifica extensões conectadas sobre créditos registrados (e invalida ETags de uso)"""
+    await license_event_hub.publish(license_key, "credits", {"tokens_saved": float(tokens_saved)})
+    await collection_versions.bump("usage")
+
+
+async def admin_etag(*collections: str, extra: str = "") -> str:
+    """ETag de leitura do admin: versões das coleções + geração (compartilhada) do snapshot de leitura"""
+    generation = await analytics_replica.generation()
+    return await collection_versions.etag(
+        *collections, extra="-".join(part for part in (generation, extra) if part)
+    )
+
+
+async def check_license_rate_limit(license_key: str):
+    """Rejeita com 429 quando a licença excede LICENSE_RATE_LIMIT_PER_MINUTE"""
+    if not await license_rate_limiter.hit(f"license:{license_key}"):
+        raise HTTPException(
+            status_code=429,
+            detail="Muitas requisições para esta licença. Aguarde um instante.",
+            headers={"Retry-After": "60"}
+        )
+
+
 # =============================================================================
 # HUB HELPER FUNCTIONS
 # =============================================================================
 
 def get_active_hub_account(db: Session) -> HubAccount:
     """
-    Retorna primeira conta hub ativa
-    (Versão simplificada - sem rotação)
+    Retorna a conta hub ativa de maior prioridade com capacidade
+    
+    Contas com slot livre vêm primeiro; se todas estão ocupadas, usa a
+    de menor fila que ainda admite requisições. Contas saturadas são puladas.
     """
-    account = db.query(HubAccount).filter(
+    accounts = db.query(HubAccount).filter(
         HubAccount.is_active == True
     ).order_by(
         HubAccount.priority.asc()
-    ).first()
+    ).all()
     
-    if not account:
+    if not accounts:
         raise HTTPException(
             status_code=503,
             detail="Nenhuma conta hub disponível. Configure uma conta no admin panel."
         )
     
+    bulkheads = {a.id: hub_bulkheads.get(a.id, a.max_concurrency) for a in accounts}
+    
+    account = next((a for a in accounts if bulkheads[a.id].has_free_slot()), None)
+    
+    if account is None:
+        admissible = [a for a in accounts if not bulkheads[a.id].is_saturated()]
+        
+        if not admissible:
+            retry_after = min(b.expected_wait() for b in bulkheads.values())
+            raise HTTPException(
+                status_code=503,
+                detail="Todas as contas hub estão ocupadas. Tente novamente em instantes.",
+                headers={"Retry-After": str(max(1, int(retry_after + 0.5)))}
+            )
+        
+        account = min(admissible, key=lambda a: bulkheads[a.id].queued)
+    
     # Atualizar estatísticas
     account.last_used_at = datetime.utcnow()
     account.total_requests += 1
@@ -241,6 +474,30 @@ async def get_or_create_hub_project(
         print(f"[HUB] Usando projeto mapeado: {mapping.hub_project_id}")
         return mapping.hub_project_id
     
+    # Projeto pré-criado disponível: mapeia já e renomeia em background
+    pooled_project_id = hub_project_pool.claim(db, hub_account)
+    
+    if pooled_project_id:
+        mapping = ProjectMapping(
+            original_project_id=original_project_id,
+            hub_project_id=pooled_project_id,
+            hub_account_id=hub_account.id,
+            project_name=f"Projeto {original_project_id[:8]}"
+        )
+        db.add(mapping)
+        db.commit()
+        await collection_versions.bump("projects")
+        
+        hub_project_pool.rename_in_background(
+            hub_project_id=pooled_project_id,
+            hub_session_token=hub_account.session_token,
+            original_project_id=original_project_id,
+            user_session_token=user_session_token
+        )
+        
+        print(f"[HUB] Mapeamento salvo (pool): {original_project_id} → {pooled_project_id}")
+        return pooled_project_id
+    
     # Não existe - criar novo projeto no hub
     print(f"[HUB] Criando novo projeto no hub para: {original_project_id}")
     
@@ -248,7 +505,7 @@ async def get_or_create_hub_project(
         # 1. Buscar informações do projeto original
         try:
             original_response = await client.get(
-                f"https://api.lovable.dev/projects/{original_project_id}",
+                f"{LOVABLE_API_URL}/projects/{original_project_id}",
                 headers={"Authorization": f"Bearer {user_session_token}"}
             )
             
@@ -264,7 +521,7 @@ async def get_or_create_hub_project(
         # 2. Criar projeto na conta hub
         try:
             create_response = await client.post(
-                "https://api.lovable.dev/projects",
+                f"{LOVABLE_API_URL}/projects",
                 headers={
                     "Authorization": f"Bearer {hub_account.session_token}",
                     "Content-Type": "application/json"
@@ -309,6 +566,7 @@ async def get_or_create_hub_project(
         )
         db.add(mapping)
         db.commit()
+        await collection_versions.bump("projects")
         
         print(f"[HUB] Mapeamento salvo: {original_project_id} → {hub_project_id}")
         
@@ -364,26 +622,36 @@ async def admin_login(login: AdminLogin, db: Session = Depends(get_db)):
 
 
 @app.get("/api/admin/dashboard")
-async def admin_dashboard(admin: Admin = Depends(get_current_admin), db: Session = Depends(get_db)):
+async def admin_dashboard(request: Request, admin: Admin = Depends(get_current_admin), db: Session = Depends(analytics_replica.get_db)):
     """Get dashboard statistics"""
+    etag = await admin_etag("users", "licenses", "usage")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
     total_users = db.query(User).count()
     total_licenses = db.query(License).count()
     active_licenses = db.query(License).filter(License.is_active == True, License.is_used == True).count()
     total_tokens = db.query(UsageLog).with_entities(func.sum(UsageLog.tokens_saved)).scalar() or 0
     total_requests = db.query(UsageLog).with_entities(func.sum(UsageLog.request_count)).scalar() or 0
     
-    return {
+    return fast_json(request, {
         "total_users": total_users,
         "total_licenses": total_licenses,
         "active_licenses": active_licenses,
         "total_tokens_saved": float(total_tokens),
         "total_requests": int(total_requests)
-    }
+    }, etag=etag)
 
 
 @app.get("/api/admin/users")
-async def list_users(admin: Admin = Depends(get_current_admin), db: Session = Depends(get_db)):
+async def list_users(request: Request, admin: Admin = Depends(get_current_admin), db: Session = Depends(analytics_replica.get_db)):
     """List all users"""
+    etag = await admin_etag("users", "licenses", "usage")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
     users = db.query(User).all()
     
     result = []
@@ -400,7 +668,7 @@ async def list_users(admin: Admin = Depends(get_current_admin), db: Session = De
             "tokens_saved": float(tokens)
         })
     
-    return result
+    return fast_json(request, result, etag=etag)
 
 
 @app.post("/api/admin/users")
@@ -413,6 +681,8 @@ async def create_user(user_data: UserCreate, admin: Admin = Depends(get_current_
     db.add(user)
     db.commit()
     db.refresh(user)
+    await collection_versions.bump("users")
+    analytics_replica.request_refresh()  # Painel relê a lista no principal até o novo snapshot
     
     return {
         "success": True,
@@ -439,6 +709,8 @@ async def update_user(user_id: int, user_data: UserCreate, admin: Admin = Depend
     user.email = email
     db.commit()
     db.refresh(user)
+    await collection_versions.bump("users")
+    analytics_replica.request_refresh()
     
     return {
         "success": True,
@@ -461,13 +733,20 @@ async def delete_user(user_id: int, admin: Admin = Depends(get_current_admin), d
     # Delete user (licenses will be orphaned but kept)
     db.delete(user)
     db.commit()
+    await collection_versions.bump("users")
+    analytics_replica.request_refresh()
     
     return {"success": True, "message": "User deleted"}
 
 
 @app.get("/api/admin/licenses")
-async def list_licenses(admin: Admin = Depends(get_current_admin), db: Session = Depends(get_db)):
+async def list_licenses(request: Request, admin: Admin = Depends(get_current_admin), db: Session = Depends(analytics_replica.get_db)):
     """List all licenses"""
+    etag = await admin_etag("licenses", "users", "usage")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
     licenses = db.query(License).all()
     
     result = []
@@ -489,7 +768,7 @@ async def list_licenses(admin: Admin = Depends(get_current_admin), db: Session =
             "tokens_saved": float(tokens)
         })
     
-    return result
+    return fast_json(request, result, etag=etag)
 
 
 @app.post("/api/admin/licenses")
@@ -505,6 +784,8 @@ async def create_license(license_data: LicenseCreate, admin: Admin = Depends(get
     db.add(license)
     db.commit()
     db.refresh(license)
+    await collection_versions.bump("licenses")
+    analytics_replica.request_refresh()
     
     return {
         "success": True,
@@ -527,6 +808,13 @@ async def update_license(license_id: int, is_active: bool, admin: Admin = Depend
     
     license.is_active = is_active
     db.commit()
+    await collection_versions.bump("licenses")
+    analytics_replica.request_refresh()
+    
+    await license_cache.invalidate(license.license_key)
+    await license_event_hub.publish(
+        license.license_key, "license", license_status(license_snapshot(license))
+    )
     
     return {"success": True, "is_active": is_active}
 
@@ -543,8 +831,14 @@ async def delete_license(license_id: int, admin: Admin = Depends(get_current_adm
     db.query(UsageLog).filter(UsageLog.license_id == license_id).delete()
     
     # Delete license
+    license_key = license.license_key
     db.delete(license)
     db.commit()
+    await collection_versions.bump("licenses", "usage")
+    analytics_replica.request_refresh()
+    
+    await license_cache.invalidate(license_key)
+    await license_event_hub.publish(license_key, "license", license_status(None))
     
     return {"success": True, "message": "License deleted"}
 
@@ -554,10 +848,32 @@ async def delete_license(license_id: int, admin: Admin = Depends(get_current_adm
 # =============================================================================
 
 @app.post("/api/proxy-hub")
-async def proxy_hub(request: ProxyHubRequest, db: Session = Depends(get_db)):
+async def proxy_hub(
+    request: ProxyHubRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db)
+):
     """
     Proxy Hub - Envia mensagens usando conta hub
     
+    Com Idempotency-Key (header ou campo no payload), retries da mesma
+    mensagem recebem o resultado original sem chamar o Lovable de novo.
+    """
+    key = resolve_idempotency_key(idempotency_key, request.idempotency_key)
+    
+    if not key:
+        return await send_via_hub(request, db)
+    
+    return await idempotency_store.run(
+        scoped_idempotency_key("proxy-hub", request.license_key, key),
+        lambda: send_via_hub(request, db)
+    )
+
+
+async def send_via_hub(request: ProxyHubRequest, db: Session):
+    """
+    Envio real do Proxy Hub
+    
     Fluxo:
     1. Valida licença do usuário
     2. Seleciona conta hub ativa
@@ -575,26 +891,25 @@ async def proxy_hub(request: ProxyHubRequest, db: Session = Depends(get_db)):
     # ========================================
     # 1. VALIDAR LICENÇA
     # ========================================
-    license = db.query(License).filter(
-        License.license_key == request.license_key
-    ).first()
+    license = await license_cache.get(db, request.license_key)
     
     if not license:
         raise HTTPException(status_code=404, detail="Licença não encontrada")
     
-    if not license.is_active:
+    if not license["is_active"]:
         raise HTTPException(
             status_code=403,
             detail="Licença desativada pelo administrador"
         )
     
     # Verificar trial expirada
-    if license.license_type == "trial":
-        if license.expires_at and datetime.utcnow() > license.expires_at:
-            raise HTTPException(
-                status_code=403,
-                detail="Licença trial expirada (15 minutos)"
-            )
+    if license["license_type"] == "trial" and snapshot_expired(license):
+        raise HTTPException(
+            status_code=403,
+            detail="Licença trial expirada (15 minutos)"
+        )
+    
+    await check_license_rate_limit(request.license_key)
     
     print(f"[HUB] Licença validada: {request.license_key}")
     
@@ -602,6 +917,7 @@ async def proxy_hub(request: ProxyHubRequest, db: Session = Depends(get_db)):
     # 2. SELECIONAR CONTA HUB
     # ========================================
     try:
+        # total_requests/last_used_at aparecem no admin pela versão "usage" (bump do lote de uso)
         hub_account = get_active_hub_account(db)
         print(f"[HUB] Conta selecionada: {hub_account.name} ({hub_account.email})")
     except HTTPException as e:
@@ -632,7 +948,7 @@ async def proxy_hub(request: ProxyHubRequest, db: Session = Depends(get_db)):
     # ========================================
     # 4. ENVIAR PARA LOVABLE (USANDO TOKEN HUB)
     # ========================================
-    lovable_url = f"https://api.lovable.dev/projects/{hub_project_id}/chat"
+    lovable_url = f"{LOVABLE_API_URL}/projects/{hub_project_id}/chat"
     
     payload = {
         "message": request.message,
@@ -650,16 +966,25 @@ async def proxy_hub(request: ProxyHubRequest, db: Session = Depends(get_db)):
     print(f"[HUB] Mensagem: {request.message[:50]}...")
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                lovable_url,
-                headers=headers,
-                json=payload
-            )
+        async with hub_bulkheads.slot(hub_account.id, hub_account.max_concurrency) as bulkhead:
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                response = await client.post(
+                    lovable_url,
+                    headers=headers,
+                    json=payload
+                )
             
             print(f"[HUB] Resposta Lovable: {response.status_code}")
             
-            if response.status_code == 401:
+            if response.status_code == 429:
+                bulkhead.on_throttled()
+                await shared_state.publish("hub-throttled", str(hub_account.id))
+                raise HTTPException(
+                    status_code=429,
+                    detail="Conta hub limitada pelo Lovable. Tente novamente em instantes.",
+                    headers={"Retry-After": response.headers.get("Retry-After", "5")}
+                )
+            elif response.status_code == 401:
                 raise HTTPException(
                     status_code=401,
                     detail="Token da conta hub inválido ou expirado. Atualize no admin."
@@ -675,8 +1000,16 @@ async def proxy_hub(request: ProxyHubRequest, db: Session = Depends(get_db)):
                     detail=f"Erro do Lovable: {response.text}"
                 )
             
+            bulkhead.on_success()
             print(f"[HUB] ✓ Mensagem enviada com sucesso!")
     
+    except HubSaturated as e:
+        print(f"[HUB] Conta {hub_account.name} saturada, requisição descartada")
+        raise HTTPException(
+            status_code=503,
+            detail="Conta hub ocupada. Tente novamente em instantes.",
+            headers={"Retry-After": str(max(1, int(e.retry_after + 0.5)))}
+        )
     except httpx.TimeoutException:
         raise HTTPException(
             status_code=504,
@@ -691,44 +1024,38 @@ async def proxy_hub(request: ProxyHubRequest, db: Session = Depends(get_db)):
         )
     
     # ========================================
-    # 5. REGISTRAR USO
+    # 5. REGISTRAR USO (após a resposta)
     # ========================================
     tokens_saved = len(request.message) / 4  # Estimativa simples
     
-    usage = UsageLog(
-        license_id=license.id,
-        tokens_saved=float(tokens_saved),
+    # UsageLog e desconto de créditos do hub gravados em lote pelo worker
+    usage_accountant.record(
+        license_key=request.license_key,
+        license_id=license["id"],
+        tokens_saved=tokens_saved,
         message_length=len(request.message),
-        request_count=1,
-        hub_account_id=hub_account.id,           # ← NOVO
-        original_project_id=request.original_project_id,  # ← NOVO
-        hub_project_id=hub_project_id            # ← NOVO
+        hub_account_id=hub_account.id,
+        original_project_id=request.original_project_id,
+        hub_project_id=hub_project_id
     )
-    db.add(usage)
-    
-    # Atualizar créditos estimados da conta hub
-    hub_account.credits_remaining -= tokens_saved
-    if hub_account.credits_remaining < 0:
-        hub_account.credits_remaining = 0
-    
-    db.commit()
+    hub_credits_remaining = max(0.0, hub_account.credits_remaining - tokens_saved)
     
-    print(f"[HUB] Uso registrado: {tokens_saved:.2f} tokens")
-    print(f"[HUB] Créditos restantes (hub): {hub_account.credits_remaining:.2f}")
+    print(f"[HUB] Uso enfileirado: {tokens_saved:.2f} tokens")
+    print(f"[HUB] Créditos restantes (hub): {hub_credits_remaining:.2f}")
     print("=" * 60 + "\n")
     
     # ========================================
     # 6. RETORNAR SUCESSO
     # ========================================
-    return {
+    return ORJSONResponse({
         "success": True,
         "message": "Mensagem enviada via conta hub!",
         "hub_account_name": hub_account.name,
         "hub_account_email": hub_account.email,
         "hub_project_id": hub_project_id,
         "tokens_saved": float(tokens_saved),
-        "hub_credits_remaining": float(hub_account.credits_remaining)
-    }
+        "hub_credits_remaining": float(hub_credits_remaining)
+    })
 
 
 # =============================================================================
@@ -737,10 +1064,16 @@ async def proxy_hub(request: ProxyHubRequest, db: Session = Depends(get_db)):
 
 @app.get("/api/admin/hub-accounts")
 async def list_hub_accounts(
+    request: Request,
     admin: Admin = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: Session = Depends(analytics_replica.get_db)
 ):
-    """Lista todas as contas hub"""
+    """Lista todas as contas hub (concorrência ao vivo: /api/admin/hub-accounts/concurrency)"""
+    etag = await admin_etag("hub_accounts", "projects", "usage")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
     accounts = db.query(HubAccount).all()
     
     result = []
@@ -765,15 +1098,46 @@ async def list_hub_accounts(
             "is_active": account.is_active,
             "priority": account.priority,
             "total_requests": account.total_requests,
+            "max_concurrency": account.max_concurrency or HUB_MAX_IN_FLIGHT,
             "projects_mapped": projects_count,
             "tokens_used": float(tokens_used),
             "last_used_at": account.last_used_at.isoformat() if account.last_used_at else None,
+            "health": {
+                "status": account.health_status or "unknown",
+                "checked_at": account.health_checked_at.isoformat() if account.health_checked_at else None,
+                "latency_ms": account.health_latency_ms,
+                "error": account.health_error
+            },
             "created_at": account.created_at.isoformat(),
             # Esconder token (segurança)
             "session_token_preview": account.session_token[:20] + "..." if account.session_token else None
         })
     
-    return result
+    return fast_json(request, result, etag=etag)
+
+
+@app.get("/api/admin/hub-accounts/concurrency")
+async def hub_accounts_concurrency(
+    request: Request,
+    admin: Admin = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Concorrência ao vivo das contas hub nesta réplica (em uso, fila, limite AIMD)
+    
+    Muda a cada chat e difere entre réplicas, por isso fica fora da
+    listagem com ETag e não é cacheada
+    """
+    accounts = db.query(HubAccount.id, HubAccount.max_concurrency).all()
+    
+    result = {
+        str(account_id): hub_bulkheads.get(account_id, max_concurrency).snapshot()
+        for account_id, max_concurrency in accounts
+    }
+    
+    response = fast_json(request, result)
+    response.headers["Cache-Control"] = "no-store"
+    return response
 
 
 @app.post("/api/admin/hub-accounts")
@@ -800,12 +1164,15 @@ async def create_hub_account(
         email=data.email,
         session_token=data.session_token,
         credits_remaining=data.credits_remaining,
-        priority=data.priority
+        priority=data.priority,
+        max_concurrency=data.max_concurrency
     )
     
     db.add(account)
     db.commit()
     db.refresh(account)
+    await collection_versions.bump("hub_accounts")
+    analytics_replica.request_refresh()
     
     return {
         "success": True,
@@ -839,17 +1206,24 @@ async def update_hub_account(
         account.name = data.name
     if data.session_token is not None:
         account.session_token = data.session_token
+        account.health_status = "unknown"  # Novo token: aguarda próximo probe
+        account.health_error = None
     if data.credits_remaining is not None:
         account.credits_remaining = data.credits_remaining
     if data.is_active is not None:
         account.is_active = data.is_active
     if data.priority is not None:
         account.priority = data.priority
+    if data.max_concurrency is not None:
+        # 0 volta para o padrão do servidor
+        account.max_concurrency = data.max_concurrency or None
     
     account.updated_at = datetime.utcnow()
     
     db.commit()
     db.refresh(account)
+    await collection_versions.bump("hub_accounts")
+    analytics_replica.request_refresh()
     
     return {
         "success": True,
@@ -882,9 +1256,18 @@ async def delete_hub_account(
         ProjectMapping.hub_account_id == account_id
     ).delete()
     
+    # Descartar projetos do pool
+    db.query(PooledHubProject).filter(
+        PooledHubProject.hub_account_id == account_id
+    ).delete()
+    
     # Deletar conta
     db.delete(account)
     db.commit()
+    await collection_versions.bump("hub_accounts", "projects")
+    analytics_replica.request_refresh()
+    
+    hub_bulkheads.forget(account_id)
     
     return {"success": True, "message": "Conta hub removida"}
 
@@ -892,10 +1275,15 @@ async def delete_hub_account(
 @app.get("/api/admin/hub-accounts/{account_id}/projects")
 async def list_hub_projects(
     account_id: int,
+    request: Request,
     admin: Admin = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: Session = Depends(analytics_replica.get_db)
 ):
     """Lista projetos mapeados de uma conta hub"""
+    etag = await admin_etag("projects", "usage")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
     
     mappings = db.query(ProjectMapping).filter(
         ProjectMapping.hub_account_id == account_id
@@ -917,7 +1305,7 @@ async def list_hub_projects(
             "created_at": mapping.created_at.isoformat()
         })
     
-    return result
+    return fast_json(request, result, etag=etag)
 
 
 # =============================================================================
@@ -959,6 +1347,9 @@ async def activate_license(data: LicenseActivate, db: Session = Depends(get_db))
             license.user_id = user.id
         
         db.commit()
+        await license_cache.invalidate(license.license_key)
+        await collection_versions.bump("licenses", "users")
+        analytics_replica.request_refresh()
     
     # Generate token
     token = create_access_token({
@@ -1010,6 +1401,7 @@ async def log_usage(message_length: int, license: License = Depends(get_current_
     )
     db.add(usage)
     db.commit()
+    await push_credits(license.license_key, tokens_saved)
     
     return {
         "success": True,
@@ -1024,43 +1416,106 @@ async def log_usage(message_length: int, license: License = Depends(get_current_
 @app.post("/api/validate-license")
 async def validate_license_simple(request: ValidateLicenseRequest, db: Session = Depends(get_db)):
     """Valida se uma licença existe e está ativa (usado pelo popup)"""
-    license = db.query(License).filter(
-        License.license_key == request.license_key
-    ).first()
-    
-    if not license:
-        return {"success": False, "valid": False, "message": "Licença não encontrada"}
-    
-    # VERIFICAR SE ESTÁ DESATIVADA
-    if not license.is_active:
-        return {"success": False, "valid": False, "message": "Licença desativada pelo administrador"}
+    license = await license_cache.get(db, request.license_key)
     
     # MARCAR COMO USADA NA PRIMEIRA VALIDAÇÃO
-    if not license.is_used:
-        license.is_used = True
-        license.activated_at = datetime.utcnow()
+    if license and license["is_active"] and not license["is_used"]:
+        db_license = db.query(License).filter(
+            License.license_key == request.license_key
+        ).first()
         
-        # Se for trial, definir expiração
-        if license.license_type == "trial":
-            from datetime import timedelta
-            license.expires_at = datetime.utcnow() + timedelta(minutes=15)
+        if db_license and not db_license.is_used:
+            mark_license_used(db_license)
+            db.commit()
         
-        db.commit()
+        await license_cache.invalidate(request.license_key)
+        await collection_versions.bump("licenses")
+        analytics_replica.request_refresh()
+        license = license_snapshot(db_license) if db_license else license
+        
+        # Extensões já conectadas recebem o prazo do trial
+        await license_event_hub.publish(request.license_key, "license", license_status(license))
     
-    # VERIFICAR SE É TRIAL E JÁ EXPIROU
-    if license.license_type == "trial":
-        if license.expires_at:
-            if datetime.utcnow() > license.expires_at:
-                return {"success": False, "valid": False, "message": "Licença de teste expirada (15 minutos)"}
+    # Desativada, trial expirada ou válida (com tipo e expiração para o frontend)
+    return ORJSONResponse(license_status(license))
+
+
+@app.post("/api/validate-licenses")
+async def validate_licenses_batch(request: ValidateLicensesRequest, db: Session = Depends(get_db)):
+    """
+    Valida várias licenças de uma vez (revendedores, multi-perfil)
     
-    # Retornar informações da licença para o frontend
-    return {
+    Mesmas regras de /api/validate-license (inclusive ativação no primeiro
+    uso e prazo do trial), resolvidas pelo cache ou por uma única query IN.
+    """
+    license_keys = list(dict.fromkeys(request.license_keys))  # sem duplicadas, mantendo ordem
+    
+    if not license_keys:
+        raise HTTPException(status_code=400, detail="Nenhuma licença informada")
+    
+    if len(license_keys) > LICENSE_BATCH_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo de {LICENSE_BATCH_MAX} licenças por requisição"
+        )
+    
+    licenses = await license_cache.get_many(db, license_keys)
+    
+    # MARCAR COMO USADAS NA PRIMEIRA VALIDAÇÃO (um único commit)
+    first_use = [
+        key for key, license in licenses.items()
+        if license["is_active"] and not license["is_used"]
+    ]
+    
+    if first_use:
+        db_licenses = db.query(License).filter(License.license_key.in_(first_use)).all()
+        
+        for db_license in db_licenses:
+            if not db_license.is_used:
+                mark_license_used(db_license)
+        db.commit()
+        await collection_versions.bump("licenses")
+        analytics_replica.request_refresh()
+        
+        for db_license in db_licenses:
+            license = license_snapshot(db_license)
+            licenses[db_license.license_key] = license
+            await license_cache.invalidate(db_license.license_key)
+            await license_event_hub.publish(db_license.license_key, "license", license_status(license))
+    
+    return ORJSONResponse({
         "success": True,
-        "valid": True,
-        "message": "Licença válida",
-        "license_type": license.license_type,
-        "expires_at": license.expires_at.isoformat() if license.expires_at else None
-    }
+        "results": [
+            {"license_key": key, **license_status(licenses.get(key))}
+            for key in license_keys
+        ]
+    })
+
+
+@app.get("/api/license/events")
+async def license_events(license_key: str):
+    """
+    Stream SSE do status da licença (substitui o polling de /api/validate-license)
+    
+    Eventos:
+    - license: mesmo formato de /api/validate-license (revogação, exclusão, expiração)
+    - credits: {"tokens_saved": float} a cada uso registrado
+    """
+    # Sessão própria: o stream fica aberto e não deve segurar conexão do pool
+    db = SessionLocal()
+    try:
+        license = await license_cache.get(db, license_key)
+    finally:
+        db.close()
+    
+    if not license:
+        raise HTTPException(status_code=404, detail="Licença não encontrada")
+    
+    return StreamingResponse(
+        license_event_hub.stream(license_key, license_status(license)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 # =============================================================================
@@ -1068,10 +1523,27 @@ async def validate_license_simple(request: ValidateLicenseRequest, db: Session =
 # =============================================================================
 
 @app.post("/api/master-proxy", response_model=MasterProxyResponse)
-async def master_proxy(request: MasterProxyRequest, db: Session = Depends(get_db)):
+async def master_proxy(
+    request: MasterProxyRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db)
+):
     """
     Proxy para enviar mensagens ao Lovable usando session token do usuário
     """
+    key = resolve_idempotency_key(idempotency_key, request.idempotency_key)
+    
+    if not key:
+        return await send_via_master_proxy(request, db)
+    
+    return await idempotency_store.run(
+        scoped_idempotency_key("master-proxy", request.session_token, key),
+        lambda: send_via_master_proxy(request, db)
+    )
+
+
+async def send_via_master_proxy(request: MasterProxyRequest, db: Session) -> MasterProxyResponse:
+    """Envio real do Master Proxy"""
     
     # Validar dados
     if not request.session_token:
@@ -1084,28 +1556,28 @@ async def master_proxy(request: MasterProxyRequest, db: Session = Depends(get_db
         raise HTTPException(status_code=400, detail="Mensagem vazia")
     
     # VALIDAR LICENÇA ANTES DE ENVIAR
+    license = None
     if request.license_key:
-        license = db.query(License).filter(
-            License.license_key == request.license_key
-        ).first()
+        license = await license_cache.get(db, request.license_key)
         
         if not license:
             raise HTTPException(status_code=404, detail="Licença não encontrada")
         
         # Verificar se está desativada
-        if not license.is_active:
+        if not license["is_active"]:
             raise HTTPException(
                 status_code=403,
                 detail="Licença desativada pelo administrador. Entre em contato com o suporte."
             )
         
         # Verificar se é trial e expirou
-        if license.license_type == "trial":
-            if license.expires_at and datetime.utcnow() > license.expires_at:
-                raise HTTPException(
-                    status_code=403,
-                    detail="Licença de teste expirada (15 minutos). Adquira uma licença completa para continuar."
-                )
+        if license["license_type"] == "trial" and snapshot_expired(license):
+            raise HTTPException(
+                status_code=403,
+                detail="Licença de teste expirada (15 minutos). Adquira uma licença completa para continuar."
+            )
+        
+        await check_license_rate_limit(request.license_key)
     
     # Preparar requisição para Lovable
     lovable_url = f"{LOVABLE_API_URL}/projects/{request.project_id}/chat"
@@ -1132,23 +1604,19 @@ async def master_proxy(request: MasterProxyRequest, db: Session = Depends(get_db
             # 200 OK ou 202 Accepted = Sucesso
             if response.status_code in [200, 202]:
                 # Registrar créditos
-                if request.license_key:
+                if license:
                     tokens_saved = len(request.message) / 4
                     
                     try:
-                        license = db.query(License).filter(
-                            License.license_key == request.license_key
-                        ).first()
-                        
-                        if license:
-                            usage = UsageLog(
-                                license_id=license.id,
-                                tokens_saved=float(tokens_saved),
-                                message_length=len(request.message),
-                                request_count=1
-                            )
-                            db.add(usage)
-                            db.commit()
+                        usage = UsageLog(
+                            license_id=license["id"],
+                            tokens_saved=float(tokens_saved),
+                            message_length=len(request.message),
+                            request_count=1
+                        )
+                        db.add(usage)
+                        db.commit()
+                        await push_credits(request.license_key, tokens_saved)
                     except Exception as e:
                         print(f"[MASTER PROXY] Erro ao registrar créditos: {e}")
                 
@@ -1190,35 +1658,110 @@ async def log_credits(data: dict, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="License key não fornecida")
     
     # Buscar licença
-    license = db.query(License).filter(License.license_key == license_key).first()
+    license = await license_cache.get(db, license_key)
     
     if not license:
         raise HTTPException(status_code=404, detail="Licença não encontrada")
     
     # Criar registro de uso
     usage = UsageLog(
-        license_id=license.id,
+        license_id=license["id"],
         tokens_saved=float(tokens_saved),
         message_length=int(message_length),
         request_count=1
     )
     db.add(usage)
     db.commit()
+    await push_credits(license_key, tokens_saved)
     
     return {"success": True, "tokens_saved": tokens_saved}
 
 
+@app.post("/api/credits/log/batch")
+async def log_credits_batch(records: List[UsageRecord], db: Session = Depends(get_db)):
+    """
+    Registra vários usos de uma vez (cliente acumula e envia em lote)
+    
+    Licenças resolvidas pelo cache; inserção em uma única transação.
+    Registros com `id` já recebido são ignorados, então reenviar o lote é seguro.
+    """
+    if len(records) > USAGE_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"Máximo de {USAGE_BATCH_MAX} registros por lote")
+    
+    licenses = await license_cache.get_many(db, list({record.license_key for record in records}))
+    
+    rows = []
+    rejected = []
+    seen_ids = set()
+    for index, record in enumerate(records):
+        if record.id is not None and record.id in seen_ids:
+            continue  # Duplicado dentro do próprio lote
+        
+        license = licenses.get(record.license_key)
+        if not license:
+            rejected.append({"index": index, "id": record.id, "error": "Licença não encontrada"})
+            continue
+        
+        if record.id is not None:
+            seen_ids.add(record.id)
+        
+        rows.append((record.license_key, {
+            "license_id": license["id"],
+            "client_record_id": record.id,
+            "tokens_saved": float(record.tokens_saved),
+            "message_length": int(record.message_length),
+            "request_count": 1
+        }))
+    
+    # Até 2 tentativas: um retry concorrente pode inserir os mesmos IDs entre a checagem e o commit
+    for attempt in range(2):
+        if seen_ids:
+            existing = {
+                record_id for (record_id,) in db.query(UsageLog.client_record_id).filter(
+                    UsageLog.client_record_id.in_(seen_ids)
+                )
+            }
+            new_rows = [row for row in rows if row[1]["client_record_id"] not in existing]
+        else:
+            new_rows = rows
+        
+        try:
+            if new_rows:
+                db.execute(insert(UsageLog), [values for _, values in new_rows])
+            db.commit()
+            break
+        except IntegrityError:
+            db.rollback()
+            if attempt == 1:
+                raise HTTPException(status_code=409, detail="Conflito ao registrar lote; reenvie")
+    
+    # Créditos agregados por licença para o push SSE
+    totals = {}
+    for license_key, values in new_rows:
+        totals[license_key] = totals.get(license_key, 0.0) + values["tokens_saved"]
+    for license_key, tokens_saved in totals.items():
+        await push_credits(license_key, tokens_saved)
+    
+    return ORJSONResponse({
+        "success": True,
+        "accepted": len(new_rows),
+        "duplicates": len(rows) - len(new_rows) + (len(records) - len(rows) - len(rejected)),
+        "rejected": rejected,
+        "tokens_saved": float(sum(totals.values()))
+    })
+
+
 @app.get("/api/credits/total/{license_key}")
 async def get_total_credits(license_key: str, db: Session = Depends(get_db)):
     """Retorna total de créditos economizados por uma licença"""
-    license = db.query(License).filter(License.license_key == license_key).first()
+    license = await license_cache.get(db, license_key)
     
     if not license:
         raise HTTPException(status_code=404, detail="Licença não encontrada")
     
     # Somar todos os créditos
     total = db.query(UsageLog).filter(
-        UsageLog.license_id == license.id
+        UsageLog.license_id == license["id"]
     ).with_entities(
         func.sum(UsageLog.tokens_saved)
     ).scalar() or 0
@@ -1235,8 +1778,61 @@ async def get_total_credits(license_key: str, db: Session = Depends(get_db)):
 # =============================================================================
 
 @app.post("/api/proxy")
-async def send_via_proxy(request: ProxyRequest, db: Session = Depends(get_db)):
+async def send_via_proxy(
+    request: ProxyRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db)
+):
     """Send message via Lovable proxy using user's session"""
+    key = resolve_idempotency_key(idempotency_key, request.idempotency_key)
+    
+    if not key:
+        return await forward_to_lovable(request, db)
+    
+    return await idempotency_store.run(
+        scoped_idempotency_key("proxy", request.token, key),
+        lambda: forward_to_lovable(request, db)
+    )
+
+
+@app.post("/api/proxy/upload")
+async def send_via_proxy_upload(
+    token: str = Form(...),
+    project_id: str = Form(...),
+    message: str = Form(...),
+    lovable_session: str = Form(...),
+    files: List[UploadFile] = File([]),
+    idempotency_form_key: Optional[str] = Form(None, alias="idempotency_key"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db)
+):
+    """
+    Variante multipart de /api/proxy: anexos como arquivos (sem base64 no
+    corpo), mantidos em disco e repassados ao Lovable em blocos
+    """
+    uploads = files
+    check_uploads(uploads, UPLOAD_MAX_FILES, UPLOAD_MAX_FILE_MB * 1024 * 1024)
+    
+    request = ProxyRequest(
+        token=token,
+        project_id=project_id,
+        message=message,
+        lovable_session=lovable_session,
+        idempotency_key=idempotency_form_key
+    )
+    key = resolve_idempotency_key(idempotency_key, request.idempotency_key)
+    
+    if not key:
+        return await forward_to_lovable(request, db, uploads)
+    
+    return await idempotency_store.run(
+        scoped_idempotency_key("proxy-upload", request.token, key),
+        lambda: forward_to_lovable(request, db, uploads)
+    )
+
+
+async def forward_to_lovable(request: ProxyRequest, db: Session, uploads: Optional[List[UploadFile]] = None):
+    """Forward message to Lovable and log usage"""
     # Verify license token
     payload = verify_token(request.token)
     
@@ -1284,24 +1880,33 @@ async def send_via_proxy(request: ProxyRequest, db: Session = Depends(get_db)):
             }
         }
         
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {request.lovable_session}",
+            "Origin": "https://lovable.dev",
+            "Referer": "https://lovable.dev/",
+            "x-client-git-sha": "02e494f6d51b5ea5a1fc25226f7e37dab356d0cd",
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+        }
+        body = {"json": payload_data}
+        
         # Add files if provided
         if request.files:
             payload_data["files"] = request.files
         
+        # Anexos multipart: corpo gerado em blocos a partir dos arquivos em disco
+        if uploads:
+            content_length, content = stream_files_json(payload_data, uploads)
+            headers["Content-Length"] = str(content_length)
+            body = {"content": content}
+        
         # Send message to Lovable API using CORRECT endpoint
         async with httpx.AsyncClient() as client:
             response = await client.post(
-                f"https://api.lovable.dev/projects/{request.project_id}/chat",
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {request.lovable_session}",
-                    "Origin": "https://lovable.dev",
-                    "Referer": "https://lovable.dev/",
-                    "x-client-git-sha": "02e494f6d51b5ea5a1fc25226f7e37dab356d0cd",
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-                },
-                json=payload_data,
-                timeout=60.0
+                f"{LOVABLE_API_URL}/projects/{request.project_id}/chat",
+                headers=headers,
+                timeout=60.0,
+                **body
             )
             
             # Lovable returns 202 Accepted for async processing
@@ -1329,22 +1934,21 @@ async def send_via_proxy(request: ProxyRequest, db: Session = Depends(get_db)):
     except httpx.RequestError as e:
         raise HTTPException(status_code=502, detail=f"Erro de conexão: {str(e)}")
     
-    # Log usage
-    usage = UsageLog(
+    # Log usage (gravado pelo worker após a resposta)
+    usage_accountant.record(
+        license_key=license.license_key,
         license_id=license.id,
         tokens_saved=tokens_saved,
         message_length=len(request.message)
     )
-    db.add(usage)
-    db.commit()
     
     # Return success with Lovable response
-    return {
+    return ORJSONResponse({
         "success": True,
         "message": "Mensagem enviada com sucesso!",
         "tokens_saved": tokens_saved,
         "lovable_response": result
-    }
+    })
 
 
 # =============================================================================
@@ -0,0 +1,26 @@
+"""
+Migração para adicionar limite de concorrência por conta hub
+Adiciona coluna em hub_accounts: max_concurrency
+"""
+import sqlite3
+
+# Conectar ao banco
+conn = sqlite3.connect('chatlove.db')
+cursor = conn.cursor()
+
+try:
+    # Adicionar coluna max_concurrency (NULL = usa HUB_MAX_IN_FLIGHT)
+    cursor.execute("ALTER TABLE hub_accounts ADD COLUMN max_concurrency INTEGER NULL")
+    print("[OK] Coluna 'max_concurrency' adicionada")
+except sqlite3.OperationalError as e:
+    if "duplicate column name" in str(e):
+        print("[INFO] Coluna 'max_concurrency' ja existe")
+    else:
+        print(f"[ERRO] Erro ao adicionar 'max_concurrency': {e}")
+
+# Commit e fechar
+conn.commit()
+conn.close()
+
+print("\n[SUCESSO] Migracao concluida!")
+print("Reinicie o backend: python main.py")
@@ -0,0 +1,34 @@
+"""
+Migração para registrar a saúde dos tokens hub
+Adiciona colunas em hub_accounts: health_status, health_checked_at,
+health_latency_ms, health_error
+"""
+import sqlite3
+
+COLUMNS = [
+    ("health_status", "VARCHAR DEFAULT 'unknown'"),
+    ("health_checked_at", "TIMESTAMP NULL"),
+    ("health_latency_ms", "FLOAT NULL"),
+    ("health_error", "VARCHAR NULL"),
+]
+
+# Conectar ao banco
+conn = sqlite3.connect('chatlove.db')
+cursor = conn.cursor()
+
+for name, definition in COLUMNS:
+    try:
+        cursor.execute(f"ALTER TABLE hub_accounts ADD COLUMN {name} {definition}")
+        print(f"[OK] Coluna '{name}' adicionada")
+    except sqlite3.OperationalError as e:
+        if "duplicate column name" in str(e):
+            print(f"[INFO] Coluna '{name}' ja existe")
+        else:
+            print(f"[ERRO] Erro ao adicionar '{name}': {e}")
+
+# Commit e fechar
+conn.commit()
+conn.close()
+
+print("\n[SUCESSO] Migracao concluida!")
+print("Reinicie o backend: python main.py")
@@ -0,0 +1,105 @@
+"""
+Migração genérica (SQLite e PostgreSQL) a partir dos models
+Cria tabelas ausentes e adiciona colunas/índices que faltam, usando os
+tipos de database.py compilados para o banco de DATABASE_URL.
+Substitui os scripts migrate_*.py específicos de SQLite.
+
+Uso:
+    python migrate_schema.py              # aplica
+    python migrate_schema.py --describe   # imprime o schema normalizado (para diff entre bancos)
+"""
+
+from sqlalchemy import inspect, literal, text
+import sys
+
+from database import Base, engine
+
+
+def column_default_sql(column) -> str:
+    """DEFAULT literal para ADD COLUMN (apenas defaults escalares)"""
+    default = column.default
+    if default is None or not default.is_scalar:
+        return ""
+    value = literal(default.arg, column.type).compile(
+        dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+    )
+    return f" DEFAULT {value}"
+
+
+def migrate():
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    # Tabelas novas já nascem completas (colunas, índices, FKs)
+    Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                print(f"[OK] Tabela '{table.name}' criada")
+                continue
+
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                    f"{column_default_sql(column)}"
+                ))
+                print(f"[OK] Coluna '{table.name}.{column.name}' adicionada")
+
+                # SQLite não aceita UNIQUE em ADD COLUMN: índice separado nos dois bancos
+                if column.unique or column.index:
+                    unique = "UNIQUE " if column.unique else ""
+                    conn.execute(text(
+                        f"CREATE {unique}INDEX IF NOT EXISTS ix_{table.name}_{column.name} "
+                        f"ON {table.name} ({column.name})"
+                    ))
+                    print(f"[OK] Índice {unique.lower()}'ix_{table.name}_{column.name}' criado")
+
+    print("\n[SUCESSO] Schema atualizado!")
+
+
+def generic_type_name(column_type) -> str:
+    """Tipo genérico (DATETIME/TIMESTAMP → DATETIME, FLOAT/DOUBLE PRECISION → FLOAT)"""
+    name = type(column_type.as_generic()).__name__.upper()
+    return {"DOUBLE": "FLOAT", "TEXT": "STRING"}.get(name, name)
+
+
+def describe():
+    """Schema normalizado: mesma saída nos dois bancos quando estão iguais"""
+    inspector = inspect(engine)
+
+    for table in sorted(inspector.get_table_names()):
+        if table not in Base.metadata.tables:
+            continue
+        print(table)
+
+        # Ordenado por nome: ADD COLUMN sempre anexa no fim da tabela
+        for column in sorted(inspector.get_columns(table), key=lambda c: c["name"]):
+            nullable = "NULL" if column["nullable"] else "NOT NULL"
+            print(f"    {column['name']:<24} {generic_type_name(column['type']):<10} {nullable}")
+
+        unique_columns = set()
+        for index in inspector.get_indexes(table):
+            if index.get("unique"):
+                unique_columns.update(index["column_names"])
+        for constraint in inspector.get_unique_constraints(table):
+            unique_columns.update(constraint["column_names"])
+
+        primary_key = inspector.get_pk_constraint(table)["constrained_columns"]
+        print(f"    primary key: {', '.join(primary_key)}")
+        if unique_columns:
+            print(f"    unique: {', '.join(sorted(unique_columns))}")
+
+
+if __name__ == "__main__":
+    if "--describe" in sys.argv:
+        describe()
+    else:
+        print(f"Migrando schema ({engine.dialect.name})...")
+        migrate()
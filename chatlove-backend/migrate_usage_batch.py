@@ -0,0 +1,32 @@
+"""
+Migração para ingestão de uso em lote
+Adiciona coluna em usage_logs: client_record_id (única)
+"""
+import sqlite3
+
+# Conectar ao banco
+conn = sqlite3.connect('chatlove.db')
+cursor = conn.cursor()
+
+try:
+    # SQLite não aceita UNIQUE em ADD COLUMN: unicidade via índice abaixo
+    cursor.execute("ALTER TABLE usage_logs ADD COLUMN client_record_id VARCHAR NULL")
+    print("[OK] Coluna 'client_record_id' adicionada")
+except sqlite3.OperationalError as e:
+    if "duplicate column name" in str(e):
+        print("[INFO] Coluna 'client_record_id' ja existe")
+    else:
+        print(f"[ERRO] Erro ao adicionar 'client_record_id': {e}")
+
+cursor.execute(
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_usage_logs_client_record_id "
+    "ON usage_logs (client_record_id)"
+)
+print("[OK] Indice unico 'client_record_id' garantido")
+
+# Commit e fechar
+conn.commit()
+conn.close()
+
+print("\n[SUCESSO] Migracao concluida!")
+print("Reinicie o backend: python main.py")
@@ -0,0 +1,181 @@
+"""
+ChatLove - Analytics Read Replica
+Leituras do painel admin fora do banco transacional: réplica dedicada
+(ex.: PostgreSQL streaming replica) ou, com SQLite, uma cópia feita
+periodicamente pela backup API e aberta somente-leitura
+"""
+
+from typing import Awaitable, Callable, Optional
+import asyncio
+import os
+import sqlite3
+import uuid
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from database import SessionLocal, create_db_engine, normalize_database_url
+
+
+class AnalyticsReplica:
+    """
+    Modos (escolhidos pela configuração):
+        replica   -> replica_url definida: sessões abertas nela
+        snapshot  -> banco principal SQLite e snapshot_interval > 0: cópia
+                     atualizada a cada intervalo (e sob demanda via refresh())
+        primary   -> nenhum dos dois: mesmo banco das escritas
+
+    Até o primeiro snapshot existir, as leituras usam o banco principal.
+    Escritas do admin chamam request_refresh(): o snapshot é refeito em
+    segundo plano (agrupando rajadas por refresh_debounce) e, até lá, as
+    leituras deste processo voltam ao banco principal.
+
+    Com `state` (estado compartilhado) e `change_token` (versões das
+    coleções), a cópia só é refeita quando algo mudou desde a última feita
+    por qualquer processo, e a geração do snapshot é um contador no estado
+    compartilhado: igual em todos os workers/réplicas e estável enquanto
+    nada muda (entra nos ETags do admin).
+    """
+
+    def __init__(
+        self,
+        primary_url: str,
+        replica_url: str = "",
+        snapshot_path: str = "./chatlove_analytics.db",
+        snapshot_interval: float = 60.0,
+        refresh_debounce: float = 1.0,
+        state=None,
+        change_token: Optional[Callable[[], Awaitable[str]]] = None
+    ):
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.refresh_debounce = refresh_debounce
+        self.state = state
+        self.change_token = change_token
+        self._source_path: Optional[str] = None
+        self._ready = False
+        self._writes = 0            # request_refresh() chamados
+        self._snapshot_writes = 0   # ... já contidos no snapshot atual
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._session_factory = SessionLocal
+
+        primary_url = normalize_database_url(primary_url)
+
+        if replica_url:
+            self.mode = "replica"
+            self._session_factory = sessionmaker(
+                autocommit=False, autoflush=False, bind=create_db_engine(replica_url)
+            )
+            self._ready = True
+        elif primary_url.startswith("sqlite") and snapshot_interval > 0:
+            self.mode = "snapshot"
+            self._source_path = make_url(primary_url).database
+            # Somente leitura e sem pool: cada sessão abre o arquivo atual (trocado atomicamente)
+            engine = create_engine(
+                f"sqlite:///file:{os.path.abspath(snapshot_path)}?mode=ro&uri=true",
+                connect_args={"check_same_thread": False},
+                poolclass=NullPool
+            )
+            self._snapshot_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        else:
+            self.mode = "primary"
+            self._ready = True
+
+    def start(self):
+        if self.mode == "snapshot" and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+            print(f"[ANALYTICS] Snapshot de leitura a cada {self.snapshot_interval:.0f}s em {self.snapshot_path}")
+        elif self.mode == "replica":
+            print("[ANALYTICS] Leituras do admin na réplica configurada")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_db(self):
+        """Dependency FastAPI (mesmo formato de database.get_db)"""
+        fresh = self._ready and self._snapshot_writes == self._writes
+        factory = self._snapshot_factory if self.mode == "snapshot" and fresh else self._session_factory
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def request_refresh(self):
+        """Agenda um snapshot após uma escrita; não bloqueia a requisição"""
+        if self.mode != "snapshot":
+            return
+        self._writes += 1
+        self._wakeup.set()
+
+    async def refresh(self):
+        """Atualiza o snapshot agora (no-op fora do modo snapshot)"""
+        if self.mode != "snapshot":
+            return
+        async with self._lock:
+            writes = self._writes
+            token = await self.change_token() if self.change_token and self.state else None
+
+            # Snapshot no volume já contém estas versões (feito aqui ou por outro worker)
+            if token is None or not os.path.exists(self.snapshot_path) or \
+                    await self.state.get("analytics:snapshot_token") != token.encode():
+                await asyncio.to_thread(self._copy)
+                if token is not None:
+                    await self.state.set("analytics:snapshot_token", token.encode())
+                    await self.state.incr("analytics:generation")
+
+            self._snapshot_writes = writes
+            self._ready = True
+
+    async def generation(self) -> str:
+        """Geração compartilhada do snapshot ("" fora do modo snapshot)"""
+        if self.mode != "snapshot" or not self.state:
+            return ""
+        value = await self.state.get("analytics:generation")
+        return value.decode() if value else "0"
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[ANALYTICS] Erro ao atualizar snapshot: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.snapshot_interval)
+                # Uma cópia para a rajada inteira de escritas
+                await asyncio.sleep(self.refresh_debounce)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def _copy(self):
+        """Backup API: cópia consistente mesmo com escritas em andamento (WAL)"""
+        # Nome próprio por cópia: workers/réplicas no mesmo volume não escrevem no mesmo temp
+        temp_path = f"{self.snapshot_path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        source = sqlite3.connect(self._source_path)
+        target = sqlite3.connect(temp_path)
+        try:
+            source.backup(target)
+            # Snapshot é só leitura: journal em arquivo único, sem -wal/-shm
+            target.execute("PRAGMA journal_mode=DELETE")
+        except Exception:
+            target.close()
+            os.remove(temp_path)
+            raise
+        else:
+            target.close()
+        finally:
+            source.close()
+
+        # Leitores com o arquivo antigo aberto terminam nele; novas sessões abrem o novo
+        os.replace(temp_path, self.snapshot_path)
@@ -0,0 +1,130 @@
+"""
+ChatLove - Fast JSON Responses
+orjson serialization, negotiated gzip/brotli compression and ETags from
+per-collection version counters (conditional GET without touching the DB)
+"""
+
+from fastapi import Request
+from fastapi.responses import Response
+from typing import Optional
+import gzip
+import time
+import orjson
+
+from shared_state import SharedState
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele, apenas gzip
+    brotli = None
+
+
+# Abaixo disso a compressão custa mais do que economiza
+COMPRESS_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """Parse Accept-Encoding, ignoring codings with q=0"""
+    encodings = set()
+
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+
+        if q > 0:
+            encodings.add(coding)
+
+    return encodings
+
+
+def fast_json(request: Request, content, status_code: int = 200, etag: Optional[str] = None) -> Response:
+    """
+    Serialize content with orjson, bypassing jsonable_encoder, and compress
+    large payloads with the best encoding the client accepts (br > gzip)
+    """
+    body = orjson.dumps(content)
+    headers = etag_headers(etag) if etag else {}
+
+    if len(body) < COMPRESS_MIN_SIZE:
+        return Response(body, status_code=status_code, media_type="application/json", headers=headers)
+
+    encodings = accepted_encodings(request.headers.get("accept-encoding", ""))
+    headers["Vary"] = "Accept-Encoding"
+
+    if brotli is not None and "br" in encodings:
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+        headers["Content-Encoding"] = "br"
+    elif "gzip" in encodings:
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        headers["Content-Encoding"] = "gzip"
+
+    return Response(body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+
+# =============================================================================
+# ETAGS
+# =============================================================================
+
+def etag_headers(etag: str) -> dict:
+    # no-cache: o navegador guarda a resposta mas revalida sempre (If-None-Match)
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """304 se If-None-Match contém o ETag atual (comparação fraca)"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+
+    current = etag.removeprefix("W/")
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == current:
+            return Response(status_code=304, headers=etag_headers(etag))
+
+    return None
+
+
+class CollectionVersions:
+    """
+    Contador de versão por coleção (users, licenses, ...) no estado
+    compartilhado. Toda escrita numa coleção chama bump(); o ETag de uma
+    leitura é formado pelas versões das coleções que ela mostra.
+
+    A época distingue contadores reiniciados (restart com memory:// ou
+    Redis sem persistência) de versões já vistas pelos clientes.
+    """
+
+    def __init__(self, state: SharedState):
+        self.state = state
+
+    async def bump(self, *collections: str):
+        for collection in collections:
+            await self.state.incr(f"version:{collection}")
+
+    async def etag(self, *collections: str, extra: str = "") -> str:
+        keys = ["version:epoch"] + [f"version:{collection}" for collection in collections]
+        values = await self.state.get_many(keys)
+
+        if values[0] is None:
+            await self.state.set_if_absent("version:epoch", f"{time.time_ns():x}".encode())
+            values[0] = await self.state.get("version:epoch")
+
+        tag = ".".join(value.decode() if value else "0" for value in values)
+        if extra:
+            tag += f"-{extra}"
+        return f'W/"{tag}"'
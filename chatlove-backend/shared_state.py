@@ -0,0 +1,265 @@
+"""
+ChatLove - Shared State
+Estado compartilhado entre réplicas do backend (cache, idempotência,
+rate limit, sinais do scheduler hub) com invalidação via pub/sub
+
+Backends:
+    memory://            processo único (padrão, e stand-in para testes)
+    redis://host:6379/0  Redis ou compatível (KeyDB, Dragonfly, fakeredis)
+"""
+
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import time
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis é opcional: sem ele, apenas memory://
+    aioredis = None
+
+
+Handler = Callable[[str], Awaitable[None]]
+
+DELETE_IF_EQUALS_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class SharedState(ABC):
+    """
+    Interface comum dos backends de estado compartilhado
+
+    Backend sem algum método abstrato falha ao ser instanciado (TypeError),
+    não no meio de uma requisição
+    """
+
+    prefix = "chatlove:"
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = {}
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        """MGET: valores na mesma ordem das chaves"""
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    async def set_if_absent(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """SET NX: True se a chave foi criada por esta chamada"""
+        ...
+
+    @abstractmethod
+    async def delete(self, *keys: str):
+        ...
+
+    @abstractmethod
+    async def delete_if_equals(self, key: str, value: bytes) -> bool:
+        """Apaga a chave só se ela ainda guarda value (libera lock sem tirar o de outra réplica)"""
+        ...
+
+    @abstractmethod
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Incrementa contador; ttl é aplicado quando o contador nasce"""
+        ...
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str):
+        ...
+
+    def subscribe(self, channel: str, handler: Handler):
+        """Registra handler chamado para cada mensagem do canal (em todas as réplicas)"""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def _dispatch(self, channel: str, message: str):
+        for handler in self._handlers.get(channel, []):
+            try:
+                await handler(message)
+            except Exception as e:
+                print(f"[SHARED STATE] Erro no handler de '{channel}': {e}")
+
+
+class MemoryState(SharedState):
+    """Backend em memória: semântica igual ao Redis, escopo de um processo"""
+
+    def __init__(self):
+        super().__init__()
+        self._data: Dict[str, tuple] = {}
+
+    def _alive(self, key: str) -> Optional[tuple]:
+        entry = self._data.get(key)
+        if entry and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    @staticmethod
+    def _expiry(ttl: Optional[float]) -> Optional[float]:
+        return time.monotonic() + ttl if ttl else None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._alive(key)
+        return entry[0] if entry else None
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        self._data[key] = (value, self._expiry(ttl))
+
+    async def set_if_absent(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        if self._alive(key):
+            return False
+        self._data[key] = (value, self._expiry(ttl))
+        return True
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def delete_if_equals(self, key: str, value: bytes) -> bool:
+        entry = self._alive(key)
+        if entry and entry[0] == value:
+            del self._data[key]
+            return True
+        return False
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        entry = self._alive(key)
+        if entry:
+            value = int(entry[0]) + amount
+            self._data[key] = (str(value).encode(), entry[1])
+        else:
+            value = amount
+            self._data[key] = (str(value).encode(), self._expiry(ttl))
+        return value
+
+    async def publish(self, channel: str, message: str):
+        await self._dispatch(channel, message)
+
+
+class RedisState(SharedState):
+    """Backend Redis; aceita qualquer cliente redis.asyncio (inclusive fakeredis)"""
+
+    def __init__(self, client):
+        super().__init__()
+        self.client = client
+        self._listener: Optional[asyncio.Task] = None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
+        return await self.client.mget([self.prefix + key for key in keys])
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        await self.client.set(self.prefix + key, value, px=int(ttl * 1000) if ttl else None)
+
+    async def set_if_absent(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        return bool(await self.client.set(self.prefix + key, value, px=int(ttl * 1000) if ttl else None, nx=True))
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self.client.delete(*[self.prefix + key for key in keys])
+
+    async def delete_if_equals(self, key: str, value: bytes) -> bool:
+        # GET + DEL atômicos no servidor
+        deleted = await self.client.eval(DELETE_IF_EQUALS_SCRIPT, 1, self.prefix + key, value)
+        return bool(deleted)
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.incrby(self.prefix + key, amount)
+            if ttl:
+                pipe.pexpire(self.prefix + key, int(ttl * 1000), nx=True)
+            results = await pipe.execute()
+        return int(results[0])
+
+    async def publish(self, channel: str, message: str):
+        await self.client.publish(self.prefix + channel, message)
+
+    async def start(self):
+        if self._handlers and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def close(self):
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        await self.client.aclose()
+
+    async def _listen(self):
+        """Recebe mensagens pub/sub e despacha; reconecta em caso de falha"""
+        channels = [self.prefix + channel for channel in self._handlers]
+
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.subscribe(*channels)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    channel = message["channel"]
+                    data = message["data"]
+                    if isinstance(channel, bytes):
+                        channel = channel.decode()
+                    if isinstance(data, bytes):
+                        data = data.decode()
+                    await self._dispatch(channel[len(self.prefix):], data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[SHARED STATE] Pub/sub desconectado: {e}; reconectando...")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+
+def create_shared_state(url: str) -> SharedState:
+    """Cria o backend a partir de SHARED_STATE_URL"""
+    if not url or url.startswith("memory://"):
+        return MemoryState()
+
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        if aioredis is None:
+            raise RuntimeError("SHARED_STATE_URL requer o pacote 'redis' (pip install redis)")
+        return RedisState(aioredis.from_url(url))
+
+    raise ValueError(f"SHARED_STATE_URL não suportada: {url}")
+
+
+class RateLimiter:
+    """Janela fixa por chave, contada no estado compartilhado"""
+
+    def __init__(self, state: SharedState, limit: int, window: float = 60.0):
+        self.state = state
+        self.limit = limit
+        self.window = window
+
+    async def hit(self, key: str) -> bool:
+        """Registra uma requisição; False se o limite da janela foi excedido"""
+        if self.limit <= 0:
+            return True
+        bucket = int(time.time() // self.window)
+        count = await self.state.incr(f"ratelimit:{key}:{bucket}", ttl=self.window)
+        return count <= self.limit
@@ -0,0 +1,81 @@
+"""
+Outbox do UsageAccountant: segmentos limitados sob tráfego contínuo e replay após restart
+"""
+
+import asyncio
+import glob
+import os
+import time
+
+import pytest
+
+from accounting import UsageAccountant
+
+
+class MemoryAccountant(UsageAccountant):
+    """Aplica em memória no lugar do banco"""
+
+    def __init__(self, *args, apply_delay: float = 0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.apply_delay = apply_delay
+        self.applied = []
+        self._seen = set()
+
+    def _apply(self, batch):
+        time.sleep(self.apply_delay)
+        new_entries = [entry for entry in batch if entry["client_record_id"] not in self._seen]
+        self._seen.update(entry["client_record_id"] for entry in new_entries)
+        self.applied.extend(new_entries)
+        return new_entries
+
+
+def record(accountant, index):
+    accountant.record(license_key=f"key-{index % 3}", license_id=1, tokens_saved=1.0, message_length=10)
+
+
+def outbox_bytes(outbox):
+    return sum(os.path.getsize(path) for path in glob.glob(f"{outbox}*.seg"))
+
+
+@pytest.mark.asyncio
+async def test_outbox_stays_bounded_under_steady_traffic(tmp_path):
+    outbox = str(tmp_path / "outbox.jsonl")
+    accountant = MemoryAccountant(outbox, batch_size=20, segment_bytes=4096, apply_delay=0.002)
+    accountant.start()
+
+    largest = 0
+    for index in range(2000):
+        record(accountant, index)
+        if index % 10 == 0:
+            await asyncio.sleep(0.001)
+            largest = max(largest, outbox_bytes(outbox))
+
+    assert accountant.pending > 0 or largest > 0
+    while accountant.pending:
+        await asyncio.sleep(0.01)
+    await accountant.stop()
+
+    assert len(accountant.applied) == 2000
+    # Bem abaixo dos ~400 KB que o journal teria sem rotação
+    assert largest < 80 * 1024
+    assert len(glob.glob(f"{outbox}*.seg")) == 1
+
+
+@pytest.mark.asyncio
+async def test_unapplied_records_are_replayed_after_restart(tmp_path):
+    outbox = str(tmp_path / "outbox.jsonl")
+    first = MemoryAccountant(outbox, apply_delay=1)
+    first.start()
+    for index in range(5):
+        record(first, index)
+    await asyncio.sleep(0.05)
+    await first.stop()
+
+    second = MemoryAccountant(outbox)
+    second.start()
+    while second.pending:
+        await asyncio.sleep(0.01)
+    await second.stop()
+
+    assert len(second.applied) == 5
+    assert not [path for path in glob.glob(f"{outbox}*.seg") if os.path.getsize(path)]
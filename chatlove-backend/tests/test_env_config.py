@@ -0,0 +1,42 @@
+"""
+Configuração lida do .env: vale mesmo para valores lidos na importação
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_in_copy(tmp_path, env_file: str, code: str) -> str:
+    """Roda code numa cópia do backend com o .env dado (e sem as variáveis do teste no ambiente)"""
+    for name in os.listdir(BACKEND_DIR):
+        if name.endswith(".py"):
+            shutil.copy(os.path.join(BACKEND_DIR, name), tmp_path / name)
+    (tmp_path / ".env").write_text(env_file)
+
+    env = {key: value for key, value in os.environ.items() if key not in ("DATABASE_URL", "SECRET_KEY")}
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip().splitlines()[-1]
+
+
+def test_database_url_from_env_file_when_importing_main(tmp_path):
+    url = f"sqlite:///{tmp_path}/from_env_file.db"
+    output = run_in_copy(
+        tmp_path,
+        f"DATABASE_URL={url}\nSECRET_KEY=test-secret\n",
+        "import main, database, auth; print(database.DATABASE_URL, str(database.engine.url), auth.SECRET_KEY)"
+    )
+    assert output == f"{url} {url} test-secret"
+
+
+def test_database_url_from_env_file_when_importing_database(tmp_path):
+    url = f"sqlite:///{tmp_path}/migrations.db"
+    output = run_in_copy(tmp_path, f"DATABASE_URL={url}\n", "import database; print(database.DATABASE_URL)")
+    assert output == url
@@ -0,0 +1,37 @@
+"""
+Bulkheads por conta hub: aviso de 429 entre réplicas via pub/sub
+"""
+
+import pytest
+
+from hub_bulkhead import HubBulkheads
+from shared_state import MemoryState
+
+
+@pytest.mark.asyncio
+async def test_throttle_event_keeps_account_limit():
+    state = MemoryState()
+    bulkheads = HubBulkheads(default_max_in_flight=4)
+    state.subscribe("hub-throttled", lambda account_id: _throttle(bulkheads, account_id))
+
+    bulkheads.get(7, max_in_flight=10)
+    await state.publish("hub-throttled", "7")
+
+    bulkhead = bulkheads.find(7)
+    assert bulkhead.max_limit == 10
+    assert bulkhead.capacity == 5
+
+
+@pytest.mark.asyncio
+async def test_throttle_event_for_unknown_account_is_ignored():
+    state = MemoryState()
+    bulkheads = HubBulkheads(default_max_in_flight=4)
+    state.subscribe("hub-throttled", lambda account_id: _throttle(bulkheads, account_id))
+
+    await state.publish("hub-throttled", "7")
+
+    assert bulkheads.find(7) is None
+
+
+async def _throttle(bulkheads, account_id):
+    bulkheads.throttle(int(account_id))
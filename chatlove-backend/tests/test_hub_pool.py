@@ -0,0 +1,55 @@
+"""
+Reposição do pool de projetos hub: claims durante a reposição e réplicas
+"""
+
+import asyncio
+
+import pytest
+
+from hub_pool import HubProjectPool, REFILL_LOCK_KEY
+from shared_state import MemoryState
+
+
+@pytest.mark.asyncio
+async def test_only_one_replica_refills_at_a_time():
+    state = MemoryState()
+    replicas = [HubProjectPool("http://lovable.test", shared=state) for _ in range(3)]
+    fills = []
+
+    async def fill():
+        fills.append(1)
+        await asyncio.sleep(0.1)
+
+    for pool in replicas:
+        pool._fill = fill
+
+    await asyncio.gather(*(pool.refill() for pool in replicas))
+
+    assert len(fills) == 1
+    assert await state.get(REFILL_LOCK_KEY) is None
+
+    # Lock liberado: a próxima rodada volta a repor
+    await replicas[1].refill()
+    assert len(fills) == 2
+
+
+@pytest.mark.asyncio
+async def test_claim_during_refill_triggers_another_round():
+    pool = HubProjectPool("http://lovable.test", refill_interval=60)
+    rounds = []
+
+    async def fill():
+        rounds.append(1)
+        if len(rounds) == 1:
+            pool._wakeup.set()  # claim() esvaziou o pool no meio da reposição
+
+    pool._fill = fill
+    pool.start()
+    try:
+        for _ in range(50):
+            if len(rounds) >= 2:
+                break
+            await asyncio.sleep(0.01)
+        assert len(rounds) == 2
+    finally:
+        await pool.stop()
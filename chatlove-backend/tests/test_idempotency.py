@@ -0,0 +1,88 @@
+"""
+Idempotency-Key entre réplicas: duas IdempotencyStore no mesmo MemoryState
+"""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from idempotency import IdempotencyStore, scoped_idempotency_key
+from shared_state import MemoryState
+
+
+@pytest.mark.asyncio
+async def test_duplicate_on_other_replica_waits_for_result():
+    state = MemoryState()
+    replica_a = IdempotencyStore(shared=state, lock_ttl=5)
+    replica_b = IdempotencyStore(shared=state, lock_ttl=5)
+    calls = []
+
+    async def send():
+        calls.append(1)
+        await asyncio.sleep(0.3)
+        return {"ok": True}
+
+    first = asyncio.create_task(replica_a.run("key-1", send))
+    await asyncio.sleep(0.05)
+    second = await replica_b.run("key-1", send)
+
+    assert (await first) == {"ok": True}
+    assert second.status_code == 200
+    assert second.body == b'{"ok":true}'
+    assert len(calls) == 1
+    assert await state.get("idem:lock:key-1") is None
+
+
+@pytest.mark.asyncio
+async def test_lock_timeout_does_not_resend_or_release_foreign_lock():
+    state = MemoryState()
+    replica_a = IdempotencyStore(shared=state, lock_ttl=5)
+    replica_b = IdempotencyStore(shared=state, lock_ttl=0.3)
+    calls = []
+    release = asyncio.Event()
+
+    async def slow_send():
+        calls.append("a")
+        await release.wait()
+        return {"ok": True}
+
+    async def duplicate_send():
+        calls.append("b")
+        return {"ok": True}
+
+    first = asyncio.create_task(replica_a.run("key-2", slow_send))
+    await asyncio.sleep(0.05)
+    lock = await state.get("idem:lock:key-2")
+
+    with pytest.raises(HTTPException) as error:
+        await replica_b.run("key-2", duplicate_send)
+
+    assert error.value.status_code == 409
+    assert calls == ["a"]
+    assert await state.get("idem:lock:key-2") == lock
+
+    release.set()
+    await first
+    assert await state.get("idem:lock:key-2") is None
+
+
+@pytest.mark.asyncio
+async def test_shared_keys_hide_credentials_and_separate_routes():
+    state = MemoryState()
+    store = IdempotencyStore(shared=state)
+    token = "lovable-session-secret"
+
+    send_key = scoped_idempotency_key("proxy", token, "retry-1")
+    upload_key = scoped_idempotency_key("proxy-upload", token, "retry-1")
+    await store.run(send_key, lambda: _result("send"))
+    upload = await store.run(upload_key, lambda: _result("upload"))
+
+    assert upload == {"route": "upload"}
+    assert send_key != upload_key
+    assert scoped_idempotency_key("proxy", token, "retry-1") == send_key
+    assert all(token not in key for key in state._data)
+
+
+async def _result(route):
+    return {"route": route}
@@ -0,0 +1,106 @@
+"""
+Snapshot de leitura do admin: escritas agendam a cópia em vez de esperar por ela
+"""
+
+import asyncio
+import glob
+import os
+import sqlite3
+
+import pytest
+
+from read_replica import AnalyticsReplica
+
+
+def make_primary(path):
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+    connection.commit()
+    return connection
+
+
+def count_items(path):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+    finally:
+        connection.close()
+
+
+@pytest.mark.asyncio
+async def test_writes_are_debounced_into_one_background_copy(tmp_path):
+    primary = make_primary(tmp_path / "primary.db")
+    snapshot = str(tmp_path / "analytics.db")
+    replica = AnalyticsReplica(
+        f"sqlite:///{tmp_path}/primary.db", snapshot_path=snapshot,
+        snapshot_interval=60, refresh_debounce=0.2
+    )
+    copies = []
+    copy = replica._copy
+    replica._copy = lambda: (copies.append(1), copy())
+    replica.start()
+    await asyncio.sleep(0.1)
+    assert len(copies) == 1
+
+    for index in range(20):
+        primary.execute("INSERT INTO items (id) VALUES (?)", (index,))
+        primary.commit()
+        replica.request_refresh()  # Síncrono: nenhuma cópia no caminho da escrita
+    assert len(copies) == 1
+
+    await asyncio.sleep(0.5)
+    await replica.stop()
+
+    assert len(copies) == 2
+    assert count_items(snapshot) == 20
+    assert glob.glob(f"{snapshot}*.tmp") == []
+
+
+@pytest.mark.asyncio
+async def test_concurrent_copies_use_separate_temp_files(tmp_path):
+    primary = make_primary(tmp_path / "primary.db")
+    primary.executemany("INSERT INTO items (id) VALUES (?)", [(index,) for index in range(5000)])
+    primary.commit()
+    snapshot = str(tmp_path / "analytics.db")
+    workers = [
+        AnalyticsReplica(f"sqlite:///{tmp_path}/primary.db", snapshot_path=snapshot)
+        for _ in range(4)
+    ]
+
+    await asyncio.gather(*[asyncio.to_thread(worker._copy) for worker in workers for _ in range(3)])
+
+    assert count_items(snapshot) == 5000
+    assert glob.glob(f"{snapshot}*.tmp") == []
+
+
+@pytest.mark.asyncio
+async def test_snapshot_generation_is_shared_and_stable(tmp_path):
+    from responses import CollectionVersions
+    from shared_state import MemoryState
+
+    primary = make_primary(tmp_path / "primary.db")
+    state = MemoryState()
+    versions = CollectionVersions(state)
+    workers = [
+        AnalyticsReplica(
+            f"sqlite:///{tmp_path}/primary.db", snapshot_path=str(tmp_path / "analytics.db"),
+            state=state, change_token=lambda: versions.etag("items")
+        )
+        for _ in range(2)
+    ]
+
+    await workers[0].refresh()
+    await workers[1].refresh()  # Nada mudou: usa o snapshot do outro worker
+    generation = await workers[0].generation()
+    assert generation == await workers[1].generation() == "1"
+
+    await workers[0].refresh()
+    assert await workers[1].generation() == generation
+
+    primary.execute("INSERT INTO items (id) VALUES (1)")
+    primary.commit()
+    await versions.bump("items")
+    await workers[1].refresh()
+
+    assert await workers[0].generation() == await workers[1].generation() == "2"
+    assert count_items(str(tmp_path / "analytics.db")) == 1
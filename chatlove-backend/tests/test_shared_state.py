@@ -0,0 +1,40 @@
+"""
+Backends de estado compartilhado: interface completa e lock com dono
+"""
+
+import pytest
+
+from shared_state import MemoryState, RedisState, SharedState
+
+
+def test_incomplete_backend_fails_at_construction():
+    class PartialState(SharedState):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        PartialState()
+
+
+@pytest.mark.asyncio
+async def test_delete_if_equals_keeps_another_owners_lock():
+    state = MemoryState()
+    await state.set_if_absent("lock", b"replica-a", ttl=5)
+
+    assert not await state.delete_if_equals("lock", b"replica-b")
+    assert await state.get("lock") == b"replica-a"
+    assert await state.delete_if_equals("lock", b"replica-a")
+    assert await state.get("lock") is None
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_implements_the_interface():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # delete_if_equals é um script Lua
+    state = RedisState(fakeredis.aioredis.FakeRedis())
+
+    await state.set_if_absent("lock", b"replica-a", ttl=5)
+    assert not await state.delete_if_equals("lock", b"replica-b")
+    assert await state.delete_if_equals("lock", b"replica-a")
+    assert await state.get_many(["lock"]) == [None]
+    await state.close()
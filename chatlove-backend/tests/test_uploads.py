@@ -0,0 +1,40 @@
+"""
+Limite de corpo das rotas de upload (antes do parsing multipart)
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from uploads import UploadLimitMiddleware
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(UploadLimitMiddleware, paths={"/upload"}, max_body=1024)
+
+    @app.post("/upload")
+    async def upload():
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("length", ["abc", "-1", "1e3", ""])
+def test_malformed_content_length_is_a_bad_request(client, length):
+    response = client.post("/upload", content=b"x", headers={"Content-Length": length})
+
+    assert response.status_code == 400
+
+
+def test_content_length_over_the_limit_is_rejected(client):
+    response = client.post("/upload", content=b"x" * 2048)
+
+    assert response.status_code == 413
+
+
+def test_body_within_the_limit_passes(client):
+    response = client.post("/upload", content=b"x" * 10)
+
+    assert response.status_code == 200
@@ -0,0 +1,133 @@
+"""
+ChatLove - Uploads
+Anexos multipart para o proxy: limite de tamanho aplicado antes de ler o
+corpo, arquivos em disco (SpooledTemporaryFile do Starlette) e corpo JSON
+do Lovable gerado em blocos, sem carregar os arquivos inteiros na memória
+"""
+
+from typing import AsyncIterator, List, Tuple, Union
+import base64
+import orjson
+
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import UploadFile  # Classe instanciada pelo parser multipart
+
+
+# Múltiplo de 3: cada bloco vira base64 completo (sem padding no meio)
+CHUNK_SIZE = 3 * 16 * 1024
+
+
+def too_large(limit: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Anexos excedem o limite de {limit // (1024 * 1024)} MB"
+    )
+
+
+class UploadLimitMiddleware:
+    """
+    Limita o corpo das rotas de upload antes do parsing multipart
+
+    Content-Length acima do limite é recusado sem ler o corpo; sem
+    Content-Length (chunked), os bytes são contados à medida que chegam
+    e a leitura é interrompida com 413 ao passar do limite.
+    """
+
+    def __init__(self, app, paths: set, max_body: int):
+        self.app = app
+        self.paths = paths
+        self.max_body = max_body
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name != b"content-length":
+                continue
+
+            try:
+                length = int(value)
+            except ValueError:
+                length = -1
+
+            if length < 0:
+                error = HTTPException(status_code=400, detail="Content-Length inválido")
+            elif length > self.max_body:
+                error = too_large(self.max_body)
+            else:
+                continue
+
+            response = ORJSONResponse({"detail": error.detail}, status_code=error.status_code)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body:
+                    raise too_large(self.max_body)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def check_uploads(uploads: List[UploadFile], max_files: int, max_file_size: int):
+    """Valida quantidade e tamanho dos anexos já recebidos"""
+    if len(uploads) > max_files:
+        raise HTTPException(status_code=413, detail=f"Máximo de {max_files} anexos por mensagem")
+
+    for upload in uploads:
+        if upload.size is not None and upload.size > max_file_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Anexo '{upload.filename}' excede {max_file_size // (1024 * 1024)} MB"
+            )
+
+
+def stream_files_json(payload: dict, uploads: List[UploadFile]) -> Tuple[int, AsyncIterator[bytes]]:
+    """
+    Corpo JSON = payload + "files": [{name, type, size, data (base64)}]
+
+    Retorna (Content-Length, iterador de blocos). O tamanho é exato, então o
+    upstream recebe um corpo normal (sem chunked) lido aos poucos do disco.
+    """
+    parts: List[Union[bytes, UploadFile]] = [orjson.dumps(payload)[:-1] + b',"files":[']
+
+    for index, upload in enumerate(uploads):
+        meta = orjson.dumps({
+            "name": upload.filename,
+            "type": upload.content_type or "application/octet-stream",
+            "size": upload.size
+        })
+        parts.append((b"," if index else b"") + meta[:-1] + b',"data":"')
+        parts.append(upload)
+        parts.append(b'"}')
+
+    parts.append(b"]}")
+
+    length = sum(
+        4 * ((part.size + 2) // 3) if isinstance(part, UploadFile) else len(part)
+        for part in parts
+    )
+
+    async def body() -> AsyncIterator[bytes]:
+        for part in parts:
+            if not isinstance(part, UploadFile):
+                yield part
+                continue
+
+            await part.seek(0)
+            while True:
+                chunk = await part.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield base64.b64encode(chunk)
+
+    return length, body()
@@ -580,8 +580,13 @@ function initializeSidebar() {
   loadStats();
   checkLicenseStatus();
   
-  // Check license status every 10 seconds
-  setInterval(checkLicenseStatus, 10000);
+  // Receber status da licença por push (SSE); polling só se o stream cair
+  subscribeLicenseEvents();
+  
+  // Atualizar contador do trial localmente, sem chamar o backend
+  setInterval(() => {
+    if (lastLicenseStatus) renderLicenseStatus(lastLicenseStatus);
+  }, 10000);
 
   // Toggle button
   const toggleBtn = document.getElementById('cl-toggle-btn');
@@ -738,6 +743,48 @@ function initializeSidebar() {
     }
   }
 
+  let lastLicenseStatus = null;
+  let licensePollTimer = null;
+  let licenseEvents = null;
+
+  function subscribeLicenseEvents() {
+    chrome.storage.local.get(['licenseKey']).then(({ licenseKey }) => {
+      if (!licenseKey) return;
+      
+      const events = new EventSource(
+        `https://chat.trafficai.cloud/api/license/events?license_key=${encodeURIComponent(licenseKey)}`
+      );
+      licenseEvents = events;
+      
+      events.addEventListener('open', () => {
+        clearInterval(licensePollTimer);
+        licensePollTimer = null;
+      });
+      
+      events.addEventListener('license', (event) => {
+        const data = JSON.parse(event.data);
+        renderLicenseStatus(data);
+        
+        // Licença bloqueada: fecha o stream e volta ao polling para detectar reativação
+        if (!data.valid) {
+          events.close();
+          if (!licensePollTimer) {
+            licensePollTimer = setInterval(checkLicenseStatus, 10000);
+          }
+        }
+      });
+      
+      events.addEventListener('credits', () => loadStats());
+      
+      events.addEventListener('error', () => {
+        // EventSource reconecta sozinho; enquanto isso, volta ao polling
+        if (!licensePollTimer) {
+          licensePollTimer = setInterval(checkLicenseStatus, 10000);
+        }
+      });
+    });
+  }
+
   async function checkLicenseStatus() {
     const { licenseKey } = await chrome.storage.local.get(['licenseKey']);
     
@@ -751,51 +798,61 @@ function initializeSidebar() {
       });
       
       const data = await response.json();
+      renderLicenseStatus(data);
       
-      const trialWarning = document.getElementById('cl-trial-warning');
-      const trialTime = document.getElementById('cl-trial-time');
-      const sendBtn = document.getElementById('cl-send-btn');
-      
-      if (!data.success || !data.valid) {
-        // Licença inválida/desativada/expirada
-        trialWarning.style.display = 'flex';
-        trialTime.textContent = data.message || 'Licença bloqueada';
-        sendBtn.disabled = true;
-        sendBtn.textContent = 'Bloqueado';
-        return;
+      // Licença reativada: volta a receber por push
+      if (data.valid && licenseEvents && licenseEvents.readyState === EventSource.CLOSED) {
+        subscribeLicenseEvents();
       }
+    } catch (error) {
+      console.error('[ChatLove] Erro ao verificar licença:', error);
+    }
+  }
+
+  function renderLicenseStatus(data) {
+    lastLicenseStatus = data;
+    
+    const trialWarning = document.getElementById('cl-trial-warning');
+    const trialTime = document.getElementById('cl-trial-time');
+    const sendBtn = document.getElementById('cl-send-btn');
+    
+    if (!data.success || !data.valid) {
+      // Licença inválida/desativada/expirada
+      trialWarning.style.display = 'flex';
+      trialTime.textContent = data.message || 'Licença bloqueada';
+      sendBtn.disabled = true;
+      sendBtn.textContent = 'Bloqueado';
+      return;
+    }
+    
+    // Licença válida - verificar se é trial
+    if (data.license_type === 'trial' && data.expires_at) {
+      // Backend retorna em UTC, precisamos converter corretamente
+      const now = new Date();
+      const expires = new Date(data.expires_at + 'Z'); // Força interpretação como UTC
+      const diff = expires - now;
       
-      // Licença válida - verificar se é trial
-      if (data.license_type === 'trial' && data.expires_at) {
-        // Backend retorna em UTC, precisamos converter corretamente
-        const now = new Date();
-        const expires = new Date(data.expires_at + 'Z'); // Força interpretação como UTC
-        const diff = expires - now;
+      if (diff > 0) {
+        // Trial ativa - mostrar contador
+        const minutes = Math.floor(diff / 60000);
+        const seconds = Math.floor((diff % 60000) / 1000);
         
-        if (diff > 0) {
-          // Trial ativa - mostrar contador
-          const minutes = Math.floor(diff / 60000);
-          const seconds = Math.floor((diff % 60000) / 1000);
-          
-          trialWarning.style.display = 'flex';
-          trialTime.textContent = `${minutes}m ${seconds}s restantes`;
-          sendBtn.disabled = false;
-          sendBtn.textContent = 'Enviar';
-        } else {
-          // Trial expirada
-          trialWarning.style.display = 'flex';
-          trialTime.textContent = 'Licença expirada';
-          sendBtn.disabled = true;
-          sendBtn.textContent = 'Bloqueado';
-        }
-      } else {
-        // Licença full - esconder aviso
-        trialWarning.style.display = 'none';
+        trialWarning.style.display = 'flex';
+        trialTime.textContent = `${minutes}m ${seconds}s restantes`;
         sendBtn.disabled = false;
         sendBtn.textContent = 'Enviar';
+      } else {
+        // Trial expirada
+        trialWarning.style.display = 'flex';
+        trialTime.textContent = 'Licença expirada';
+        sendBtn.disabled = true;
+        sendBtn.textContent = 'Bloqueado';
       }
-    } catch (error) {
-      console.error('[ChatLove] Erro ao verificar licença:', error);
+    } else {
+      // Licença full - esconder aviso
+      trialWarning.style.display = 'none';
+      sendBtn.disabled = false;
+      sendBtn.textContent = 'Enviar';
     }
   }
 
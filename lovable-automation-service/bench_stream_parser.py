@@ -0,0 +1,109 @@
+"""
+Benchmark of the streaming response parser on code-generation sized streams
+
+Compares the incremental StreamParser against the previous regex-over-buffer
+extraction, feeding the stream in network-sized fragments:
+
+    python bench_stream_parser.py                 # 1, 4 and 16 MB streams
+    python bench_stream_parser.py 8 32            # custom sizes (MB)
+
+The legacy extraction rescans the whole buffer per fragment, so it only runs
+up to LEGACY_MAX_MB.
+"""
+
+import json
+import re
+import sys
+import time
+
+from src.browser.stream_parser import StreamParser
+
+
+FRAGMENT_SIZE = 16 * 1024
+LEGACY_MAX_MB = 16
+
+
+def build_stream(size_mb: float) -> bytes:
+    """SSE stream of text and file chunks, like a large code generation"""
+    code_line = "export const Component = () => <div className=\"p-4\">{items.map(i => <Row key={i.id} {...i} />)}</div>;\n"
+    events = []
+    total = 0
+    index = 0
+
+    while total < size_mb * 1024 * 1024:
+        if index % 5 == 0:
+            payload = {"type": "text", "content": f"Updating component {index}... "}
+        else:
+            payload = {"type": "code", "file": f"src/components/C{index}.tsx", "code": code_line * 20}
+        event = f"data: {json.dumps(payload)}\n\n".encode()
+        events.append(event)
+        total += len(event)
+        index += 1
+
+    events.append(b"data: [DONE]\n\n")
+    return b"".join(events)
+
+
+def fragments(stream: bytes, size: int = FRAGMENT_SIZE):
+    for start in range(0, len(stream), size):
+        yield stream[start:start + size]
+
+
+def legacy(stream: bytes, fragment_size: int = FRAGMENT_SIZE) -> int:
+    """Previous NetworkInterceptor._extract_streaming_chunks behaviour"""
+    patterns = [r"data: ({.*?})\n\n", r"({.*?})\n", r"chunk: (.*?)\n"]
+    buffer = ""
+    count = 0
+
+    for fragment in fragments(stream, fragment_size):
+        buffer += fragment.decode("utf-8", errors="replace")
+        for pattern in patterns:
+            matches = re.findall(pattern, buffer, re.DOTALL)
+            count += len(matches)
+            for match in matches:
+                buffer = buffer.replace(match, "", 1)
+
+    return count
+
+
+def legacy_body(stream: bytes) -> int:
+    """Legacy extraction on the whole body at once (how the interceptor called it)"""
+    return legacy(stream, len(stream))
+
+
+def incremental(stream: bytes) -> int:
+    parser = StreamParser()
+    count = 0
+
+    for fragment in fragments(stream):
+        count += len(parser.feed(fragment))
+    count += len(parser.close())
+
+    return count
+
+
+def run(name: str, function, stream: bytes):
+    start = time.perf_counter()
+    chunks = function(stream)
+    elapsed = time.perf_counter() - start
+    mb = len(stream) / (1024 * 1024)
+    print(f"{name:<12} {mb:>6.1f} MB   {elapsed * 1000:>10.1f} ms   {mb / elapsed:>8.1f} MB/s   {chunks} chunks")
+
+
+def main():
+    sizes = [float(arg) for arg in sys.argv[1:]] or [1, 4, 16]
+
+    print("=" * 70)
+    print(f"STREAM PARSER (fragments of {FRAGMENT_SIZE // 1024} KB)")
+    print("=" * 70)
+
+    for size in sizes:
+        stream = build_stream(size)
+        run("incremental", incremental, stream)
+        if size <= LEGACY_MAX_MB:
+            run("legacy", legacy, stream)
+            run("legacy-body", legacy_body, stream)
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,7 @@ from src.core.config import settings
 from src.core.logging import setup_logging, get_logger
 from src.core.exceptions import LovableAutomationError
 from src.session.manager import LovableSessionManager
+from src.queue import LovableQueueManager, create_message_processor
 from src.models.message import ChatMessage
 from src.models.response import ChatLoveResponse
 from src.web.dashboard import create_dashboard_app
@@ -31,11 +32,15 @@ logger = get_logger("main")
 # Global session manager
 session_manager: LovableSessionManager = None
 
+# Global queue manager (its workers run messages through the browser automation)
+queue_manager: LovableQueueManager = None
+browser_automation = None
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
-    global session_manager
+    global session_manager, queue_manager, browser_automation
     
     logger.info("Starting Lovable Automation Service")
     
@@ -44,6 +49,15 @@ async def lifespan(app: FastAPI):
         session_manager = LovableSessionManager()
         await session_manager.start()
         
+        # Browser automation (sharded when BROWSER_SHARDS > 1) behind the message processor
+        message_processor = create_message_processor(session_manager)
+        browser_automation = message_processor.browser_automation
+        await browser_automation.start()
+        
+        # Queue workers drain the queue through the processor
+        queue_manager = LovableQueueManager(processor=message_processor)
+        await queue_manager.start()
+        
         logger.info("Service started successfully")
         yield
         
@@ -55,6 +69,13 @@ async def lifespan(app: FastAPI):
         # Cleanup
         logger.info("Shutting down Lovable Automation Service")
         
+        # Workers first: in-flight messages go back to the queue before the browsers close
+        if queue_manager:
+            await queue_manager.stop()
+        
+        if browser_automation:
+            await browser_automation.stop()
+        
         if session_manager:
             await session_manager.stop()
         
@@ -132,6 +153,9 @@ async def get_status():
     
     stats = session_manager.get_stats()
     
+    if queue_manager:
+        stats["queue"] = await queue_manager.get_queue_stats()
+    
     return {
         "service": "lovable-automation-service",
         "status": "running" if stats["is_running"] else "stopped",
@@ -3,11 +3,14 @@ Browser automation module for Lovable Automation Service
 """
 
 from .automation import LovableBrowserAutomation
+from .sharding import ShardedBrowserAutomation, create_browser_automation
 from .interceptor import NetworkInterceptor
 from .selectors import LovableSelectors
 
 __all__ = [
     "LovableBrowserAutomation",
+    "ShardedBrowserAutomation",
+    "create_browser_automation",
     "NetworkInterceptor",
     "LovableSelectors"
 ]
@@ -4,14 +4,15 @@ Browser automation for Lovable.dev using Playwright
 
 import asyncio
 import uuid
-from typing import Optional, Dict, Any, List
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List, AsyncIterator, Awaitable, Callable
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Response
 from datetime import datetime
 
 from ..core.config import settings, get_browser_config
 from ..core.exceptions import (
     BrowserError, BrowserLaunchError, NavigationError, 
-    ElementNotFoundError, InterceptionError
+    ElementNotFoundError, InterceptionError, MessageProcessingError
 )
 from ..core.logging import LoggerMixin, log_browser_event
 from ..models.session import Session
@@ -19,6 +20,9 @@ from ..models.message import ChatMessage
 from ..models.response import LovableResponse, StreamingChunk, StreamingChunkType
 from .selectors import LovableSelectors, LovableXPathSelectors, SelectorValidator
 from .interceptor import NetworkInterceptor
+from .page_manager import PageManager
+from .resolver import SelectorResolver
+from .completion import count_elements, wait_for_dom_settled, wait_for_first
 
 
 class LovableBrowserAutomation(LoggerMixin):
@@ -30,10 +34,18 @@ class LovableBrowserAutomation(LoggerMixin):
         self.playwright = None
         self.browser: Optional[Browser] = None
         self.contexts: Dict[str, BrowserContext] = {}
-        self.pages: Dict[str, Page] = {}
-        self.interceptors: Dict[str, NetworkInterceptor] = {}
+        
+        browser_config = get_browser_config()
+        self.page_manager = PageManager(
+            max_pages_per_context=browser_config["max_pages_per_context"],
+            memory_budget_bytes=browser_config["page_memory_budget"],
+            idle_timeout=browser_config["page_idle_timeout"]
+        )
+        self.response_timeout = browser_config["response_timeout"]
+        self.response_quiet_ms = browser_config["response_quiet_ms"]
         self.selectors = LovableSelectors()
         self.xpath_selectors = LovableXPathSelectors()
+        self.selector_resolver = SelectorResolver()
         
     async def start(self) -> None:
         """Initialize Playwright and launch browser"""
@@ -64,9 +76,7 @@ class LovableBrowserAutomation(LoggerMixin):
             self.logger.info("Stopping browser automation")
             
             # Close all pages and contexts
-            for page in self.pages.values():
-                if not page.is_closed():
-                    await page.close()
+            await self.page_manager.close_all()
             
             for context in self.contexts.values():
                 await context.close()
@@ -120,28 +130,45 @@ class LovableBrowserAutomation(LoggerMixin):
             raise BrowserError(f"Failed to create browser context: {str(e)}")
     
     async def navigate_to_project(self, session: Session, project_id: str) -> Page:
-        """Navigate to a Lovable project"""
+        """
+        Navigate to a Lovable project
+        
+        Reuses the open page for (session, project) when there is one; the
+        returned page stays in use until release_page() (see project_page()).
+        """
+        entry = None
         try:
             # Get or create context
             context_id = session.browser_context_id
             if not context_id or context_id not in self.contexts:
                 context = await self.create_session_context(session)
+                context_id = session.browser_context_id
             else:
                 context = self.contexts[context_id]
             
-            # Create new page
-            page = await context.new_page()
-            page_id = f"page_{uuid.uuid4()}"
-            self.pages[page_id] = page
+            project_url = f"{settings.lovable_web_url}/projects/{project_id}"
             
-            # Setup network interceptor
-            interceptor = NetworkInterceptor(page)
-            await interceptor.start()
-            self.interceptors[page_id] = interceptor
+            # Reuse the page already open on this project
+            entry = self.page_manager.get(session.id, project_id)
+            if entry:
+                self.page_manager.acquire(entry)
+                if entry.page.url.startswith(project_url):
+                    log_browser_event("page_reused", entry.page_id, url=project_url, session_id=session.id)
+                    return entry.page
+            else:
+                # Create new page with its network interceptor
+                page = await context.new_page()
+                interceptor = NetworkInterceptor(page)
+                await interceptor.start()
+                
+                entry = self.page_manager.add(
+                    f"page_{uuid.uuid4()}", session.id, project_id, context_id, page, interceptor
+                )
+                self.page_manager.acquire(entry)
             
-            # Navigate to project
-            project_url = f"{settings.lovable_web_url}/projects/{project_id}"
+            page, page_id = entry.page, entry.page_id
             
+            # Navigate to project
             log_browser_event("navigating", page_id, url=project_url, session_id=session.id)
             
             response = await page.goto(project_url, wait_until="networkidle")
@@ -160,11 +187,64 @@ class LovableBrowserAutomation(LoggerMixin):
             return page
             
         except Exception as e:
+            if entry:
+                await self.page_manager.release(entry.page)
             self.logger.error(f"Failed to navigate to project: {str(e)}")
             raise NavigationError(f"Failed to navigate to project: {str(e)}")
     
-    async def send_chat_message(self, page: Page, message: ChatMessage) -> LovableResponse:
-        """Send a chat message and capture the response"""
+    async def release_page(self, page: Page) -> None:
+        """Return a page from navigate_to_project() so it can be reused or evicted"""
+        await self.page_manager.release(page)
+    
+    @asynccontextmanager
+    async def project_page(self, session: Session, project_id: str) -> AsyncIterator[Page]:
+        """navigate_to_project() + release_page() around the block"""
+        page = await self.navigate_to_project(session, project_id)
+        try:
+            yield page
+        finally:
+            await self.release_page(page)
+    
+    async def run_chat(
+        self,
+        session: Session,
+        message: ChatMessage,
+        on_chunk: Optional[Callable[[StreamingChunk], Awaitable[None]]] = None
+    ) -> LovableResponse:
+        """
+        Full browser side of one message: project page, login if needed,
+        send and capture the response, check the page for errors
+        
+        This is the unit of work a browser shard runs (see sharding.py).
+        """
+        # Navigate to project (page is reused for the next message of this project)
+        async with self.project_page(session, message.project_id) as page:
+            # Handle authentication if needed
+            if not await self.handle_authentication(page, session):
+                raise MessageProcessingError("Authentication failed")
+            
+            # Send message and get response
+            lovable_response = await self.send_chat_message(page, message, on_chunk)
+            
+            # Check for errors
+            error_message = await self.check_for_errors(page)
+            if error_message:
+                raise MessageProcessingError(f"Lovable error: {error_message}")
+            
+            return lovable_response
+    
+    async def send_chat_message(
+        self,
+        page: Page,
+        message: ChatMessage,
+        on_chunk: Optional[Callable[[StreamingChunk], Awaitable[None]]] = None
+    ) -> LovableResponse:
+        """
+        Send a chat message and capture the response
+        
+        on_chunk receives each streaming chunk while the answer is still
+        being generated (the response also accumulates them)
+        """
         try:
             self.logger.info(f"Sending chat message: {message.content[:100]}...")
             
@@ -186,18 +266,20 @@ class LovableBrowserAutomation(LoggerMixin):
             response = LovableResponse(message_id=message.id)
             
             # Get interceptor for this page
-            page_id = self._get_page_id(page)
-            interceptor = self.interceptors.get(page_id)
+            interceptor = self.page_manager.interceptor(page)
             
             if interceptor:
                 # Setup response capture
-                interceptor.setup_response_capture(response)
+                interceptor.setup_response_capture(response, on_chunk)
+            
+            # AI messages already on the page, so the observer only waits for new ones
+            baseline = await count_elements(page, self.selectors.CHAT_MESSAGE_AI)
             
             # Click send button
             await send_button.click()
             
             # Wait for response
-            await self._wait_for_response(page, response)
+            await self._wait_for_response(page, response, interceptor, baseline)
             
             self.logger.info(f"Message sent successfully, response received")
             
@@ -209,53 +291,19 @@ class LovableBrowserAutomation(LoggerMixin):
     
     async def _find_chat_input(self, page: Page) -> Optional[Any]:
         """Find chat input element with fallback selectors"""
-        selectors = self.selectors.get_chat_input_selectors()
-        
-        for selector in selectors:
-            try:
-                element = await page.wait_for_selector(selector, timeout=5000)
-                if element and await element.is_visible():
-                    return element
-            except:
-                continue
+        selectors = self.selectors.get_chat_input_selectors() + [
+            f"xpath={self.xpath_selectors.CHAT_INPUT_BY_PLACEHOLDER}"
+        ]
         
-        # Try XPath selector
-        try:
-            element = await page.wait_for_selector(
-                f"xpath={self.xpath_selectors.CHAT_INPUT_BY_PLACEHOLDER}", 
-                timeout=5000
-            )
-            if element and await element.is_visible():
-                return element
-        except:
-            pass
-        
-        return None
+        return await self.selector_resolver.resolve(page, "chat_input", selectors, timeout=5)
     
     async def _find_send_button(self, page: Page) -> Optional[Any]:
         """Find send button element with fallback selectors"""
-        selectors = self.selectors.get_send_button_selectors()
+        selectors = self.selectors.get_send_button_selectors() + [
+            f"xpath={self.xpath_selectors.SEND_BUTTON_BY_TEXT}"
+        ]
         
-        for selector in selectors:
-            try:
-                element = await page.wait_for_selector(selector, timeout=5000)
-                if element and await element.is_visible() and await element.is_enabled():
-                    return element
-            except:
-                continue
-        
-        # Try XPath selector
-        try:
-            element = await page.wait_for_selector(
-                f"xpath={self.xpath_selectors.SEND_BUTTON_BY_TEXT}", 
-                timeout=5000
-            )
-            if element and await element.is_visible() and await element.is_enabled():
-                return element
-        except:
-            pass
-        
-        return None
+        return await self.selector_resolver.resolve(page, "send_button", selectors, timeout=5, enabled=True)
     
     async def _wait_for_page_load(self, page: Page) -> None:
         """Wait for page to fully load"""
@@ -280,48 +328,60 @@ class LovableBrowserAutomation(LoggerMixin):
         except Exception as e:
             self.logger.warning(f"Page load wait completed with warnings: {str(e)}")
     
-    async def _wait_for_response(self, page: Page, response: LovableResponse, timeout: int = 60) -> None:
-        """Wait for AI response to complete"""
+    async def _wait_for_response(
+        self,
+        page: Page,
+        response: LovableResponse,
+        interceptor: Optional[NetworkInterceptor] = None,
+        baseline: int = 0,
+        timeout: Optional[float] = None
+    ) -> None:
+        """
+        Wait for AI response to complete
+        
+        Returns on the first completion signal: the chat response stream
+        ending (network interceptor) or the message list settling
+        (MutationObserver in the page). The timeout is only a ceiling.
+        """
+        timeout = timeout or self.response_timeout
+        start_time = datetime.utcnow()
+        
         try:
-            start_time = datetime.utcnow()
-            
-            # Wait for loading indicators to appear and disappear
-            loading_selectors = self.selectors.get_loading_selectors()
+            signals = {
+                "dom": wait_for_dom_settled(
+                    page,
+                    self.selectors.CHAT_MESSAGE_AI,
+                    ", ".join(self.selectors.get_loading_selectors()),
+                    baseline,
+                    self.response_quiet_ms,
+                    timeout
+                )
+            }
+            if interceptor:
+                signals["network"] = interceptor.wait_for_completion()
             
-            # First, wait for loading to start (optional)
-            for selector in loading_selectors:
-                try:
-                    await page.wait_for_selector(selector, timeout=5000)
-                    self.logger.debug(f"Loading indicator appeared: {selector}")
-                    break
-                except:
-                    continue
+            signal = await wait_for_first(signals, timeout)
             
-            # Then wait for loading to finish
-            for selector in loading_selectors:
+            # The page can render before the intercepted body is processed
+            if signal == "dom" and interceptor and not interceptor.completed.is_set():
                 try:
-                    await page.wait_for_selector(selector, state="hidden", timeout=timeout * 1000)
-                    self.logger.debug(f"Loading indicator disappeared: {selector}")
-                except:
-                    continue
-            
-            # Wait for new message to appear
-            try:
-                await page.wait_for_selector(
-                    f"xpath={self.xpath_selectors.LAST_AI_MESSAGE}",
-                    timeout=timeout * 1000
-                )
-            except:
-                self.logger.warning("Could not detect new AI message")
-            
-            # Mark response as complete
-            response.mark_complete()
+                    await asyncio.wait_for(interceptor.completed.wait(), self.response_quiet_ms / 1000)
+                except asyncio.TimeoutError:
+                    pass
             
-            # Calculate processing time
             processing_time = (datetime.utcnow() - start_time).total_seconds()
             response.processing_time = processing_time
             
-            self.logger.info(f"Response completed in {processing_time:.2f} seconds")
+            if not signal:
+                self.logger.warning(f"No completion signal after {timeout}s")
+                response.mark_error(f"Timeout waiting for response after {timeout}s", "TIMEOUT")
+                return
+            
+            # Mark response as complete (an intercepted API error is already marked)
+            if response.success:
+                response.mark_complete()
+            
+            self.logger.info(f"Response completed in {processing_time:.2f} seconds ({signal})")
             
         except Exception as e:
             self.logger.error(f"Error waiting for response: {str(e)}")
@@ -398,10 +458,7 @@ class LovableBrowserAutomation(LoggerMixin):
     
     def _get_page_id(self, page: Page) -> Optional[str]:
         """Get page ID from internal mapping"""
-        for page_id, stored_page in self.pages.items():
-            if stored_page == page:
-                return page_id
-        return None
+        return self.page_manager.page_id(page)
     
     async def cleanup_session_resources(self, session: Session) -> None:
         """Cleanup browser resources for a session"""
@@ -411,18 +468,7 @@ class LovableBrowserAutomation(LoggerMixin):
                 return
             
             # Close pages associated with this context
-            pages_to_remove = []
-            for page_id, page in self.pages.items():
-                if page.context == self.contexts.get(context_id):
-                    if not page.is_closed():
-                        await page.close()
-                    pages_to_remove.append(page_id)
-            
-            # Remove pages from tracking
-            for page_id in pages_to_remove:
-                del self.pages[page_id]
-                if page_id in self.interceptors:
-                    del self.interceptors[page_id]
+            await self.page_manager.close_context(context_id)
             
             # Close context
             if context_id in self.contexts:
@@ -0,0 +1,141 @@
+"""
+Response completion signals for Lovable.dev chat
+"""
+
+import asyncio
+import uuid
+from typing import Awaitable, Dict, Optional
+from playwright.async_api import Page
+
+
+COUNT_SCRIPT = "(selector) => document.querySelectorAll(selector).length"
+
+# Resolves true once more than `baseline` messages exist, no loading indicator
+# is visible and the DOM has been quiet for quietMs; false at the ceiling.
+# Each wait registers its finish() under waitId so CANCEL_SCRIPT can tear
+# down the observer and timers when the Python side stops waiting.
+SETTLED_SCRIPT = """
+({ waitId, messageSelector, loadingSelector, baseline, quietMs, timeoutMs }) => new Promise(resolve => {
+    const waits = window.__chatloveSettledWaits = window.__chatloveSettledWaits || {};
+    const count = () => document.querySelectorAll(messageSelector).length;
+    const loading = () => Array.from(document.querySelectorAll(loadingSelector))
+        .some(el => el.offsetParent !== null);
+    const ready = () => count() > baseline && !loading();
+
+    let quietTimer = null;
+    const check = () => {
+        clearTimeout(quietTimer);
+        if (ready()) {
+            quietTimer = setTimeout(() => ready() ? finish(true) : check(), quietMs);
+        }
+    };
+
+    const observer = new MutationObserver(check);
+    const ceiling = setTimeout(() => finish(false), timeoutMs);
+    const finish = (result) => {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(ceiling);
+        delete waits[waitId];
+        resolve(result);
+    };
+    waits[waitId] = finish;
+
+    observer.observe(document.body, {
+        childList: true,
+        subtree: true,
+        characterData: true,
+        attributes: true,
+        attributeFilter: ["class", "style", "hidden"]
+    });
+    check();
+})
+"""
+
+
+CANCEL_SCRIPT = """
+(waitId) => {
+    const finish = (window.__chatloveSettledWaits || {})[waitId];
+    if (finish) finish(false);
+    return Boolean(finish);
+}
+"""
+
+# Seconds allowed for the cancel round-trip (the page may be navigating)
+CANCEL_TIMEOUT = 5.0
+
+
+async def count_elements(page: Page, selector: str) -> int:
+    """Number of elements matching a CSS selector (0 on error)"""
+    try:
+        return int(await page.evaluate(COUNT_SCRIPT, selector))
+    except Exception:
+        return 0
+
+
+async def wait_for_dom_settled(
+    page: Page,
+    message_selector: str,
+    loading_selector: str,
+    baseline: int,
+    quiet_ms: int,
+    timeout: float
+) -> bool:
+    """
+    Page-side MutationObserver: True when a new message was rendered and
+    the chat stopped changing, False if the timeout is reached first
+
+    Cancelling the wait (another signal won) also disconnects the observer
+    in the page, so reused pages do not accumulate one per message.
+    """
+    wait_id = uuid.uuid4().hex
+
+    try:
+        return bool(await page.evaluate(SETTLED_SCRIPT, {
+            "waitId": wait_id,
+            "messageSelector": message_selector,
+            "loadingSelector": loading_selector,
+            "baseline": baseline,
+            "quietMs": quiet_ms,
+            "timeoutMs": int(timeout * 1000)
+        }))
+    except asyncio.CancelledError:
+        try:
+            await asyncio.wait_for(page.evaluate(CANCEL_SCRIPT, wait_id), CANCEL_TIMEOUT)
+        except Exception:
+            pass  # Page closed or navigated: the observer went with it
+        raise
+
+
+async def wait_for_first(signals: Dict[str, Awaitable[bool]], timeout: float) -> Optional[str]:
+    """
+    Wait until any signal resolves truthy and return its name
+
+    Signals that fail or resolve falsy are ignored; the rest keep running.
+    Returns None when no signal fires before the timeout. Pending signals
+    are cancelled on return.
+    """
+    tasks = {asyncio.ensure_future(awaitable): name for name, awaitable in signals.items()}
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    pending = set(tasks)
+
+    try:
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if not task.cancelled() and task.exception() is None and task.result():
+                    return tasks[task]
+
+        return None
+
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
@@ -2,14 +2,19 @@
 Network interceptor for capturing Lovable API responses
 """
 
+import asyncio
 import json
 import re
-from typing import Optional, Dict, Any, List, Callable
+from typing import Optional, Dict, Any, List, Callable, Union, Awaitable, Set
 from playwright.async_api import Page, Response, Request
-from datetime import datetime
 
 from ..core.logging import LoggerMixin
 from ..models.response import LovableResponse, StreamingChunk, StreamingChunkType, CodeChanges, FileChange
+from .stream_parser import StreamParser
+from .stream_hook import BINDING_NAME, stream_hook_script
+
+
+ChunkCallback = Callable[[StreamingChunk], Awaitable[None]]
 
 
 class NetworkInterceptor(LoggerMixin):
@@ -20,8 +25,18 @@ class NetworkInterceptor(LoggerMixin):
     def __init__(self, page: Page):
         self.page = page
         self.response_capture: Optional[LovableResponse] = None
-        self.streaming_buffer = ""
-        self.chunk_sequence = 0
+        self.stream_parser = StreamParser()
+        self.on_chunk: Optional[ChunkCallback] = None
+        
+        # Streams forwarded live by the page hook for the current capture.
+        # Playwright runs every binding call as its own task, so events are
+        # queued per stream and one consumer task handles them in order.
+        self._stream_queues: Dict[int, asyncio.Queue] = {}
+        self._stream_tasks: Dict[int, asyncio.Task] = {}
+        self._live_urls: Set[str] = set()
+        
+        # Set when the chat response for the current capture has ended
+        self.completed = asyncio.Event()
         
         # API endpoints to intercept
         self.api_patterns = [
@@ -47,16 +62,31 @@ class NetworkInterceptor(LoggerMixin):
             # Intercept requests (optional, for debugging)
             self.page.on("request", self._on_request)
             
+            # Live stream capture: fetch/EventSource hook in the page, chunks
+            # arrive through the binding while the response is still streaming
+            await self.page.expose_binding(BINDING_NAME, self._on_stream_event)
+            await self.page.add_init_script(stream_hook_script(self.api_patterns))
+            
             self.logger.debug("Network interceptor started")
             
         except Exception as e:
             self.logger.error(f"Failed to start network interceptor: {str(e)}")
     
-    def setup_response_capture(self, response: LovableResponse) -> None:
-        """Setup response capture for a specific response object"""
+    def setup_response_capture(self, response: LovableResponse, on_chunk: Optional[ChunkCallback] = None) -> None:
+        """
+        Setup response capture for a specific response object
+        
+        on_chunk is awaited for every streaming chunk as soon as it is parsed
+        """
         self.response_capture = response
-        self.streaming_buffer = ""
-        self.chunk_sequence = 0
+        self.stream_parser = StreamParser()
+        self.on_chunk = on_chunk
+        for task in self._stream_tasks.values():
+            task.cancel()
+        self._stream_tasks.clear()
+        self._stream_queues.clear()
+        self._live_urls.clear()
+        self.completed.clear()
         
         self.logger.debug(f"Response capture setup for message: {response.message_id}")
     
@@ -81,6 +111,62 @@ class NetworkInterceptor(LoggerMixin):
         except Exception as e:
             self.logger.error(f"Error handling request: {str(e)}")
     
+    async def _on_stream_event(self, source: Dict[str, Any], event: Dict[str, Any]) -> None:
+        """
+        Queue a stream event forwarded by the page hook
+        
+        Nothing is awaited here: binding calls start in the order the page
+        sent them, so queueing before the first await keeps that order.
+        """
+        if not self.response_capture:
+            return
+        
+        stream_id = event.get("id")
+        
+        if event.get("type") == "start":
+            queue = asyncio.Queue()
+            self._stream_queues[stream_id] = queue
+            self._stream_tasks[stream_id] = asyncio.create_task(self._consume_stream(stream_id, queue))
+            self._live_urls.add(event.get("url"))
+            self.response_capture.is_streaming = True
+            self.logger.debug(f"Live stream started: {event.get('url')}")
+            return
+        
+        # Ignore the tail of a stream from a previous capture
+        queue = self._stream_queues.get(stream_id)
+        if queue is not None:
+            queue.put_nowait(event)
+    
+    async def _consume_stream(self, stream_id: int, queue: asyncio.Queue) -> None:
+        """Process one live stream's events in order; its end completes the capture"""
+        try:
+            while True:
+                event = await queue.get()
+                event_type = event.get("type")
+                
+                if event_type == "chunk":
+                    await self._process_streaming_data(event.get("data", ""))
+                    if self.stream_parser.done:
+                        self.completed.set()
+                
+                elif event_type in ("end", "error"):
+                    if event_type == "error":
+                        self.logger.warning(f"Live stream interrupted: {event.get('error')}")
+                    
+                    await self._process_streaming_data(event.get("data", ""), final=True)
+                    self.completed.set()
+                    return
+        
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.logger.error(f"Error handling stream event: {str(e)}")
+        
+        finally:
+            if self._stream_queues.get(stream_id) is queue:
+                del self._stream_queues[stream_id]
+                del self._stream_tasks[stream_id]
+    
     async def _on_response(self, response: Response) -> None:
         """Handle intercepted responses"""
         try:
@@ -96,6 +182,15 @@ class NetworkInterceptor(LoggerMixin):
                 # Handle based on type
                 handler = self.response_handlers.get(response_type, self._handle_generic_response)
                 await handler(response)
+                
+                # Handlers read the whole body, so the stream has ended here.
+                # A live stream's tail may still be queued: its end event completes it.
+                if (
+                    self.response_capture
+                    and url not in self._live_urls
+                    and self._is_completion_response(response_type, response)
+                ):
+                    self.completed.set()
         
         except Exception as e:
             self.logger.error(f"Error handling response: {str(e)}")
@@ -108,12 +203,25 @@ class NetworkInterceptor(LoggerMixin):
         """Check if response URL matches Lovable API patterns"""
         return self._is_lovable_api_request(url)
     
+    def _is_completion_response(self, response_type: str, response: Response) -> bool:
+        """Whether this response ends the current chat turn"""
+        if response_type == "error":
+            return True
+        
+        # Chat history and polling GETs also match the patterns
+        return response_type in ("chat", "stream") and response.request.method == "POST"
+    
+    async def wait_for_completion(self) -> bool:
+        """Wait until the chat response of the current capture has ended"""
+        await self.completed.wait()
+        return True
+    
     def _determine_response_type(self, url: str, response: Response) -> str:
         """Determine the type of response based on URL and headers"""
         content_type = response.headers.get("content-type", "").lower()
         
-        # Check for streaming responses
-        if "text/stream" in content_type or "application/stream" in content_type:
+        # Check for streaming responses (SSE, JSON lines)
+        if "stream" in content_type or "ndjson" in content_type:
             return "stream"
         
         # Check for chat endpoints
@@ -160,11 +268,16 @@ class NetworkInterceptor(LoggerMixin):
             # Mark as streaming
             self.response_capture.is_streaming = True
             
-            # Get response body
-            response_text = await response.text()
+            # Already captured chunk by chunk through the page hook
+            await response.finished()
+            if response.url in self._live_urls:
+                return
             
-            if response_text:
-                await self._process_streaming_data(response_text)
+            # Get response body (raw bytes, the parser decodes per line)
+            body = await response.body()
+            
+            # The whole body has arrived, so the stream is also closed
+            await self._process_streaming_data(body, final=True)
         
         except Exception as e:
             self.logger.error(f"Error handling streaming response: {str(e)}")
@@ -266,61 +379,37 @@ class NetworkInterceptor(LoggerMixin):
         except Exception as e:
             self.logger.error(f"Error processing text response: {str(e)}")
     
-    async def _process_streaming_data(self, data: str) -> None:
-        """Process streaming response data"""
+    async def _process_streaming_data(self, data: Union[str, bytes], final: bool = False) -> None:
+        """Process streaming response data (a fragment, or the rest of the stream if final)"""
         try:
             if not self.response_capture:
                 return
             
-            # Add to streaming buffer
-            self.streaming_buffer += data
-            
-            # Try to extract complete chunks
-            chunks = self._extract_streaming_chunks(self.streaming_buffer)
+            # Each fragment is parsed once; only an incomplete line stays buffered
+            chunks = self.stream_parser.feed(data)
+            if final:
+                chunks += self.stream_parser.close()
             
             for chunk_data in chunks:
-                chunk = StreamingChunk(
-                    id=f"chunk_{self.chunk_sequence}",
-                    type=self._determine_chunk_type(chunk_data),
-                    content=chunk_data,
-                    sequence=self.chunk_sequence,
-                    timestamp=datetime.utcnow()
-                )
+                sequence = self.response_capture.append_chunk(self._determine_chunk_type(chunk_data), chunk_data)
                 
-                self.response_capture.add_streaming_chunk(chunk)
-                self.chunk_sequence += 1
+                # A StreamingChunk is only built for a live consumer
+                if self.on_chunk:
+                    try:
+                        await self.on_chunk(self.response_capture.chunks[sequence])
+                    except Exception as e:
+                        self.logger.warning(f"Chunk callback failed: {str(e)}")
+            
+            if final and self.stream_parser.dropped:
+                self.logger.warning(f"Dropped {self.stream_parser.dropped} oversized stream events")
             
             # Check for completion markers
-            if self._is_streaming_complete(data):
-                self.response_capture.mark_streaming_complete()
+            if self.stream_parser.done or self._is_streaming_complete(data):
+                self.response_capture.mark_complete()
         
         except Exception as e:
             self.logger.error(f"Error processing streaming data: {str(e)}")
     
-    def _extract_streaming_chunks(self, buffer: str) -> List[str]:
-        """Extract complete chunks from streaming buffer"""
-        chunks = []
-        
-        # Common streaming formats
-        patterns = [
-            r"data: ({.*?})\n\n",  # Server-sent events
-            r"({.*?})\n",          # JSON lines
-            r"chunk: (.*?)\n",     # Custom chunk format
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, buffer, re.DOTALL)
-            if matches:
-                chunks.extend(matches)
-                # Remove processed chunks from buffer
-                for match in matches:
-                    buffer = buffer.replace(match, "", 1)
-        
-        # Update buffer
-        self.streaming_buffer = buffer
-        
-        return chunks
-    
     def _determine_chunk_type(self, chunk_data: str) -> StreamingChunkType:
         """Determine the type of streaming chunk"""
         try:
@@ -347,7 +436,7 @@ class NetworkInterceptor(LoggerMixin):
             
             return StreamingChunkType.TEXT
     
-    def _is_streaming_complete(self, data: str) -> bool:
+    def _is_streaming_complete(self, data: Union[str, bytes]) -> bool:
         """Check if streaming is complete"""
         completion_markers = [
             "[DONE]",
@@ -357,6 +446,8 @@ class NetworkInterceptor(LoggerMixin):
             "stream_end"
         ]
         
+        if isinstance(data, bytes):
+            return any(marker.encode() in data for marker in completion_markers)
         return any(marker in data for marker in completion_markers)
     
     async def _extract_code_changes(self, data: Dict[str, Any]) -> Optional[CodeChanges]:
@@ -399,7 +490,7 @@ class NetworkInterceptor(LoggerMixin):
             "message_id": self.response_capture.message_id,
             "ai_message_id": self.response_capture.ai_message_id,
             "content": self.response_capture.content,
-            "streaming_chunks_count": len(self.response_capture.streaming_chunks),
+            "streaming_chunks_count": len(self.response_capture.chunks),
             "is_streaming": self.response_capture.is_streaming,
             "is_streaming_complete": self.response_capture.is_streaming_complete,
             "success": self.response_capture.success,
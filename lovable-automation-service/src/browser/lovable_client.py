@@ -9,6 +9,13 @@ from playwright.async_api import async_playwright, Browser, Page, BrowserContext
 
 from ..core.logging import LoggerMixin
 from ..core.config import settings
+from .completion import count_elements, wait_for_dom_settled, wait_for_first
+from .resolver import SelectorResolver
+
+
+# Rendered chat messages and "AI is working" indicators, used to detect completion
+MESSAGE_SELECTOR = '[data-testid*="message"], [class*="message"], .prose'
+LOADING_SELECTOR = '.loading, .spinner, .animate-spin, [class*="typing"], [class*="streaming"]'
 
 
 class LovableClient(LoggerMixin):
@@ -24,6 +31,7 @@ class LovableClient(LoggerMixin):
         self.is_logged_in = False
         self.current_project_id = None
         self.projects = []
+        self.selector_resolver = SelectorResolver()
     
     async def start(self) -> None:
         """Start the browser"""
@@ -288,7 +296,6 @@ class LovableClient(LoggerMixin):
             self.logger.info(f"Sending message: {message[:100]}...")
             
             # Find chat input
-            chat_input = None
             chat_selectors = [
                 'textarea[placeholder*="message"]',
                 'textarea[placeholder*="Message"]',
@@ -298,14 +305,9 @@ class LovableClient(LoggerMixin):
                 '[class*="input"] textarea'
             ]
             
-            for selector in chat_selectors:
-                try:
-                    element = await self.page.wait_for_selector(selector, timeout=3000)
-                    if element and await element.is_visible():
-                        chat_input = element
-                        break
-                except:
-                    continue
+            chat_input = await self.selector_resolver.resolve(
+                self.page, "chat_input", chat_selectors, timeout=3
+            )
             
             if not chat_input:
                 return {
@@ -317,7 +319,6 @@ class LovableClient(LoggerMixin):
             await chat_input.fill(message)
             
             # Find send button
-            send_button = None
             send_selectors = [
                 'button[type="submit"]',
                 'button[aria-label*="Send"]',
@@ -327,14 +328,17 @@ class LovableClient(LoggerMixin):
                 'button:has-text("→")'
             ]
             
-            for selector in send_selectors:
-                try:
-                    element = await self.page.wait_for_selector(selector, timeout=3000)
-                    if element and await element.is_visible() and await element.is_enabled():
-                        send_button = element
-                        break
-                except:
-                    continue
+            send_button = await self.selector_resolver.resolve(
+                self.page, "send_button", send_selectors, timeout=3, enabled=True
+            )
+            
+            # The generic selector also matches the user's own message: wait for one more
+            baseline = await count_elements(self.page, MESSAGE_SELECTOR) + 1
+            timeout = settings.browser_response_timeout
+            
+            # Listen for the chat request before sending so its response is not missed
+            chat_stream = asyncio.ensure_future(self._wait_for_chat_stream(timeout))
+            await asyncio.sleep(0)
             
             if not send_button:
                 # Try pressing Enter
@@ -342,8 +346,21 @@ class LovableClient(LoggerMixin):
             else:
                 await send_button.click()
             
-            # Wait for response
-            await asyncio.sleep(3)
+            # Wait for response: chat stream ended or message list settled
+            signal = await wait_for_first({
+                "network": chat_stream,
+                "dom": wait_for_dom_settled(
+                    self.page,
+                    MESSAGE_SELECTOR,
+                    LOADING_SELECTOR,
+                    baseline,
+                    settings.browser_response_quiet_ms,
+                    timeout
+                )
+            }, timeout)
+            
+            if not signal:
+                self.logger.warning(f"No completion signal after {timeout}s, extracting partial response")
             
             # Try to extract the response
             response_content = await self._extract_latest_response()
@@ -365,14 +382,24 @@ class LovableClient(LoggerMixin):
                 "message_sent": message
             }
     
+    async def _wait_for_chat_stream(self, timeout: float) -> bool:
+        """
+        Wait for the chat POST response and for its body to finish
+        (for streamed answers this is the end of the stream)
+        """
+        response = await self.page.wait_for_event(
+            "response",
+            predicate=lambda r: "/chat" in r.url and r.request.method == "POST",
+            timeout=timeout * 1000
+        )
+        await response.finished()
+        return True
+    
     async def _extract_latest_response(self) -> Dict[str, Any]:
         """
         Extract the latest AI response from the chat
         """
         try:
-            # Wait a bit more for the response to fully load
-            await asyncio.sleep(5)
-            
             response_data = await self.page.evaluate("""
                 () => {
                     // Look for message containers
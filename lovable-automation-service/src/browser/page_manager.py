@@ -0,0 +1,218 @@
+"""
+Page lifecycle manager for browser automation
+"""
+
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Set, Tuple
+from playwright.async_api import Page
+
+from ..core.logging import LoggerMixin, log_browser_event
+from .interceptor import NetworkInterceptor
+
+
+# Chromium only; pages without performance.memory report 0
+JS_HEAP_SCRIPT = "() => (performance.memory ? performance.memory.usedJSHeapSize : 0)"
+
+
+class ManagedPage:
+    """An open page tracked by the PageManager"""
+
+    def __init__(
+        self,
+        page_id: str,
+        key: Tuple[str, str],
+        context_id: str,
+        page: Page,
+        interceptor: NetworkInterceptor
+    ):
+        self.page_id = page_id
+        self.key = key
+        self.context_id = context_id
+        self.page = page
+        self.interceptor = interceptor
+        self.in_use = 0
+        self.last_used = time.monotonic()
+        self.heap_bytes = 0
+
+    @property
+    def idle(self) -> bool:
+        return self.in_use == 0
+
+
+class PageManager(LoggerMixin):
+    """
+    Keeps one reusable page per (session, project) and bounds open pages
+
+    - get(): O(1) lookup of the open page for a (session, project)
+    - page_id(): O(1) page -> id index (no scan over all pages)
+    - LRU eviction of idle pages when a context exceeds its page cap, when
+      the measured JS heap of all pages exceeds the memory budget, or when
+      a page stays idle longer than idle_timeout
+
+    Pages in use (acquired and not yet released) are never evicted.
+    """
+
+    def __init__(
+        self,
+        max_pages_per_context: int = 3,
+        memory_budget_bytes: int = 0,
+        idle_timeout: float = 600.0
+    ):
+        self.max_pages_per_context = max_pages_per_context
+        self.memory_budget_bytes = memory_budget_bytes
+        self.idle_timeout = idle_timeout
+
+        # Least recently used first
+        self._entries: "OrderedDict[str, ManagedPage]" = OrderedDict()
+        self._by_key: Dict[Tuple[str, str], str] = {}
+        self._by_page: Dict[Page, str] = {}
+        self._by_context: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, session_id: str, project_id: str) -> Optional[ManagedPage]:
+        """Open, idle page for (session, project), or None"""
+        page_id = self._by_key.get((session_id, project_id))
+        if not page_id:
+            return None
+
+        entry = self._entries[page_id]
+        if entry.page.is_closed():
+            self._forget(page_id)
+            return None
+
+        return entry if entry.idle else None
+
+    def add(
+        self,
+        page_id: str,
+        session_id: str,
+        project_id: str,
+        context_id: str,
+        page: Page,
+        interceptor: NetworkInterceptor
+    ) -> ManagedPage:
+        """Track a newly opened page as the (session, project) page"""
+        key = (session_id, project_id)
+        entry = ManagedPage(page_id, key, context_id, page, interceptor)
+
+        self._entries[page_id] = entry
+        self._by_key[key] = page_id
+        self._by_page[page] = page_id
+        self._by_context.setdefault(context_id, set()).add(page_id)
+
+        # Closed by the browser (crash, window.close): drop from the indexes
+        page.on("close", lambda _: self._forget(page_id))
+
+        return entry
+
+    def acquire(self, entry: ManagedPage) -> None:
+        entry.in_use += 1
+        entry.last_used = time.monotonic()
+        self._entries.move_to_end(entry.page_id)
+
+    async def release(self, page: Page) -> None:
+        """Mark the page idle again and enforce the limits"""
+        page_id = self._by_page.get(page)
+        if not page_id:
+            return
+
+        entry = self._entries[page_id]
+        entry.in_use = max(0, entry.in_use - 1)
+        entry.last_used = time.monotonic()
+
+        if self.memory_budget_bytes and not page.is_closed():
+            try:
+                entry.heap_bytes = int(await page.evaluate(JS_HEAP_SCRIPT))
+            except Exception:
+                entry.heap_bytes = 0
+
+        await self.enforce_limits(entry.context_id)
+
+    def page_id(self, page: Page) -> Optional[str]:
+        return self._by_page.get(page)
+
+    def interceptor(self, page: Page) -> Optional[NetworkInterceptor]:
+        page_id = self._by_page.get(page)
+        return self._entries[page_id].interceptor if page_id else None
+
+    @property
+    def heap_bytes(self) -> int:
+        return sum(entry.heap_bytes for entry in self._entries.values())
+
+    async def enforce_limits(self, context_id: Optional[str] = None) -> None:
+        """Evict idle pages (LRU first) until every limit holds"""
+        now = time.monotonic()
+
+        if self.idle_timeout:
+            expired = [
+                entry for entry in self._entries.values()
+                if entry.idle and now - entry.last_used > self.idle_timeout
+            ]
+            for entry in expired:
+                await self._evict(entry, "idle_timeout")
+
+        if context_id and self.max_pages_per_context:
+            page_ids = self._by_context.get(context_id, set())
+            excess = len(page_ids) - self.max_pages_per_context
+            if excess > 0:
+                victims = [
+                    entry for entry in self._entries.values()
+                    if entry.context_id == context_id and entry.idle
+                ][:excess]
+                for entry in victims:
+                    await self._evict(entry, "context_cap")
+
+        if self.memory_budget_bytes:
+            total = self.heap_bytes
+            for entry in list(self._entries.values()):
+                if total <= self.memory_budget_bytes:
+                    break
+                if entry.idle:
+                    total -= entry.heap_bytes
+                    await self._evict(entry, "memory_budget")
+
+    async def close_context(self, context_id: str) -> None:
+        """Close every page of a context (session cleanup)"""
+        for page_id in list(self._by_context.get(context_id, ())):
+            await self._evict(self._entries[page_id], "context_closed")
+
+    async def close_all(self) -> None:
+        for entry in list(self._entries.values()):
+            await self._evict(entry, "shutdown")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "open_pages": len(self._entries),
+            "in_use": sum(1 for entry in self._entries.values() if not entry.idle),
+            "contexts": len(self._by_context),
+            "heap_bytes": self.heap_bytes
+        }
+
+    async def _evict(self, entry: ManagedPage, reason: str) -> None:
+        self._forget(entry.page_id)
+
+        try:
+            if not entry.page.is_closed():
+                await entry.page.close()
+        except Exception as e:
+            self.logger.warning(f"Error closing page {entry.page_id}: {str(e)}")
+
+        log_browser_event("page_evicted", entry.page_id, reason=reason, context_id=entry.context_id)
+
+    def _forget(self, page_id: str) -> None:
+        entry = self._entries.pop(page_id, None)
+        if not entry:
+            return
+
+        if self._by_key.get(entry.key) == page_id:
+            del self._by_key[entry.key]
+        self._by_page.pop(entry.page, None)
+
+        page_ids = self._by_context.get(entry.context_id)
+        if page_ids is not None:
+            page_ids.discard(page_id)
+            if not page_ids:
+                del self._by_context[entry.context_id]
@@ -0,0 +1,163 @@
+"""
+Concurrent selector resolution with per-page memory and learned ordering
+"""
+
+import asyncio
+from typing import Optional, Dict, List
+from weakref import WeakKeyDictionary
+from playwright.async_api import Page, ElementHandle
+
+from ..core.logging import LoggerMixin
+
+
+class SelectorResolver(LoggerMixin):
+    """
+    Finds an element from a list of fallback selectors
+
+    - The selector that last matched on a page is tried first
+    - Otherwise every candidate is queried at once and the best ranked
+      usable match wins; if none is rendered yet, all candidates are
+      awaited concurrently and the first to appear wins
+    - Candidates are ranked by their recent hit rate (hits / attempts,
+      decayed per resolution), so a selector broken by UI drift drops
+      behind the one that replaced it within a few messages
+    - With enabled=True, a visible but disabled element is waited on until
+      it becomes enabled (within the timeout) instead of being returned
+    """
+
+    # Weight kept by past outcomes at each resolution (~20 resolution memory)
+    DECAY = 0.95
+
+    def __init__(self):
+        self._scores: Dict[str, Dict[str, List[float]]] = {}  # name -> selector -> [hits, attempts]
+        self._winners: "WeakKeyDictionary[Page, Dict[str, str]]" = WeakKeyDictionary()
+
+    def hit_rate(self, name: str, selector: str) -> float:
+        """Decayed hit rate; selectors without history start at 0.5"""
+        hits, attempts = self._scores.get(name, {}).get(selector, (0.0, 0.0))
+        return (hits + 1) / (attempts + 2)
+
+    def rank(self, name: str, candidates: List[str]) -> List[str]:
+        """Candidates by hit rate (stable, so ties keep the given order)"""
+        if name not in self._scores:
+            return list(candidates)
+        return sorted(candidates, key=lambda selector: -self.hit_rate(name, selector))
+
+    async def resolve(
+        self,
+        page: Page,
+        name: str,
+        candidates: List[str],
+        timeout: float = 5.0,
+        enabled: bool = False
+    ) -> Optional[ElementHandle]:
+        """Visible (and, if requested, enabled) element for the first matching candidate"""
+        remembered = self._winners.get(page, {}).get(name)
+        if remembered:
+            element = await self._query(page, remembered, enabled)
+            if element:
+                self._record(page, name, remembered, [remembered])
+                return element
+
+        ranked = self.rank(name, candidates)
+        missed = [remembered] if remembered else []
+
+        # Already rendered: one concurrent pass, best ranked match wins
+        elements = await asyncio.gather(*(self._query(page, selector, enabled) for selector in ranked))
+        for index, (selector, element) in enumerate(zip(ranked, elements)):
+            if element:
+                self._record(page, name, selector, missed + ranked[:index + 1])
+                return element
+
+        # Not rendered yet: wait on every candidate at once, first to appear wins
+        tasks = {
+            asyncio.ensure_future(self._wait(page, selector, timeout, enabled)): selector
+            for selector in ranked
+        }
+        pending = set(tasks)
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    element = task.result()
+                    if element:
+                        selector = tasks[task]
+                        self._record(page, name, selector, missed + ranked[:ranked.index(selector) + 1])
+                        return element
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        self._record(page, name, None, ranked)
+        self.logger.warning(f"No selector matched for {name} ({len(candidates)} candidates)")
+        return None
+
+    def forget(self, page: Page) -> None:
+        """Drop the remembered selectors of a page"""
+        self._winners.pop(page, None)
+
+    def stats(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        return {
+            name: {
+                selector: {"hits": hits, "attempts": attempts, "rate": self.hit_rate(name, selector)}
+                for selector, (hits, attempts) in scores.items()
+            }
+            for name, scores in self._scores.items()
+        }
+
+    def _record(self, page: Page, name: str, selector: Optional[str], attempted: List[str]) -> None:
+        """Decay the history, then count an attempt for each tried selector and a hit for the winner"""
+        scores = self._scores.setdefault(name, {})
+        for score in scores.values():
+            score[0] *= self.DECAY
+            score[1] *= self.DECAY
+
+        for tried in dict.fromkeys(attempted):
+            score = scores.setdefault(tried, [0.0, 0.0])
+            score[1] += 1
+            if tried == selector:
+                score[0] += 1
+
+        if selector is None:
+            return
+
+        winners = self._winners.setdefault(page, {})
+        if winners.get(name) != selector:
+            self.logger.debug(f"Selector for {name}: {selector}")
+            winners[name] = selector
+
+    async def _query(self, page: Page, selector: str, enabled: bool) -> Optional[ElementHandle]:
+        try:
+            element = await page.query_selector(selector)
+            if element and await self._usable(element, enabled):
+                return element
+        except Exception:
+            pass
+        return None
+
+    async def _wait(self, page: Page, selector: str, timeout: float, enabled: bool) -> Optional[ElementHandle]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        try:
+            element = await page.wait_for_selector(selector, state="visible", timeout=timeout * 1000)
+            if not element:
+                return None
+
+            if enabled:
+                # A send button renders disabled until the input has text
+                remaining_ms = max((deadline - loop.time()) * 1000, 1)  # 0 would mean no timeout
+                await element.wait_for_element_state("enabled", timeout=remaining_ms)
+
+            if await self._usable(element, enabled):
+                return element
+        except Exception:
+            pass
+        return None
+
+    async def _usable(self, element: ElementHandle, enabled: bool) -> bool:
+        if not await element.is_visible():
+            return False
+        return await element.is_enabled() if enabled else True
@@ -0,0 +1,414 @@
+"""
+Multi-process browser sharding for Lovable.dev automation
+"""
+
+import asyncio
+import itertools
+import multiprocessing
+import os
+import threading
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+from ..core.config import settings
+from ..core.exceptions import BrowserError, BrowserLaunchError, MessageProcessingError
+from ..core.logging import LoggerMixin, log_browser_event, setup_logging
+from ..models.session import Session
+from ..models.message import ChatMessage
+from ..models.response import LovableResponse, StreamingChunk
+from .automation import LovableBrowserAutomation
+
+
+ChunkCallback = Callable[[StreamingChunk], Awaitable[None]]
+
+# Requests (main -> shard):  {"id", "op": "chat"|"cleanup"|"stop", ...}
+# Replies  (shard -> main):  {"id", "shard", "result"} | {"id", "shard", "error", "error_type"}
+#                            {"id", "shard", "chunk"} while a chat response streams
+#                            {"shard", "ready"} once the browser is up
+
+
+def run_shard(index: int, requests: multiprocessing.Queue, replies: multiprocessing.Queue) -> None:
+    """Shard process entry point: own Playwright, own browser, own event loop"""
+    setup_logging()
+    asyncio.run(_serve(index, requests, replies))
+
+
+async def _serve(index: int, requests: multiprocessing.Queue, replies: multiprocessing.Queue) -> None:
+    automation = LovableBrowserAutomation()
+    sessions: Dict[str, Session] = {}
+    tasks = set()
+    loop = asyncio.get_running_loop()
+    inbox: asyncio.Queue = asyncio.Queue()
+
+    try:
+        await automation.start()
+    except Exception as e:
+        replies.put({"shard": index, "ready": False, "error": str(e)})
+        return
+
+    replies.put({"shard": index, "ready": True})
+
+    # Blocking queue reads stay off the event loop
+    def read_requests():
+        while True:
+            request = requests.get()
+            loop.call_soon_threadsafe(inbox.put_nowait, request)
+            if request.get("op") == "stop":
+                return
+
+    threading.Thread(target=read_requests, name=f"shard-{index}-requests", daemon=True).start()
+
+    async def handle(request: Dict[str, Any]) -> None:
+        request_id = request["id"]
+        try:
+            if request["op"] == "chat":
+                session = Session.model_validate(request["session"])
+
+                # Browser context and page URL are local to this shard
+                known = sessions.get(session.id)
+                if known:
+                    session.browser_context_id = known.browser_context_id
+                    session.page_url = known.page_url
+                sessions[session.id] = session
+
+                on_chunk = None
+                if request.get("stream"):
+                    async def on_chunk(chunk: StreamingChunk) -> None:
+                        replies.put({"id": request_id, "shard": index, "chunk": chunk.model_dump(mode="json")})
+
+                message = ChatMessage.model_validate(request["message"])
+                response = await automation.run_chat(session, message, on_chunk)
+                result = {"response": response.model_dump(mode="json"), "page_url": session.page_url}
+
+            elif request["op"] == "cleanup":
+                session = sessions.pop(request["session_id"], None)
+                if session:
+                    await automation.cleanup_session_resources(session)
+                result = {}
+
+            else:
+                raise BrowserError(f"Unknown shard operation: {request['op']}")
+
+            replies.put({"id": request_id, "shard": index, "result": result})
+
+        except Exception as e:
+            replies.put({"id": request_id, "shard": index, "error": str(e), "error_type": type(e).__name__})
+
+    try:
+        while True:
+            request = await inbox.get()
+            if request.get("op") == "stop":
+                break
+
+            task = asyncio.create_task(handle(request))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await automation.stop()
+
+
+class BrowserShard:
+    """Main-process handle of one shard process"""
+
+    def __init__(self, index: int, context, replies: multiprocessing.Queue):
+        self.index = index
+        self.context = context
+        self.replies = replies
+        self.requests: Optional[multiprocessing.Queue] = None
+        self.process = None
+        self.ready: Optional[asyncio.Future] = None
+        self.sessions: set = set()
+        self.pending: set = set()
+
+    @property
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def spawn(self) -> None:
+        self.requests = self.context.Queue()
+        self.ready = asyncio.get_running_loop().create_future()
+        self.sessions.clear()
+        self.process = self.context.Process(
+            target=run_shard,
+            args=(self.index, self.requests, self.replies),
+            name=f"browser-shard-{self.index}",
+            daemon=True
+        )
+        self.process.start()
+
+
+class ShardedBrowserAutomation(LoggerMixin):
+    """
+    Browser automation spread over N processes
+
+    Each shard process runs its own Playwright, Chromium and event loop
+    (a LovableBrowserAutomation) for the sessions it owns, so protocol
+    traffic and response parsing use one core per shard. A session is
+    assigned to the least loaded shard on first use and all of its
+    messages go there, keeping its browser context and pages warm.
+
+    Exposes the same run_chat()/cleanup_session_resources() surface the
+    MessageProcessor uses with a single LovableBrowserAutomation. A shard
+    that dies is restarted on the next request; its sessions get new
+    contexts there.
+    """
+
+    LIVENESS_INTERVAL = 1.0
+
+    def __init__(self, shards: int, start_timeout: float = 60.0):
+        self.shard_count = shards
+        self.start_timeout = start_timeout
+        self.request_timeout = settings.browser_response_timeout + 120  # Navigation + login margin
+
+        # spawn: Playwright and its threads must not be inherited through fork
+        self._context = multiprocessing.get_context("spawn")
+        self._replies = self._context.Queue()
+        self._shards: List[BrowserShard] = []
+        self._owners: Dict[str, int] = {}
+        self._futures: Dict[int, asyncio.Future] = {}
+        self._chunk_queues: Dict[int, asyncio.Queue] = {}  # Per streaming request, in reply order
+        self._ids = itertools.count(1)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reader: Optional[threading.Thread] = None
+
+    async def start(self) -> None:
+        """Spawn the shard processes and wait until every browser is up"""
+        self.logger.info(f"Starting {self.shard_count} browser shards")
+        self._loop = asyncio.get_running_loop()
+
+        self._reader = threading.Thread(target=self._read_replies, name="shard-replies", daemon=True)
+        self._reader.start()
+
+        self._shards = [BrowserShard(index, self._context, self._replies) for index in range(self.shard_count)]
+        for shard in self._shards:
+            shard.spawn()
+
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(shard.ready for shard in self._shards)),
+                timeout=self.start_timeout
+            )
+        except Exception as e:
+            await self.stop()
+            raise BrowserLaunchError(f"Failed to start browser shards: {str(e)}")
+
+        self.logger.info("Browser shards started successfully")
+
+    async def stop(self) -> None:
+        """Stop every shard (each closes its own pages, contexts and browser)"""
+        self.logger.info("Stopping browser shards")
+
+        for shard in self._shards:
+            if shard.is_alive:
+                shard.requests.put({"id": 0, "op": "stop"})
+
+        for shard in self._shards:
+            if shard.process is not None:
+                await asyncio.to_thread(shard.process.join, 30)
+                if shard.process.is_alive():
+                    shard.process.terminate()
+
+        for future in self._futures.values():
+            if not future.done():
+                future.set_exception(BrowserError("Browser shards stopped"))
+        self._futures.clear()
+
+        if self._reader and self._reader.is_alive():
+            self._replies.put(None)  # Wake the reader so it exits
+            self._reader = None
+
+        self.logger.info("Browser shards stopped")
+
+    def shard_for(self, session_id: str) -> BrowserShard:
+        """Owning shard of a session (least loaded shard on first use)"""
+        index = self._owners.get(session_id)
+        if index is None:
+            shard = min(self._shards, key=lambda shard: (len(shard.sessions), len(shard.pending)))
+            index = shard.index
+            self._owners[session_id] = index
+            shard.sessions.add(session_id)
+            log_browser_event("session_assigned", f"shard_{index}", session_id=session_id)
+        return self._shards[index]
+
+    async def run_chat(
+        self,
+        session: Session,
+        message: ChatMessage,
+        on_chunk: Optional[ChunkCallback] = None
+    ) -> LovableResponse:
+        """Run the message on the shard that owns the session"""
+        shard = await self._live_shard(session.id)
+
+        result = await self._request(shard, {
+            "op": "chat",
+            "session": session.model_dump(mode="json"),
+            "message": message.model_dump(mode="json"),
+            "stream": on_chunk is not None
+        }, on_chunk)
+
+        session.page_url = result["page_url"]
+        return self._load_response(result["response"])
+
+    async def cleanup_session_resources(self, session: Session) -> None:
+        """Close the session's context in its shard and release the assignment"""
+        index = self._owners.pop(session.id, None)
+        if index is None:
+            return
+
+        shard = self._shards[index]
+        shard.sessions.discard(session.id)
+        if shard.is_alive:
+            try:
+                await self._request(shard, {"op": "cleanup", "session_id": session.id})
+            except Exception as e:
+                self.logger.warning(f"Error cleaning up session {session.id} in shard {index}: {str(e)}")
+
+        session.browser_context_id = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "shards": [
+                {
+                    "index": shard.index,
+                    "alive": shard.is_alive,
+                    "pid": shard.process.pid if shard.process else None,
+                    "sessions": len(shard.sessions),
+                    "pending": len(shard.pending)
+                }
+                for shard in self._shards
+            ],
+            "sessions": len(self._owners)
+        }
+
+    async def _live_shard(self, session_id: str) -> BrowserShard:
+        shard = self.shard_for(session_id)
+        if shard.is_alive:
+            return shard
+
+        self.logger.warning(f"Browser shard {shard.index} is down, restarting")
+        for future_id in list(shard.pending):
+            future = self._futures.pop(future_id, None)
+            if future and not future.done():
+                future.set_exception(BrowserError(f"Browser shard {shard.index} died"))
+        shard.pending.clear()
+
+        # Sessions it owned start over with new contexts
+        orphans = set(shard.sessions)
+        shard.spawn()
+        shard.sessions.update(orphans)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(shard.ready), timeout=self.start_timeout)
+        except Exception as e:
+            raise BrowserLaunchError(f"Failed to restart browser shard {shard.index}: {str(e)}")
+
+        return shard
+
+    async def _request(
+        self,
+        shard: BrowserShard,
+        request: Dict[str, Any],
+        on_chunk: Optional[ChunkCallback] = None
+    ) -> Dict[str, Any]:
+        request_id = next(self._ids)
+        future = self._loop.create_future()
+        self._futures[request_id] = future
+        shard.pending.add(request_id)
+
+        # One task feeds on_chunk so chunks reach it in the order sent
+        delivery = None
+        if on_chunk:
+            chunks = asyncio.Queue()
+            self._chunk_queues[request_id] = chunks
+            delivery = asyncio.create_task(self._deliver_chunks(chunks, on_chunk))
+
+        try:
+            shard.requests.put({"id": request_id, **request})
+
+            # Poll liveness so a crashed shard fails its requests right away
+            deadline = self._loop.time() + self.request_timeout
+            while not future.done():
+                if not shard.is_alive:
+                    raise BrowserError(f"Browser shard {shard.index} died")
+                if self._loop.time() > deadline:
+                    raise BrowserError(f"Browser shard {shard.index} did not answer in {self.request_timeout}s")
+                await asyncio.wait({future}, timeout=self.LIVENESS_INTERVAL)
+
+            result = future.result()
+
+            # Chunks sent before the result reach on_chunk before run_chat returns
+            if delivery:
+                chunks.put_nowait(None)
+                await delivery
+
+            return result
+        finally:
+            self._futures.pop(request_id, None)
+            self._chunk_queues.pop(request_id, None)
+            shard.pending.discard(request_id)
+            if delivery and not delivery.done():
+                delivery.cancel()
+
+    async def _deliver_chunks(self, chunks: asyncio.Queue, on_chunk: ChunkCallback) -> None:
+        """Await on_chunk for each queued chunk in turn, until the None sentinel"""
+        while True:
+            chunk = await chunks.get()
+            if chunk is None:
+                return
+            try:
+                await on_chunk(chunk)
+            except Exception as e:
+                self.logger.warning(f"Chunk callback failed: {str(e)}")
+
+    def _read_replies(self) -> None:
+        """Reader thread: hand every reply to the event loop"""
+        while True:
+            reply = self._replies.get()
+            if reply is None:
+                return
+            self._loop.call_soon_threadsafe(self._dispatch, reply)
+
+    def _dispatch(self, reply: Dict[str, Any]) -> None:
+        if "ready" in reply:
+            shard = self._shards[reply["shard"]]
+            if shard.ready.done():
+                return
+            if reply["ready"]:
+                shard.ready.set_result(True)
+                log_browser_event("shard_ready", f"shard_{shard.index}", pid=shard.process.pid)
+            else:
+                shard.ready.set_exception(BrowserLaunchError(reply.get("error", "Shard failed to start")))
+            return
+
+        if "chunk" in reply:
+            chunks = self._chunk_queues.get(reply["id"])
+            if chunks is not None:
+                chunks.put_nowait(StreamingChunk.model_validate(reply["chunk"]))
+            return
+
+        future = self._futures.get(reply["id"])
+        if not future or future.done():
+            return
+
+        if "error" in reply:
+            error_class = MessageProcessingError if reply.get("error_type") == "MessageProcessingError" else BrowserError
+            future.set_exception(error_class(reply["error"]))
+        else:
+            future.set_result(reply["result"])
+
+    @staticmethod
+    def _load_response(data: Dict[str, Any]) -> LovableResponse:
+        """Rebuild a LovableResponse (with its chunks) from a shard reply"""
+        return LovableResponse.model_validate(data)
+
+
+def create_browser_automation():
+    """LovableBrowserAutomation, or ShardedBrowserAutomation when BROWSER_SHARDS > 1"""
+    shards = settings.browser_shards or os.cpu_count() or 1
+
+    if shards > 1:
+        return ShardedBrowserAutomation(shards)
+
+    return LovableBrowserAutomation()
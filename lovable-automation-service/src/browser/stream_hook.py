@@ -0,0 +1,104 @@
+"""
+Page-side hook that forwards Lovable chat streams as they arrive
+"""
+
+import json
+from typing import List
+
+
+BINDING_NAME = "__chatloveStream"
+
+# Runs before any page script (add_init_script). fetch() bodies of matching
+# streaming responses are tee'd: the page reads one branch as usual and the
+# other is forwarded chunk by chunk through the exposed binding. EventSource
+# messages are forwarded re-framed as SSE.
+#
+# Events: {id, type: "start", url} / {id, type: "chunk", data}
+#         {id, type: "end", data} / {id, type: "error", error}
+STREAM_HOOK_SCRIPT = """
+(() => {
+    if (window.__chatloveStreamHook) return;
+    window.__chatloveStreamHook = true;
+
+    const patterns = __PATTERNS__.map(source => new RegExp("^" + source));
+    const matches = (url) => patterns.some(pattern => pattern.test(url));
+    const isStream = (type) => /stream|ndjson/i.test(type || "");
+    const send = (event) => {
+        try { window.__BINDING__(event); } catch (e) {}
+    };
+    let nextId = 0;
+
+    const originalFetch = window.fetch;
+    window.fetch = async function (...args) {
+        const response = await originalFetch.apply(this, args);
+        try {
+            if (!response.body || !matches(response.url) || !isStream(response.headers.get("content-type"))) {
+                return response;
+            }
+
+            const id = ++nextId;
+            const [forPage, forCapture] = response.body.tee();
+            send({ id, type: "start", url: response.url });
+
+            (async () => {
+                const reader = forCapture.getReader();
+                const decoder = new TextDecoder();
+                try {
+                    while (true) {
+                        const { done, value } = await reader.read();
+                        if (done) break;
+                        send({ id, type: "chunk", data: decoder.decode(value, { stream: true }) });
+                    }
+                    send({ id, type: "end", data: decoder.decode() });
+                } catch (e) {
+                    send({ id, type: "error", error: String(e) });
+                }
+            })();
+
+            const wrapped = new Response(forPage, {
+                status: response.status,
+                statusText: response.statusText,
+                headers: response.headers
+            });
+            Object.defineProperty(wrapped, "url", { value: response.url });
+            return wrapped;
+        } catch (e) {
+            return response;
+        }
+    };
+
+    const OriginalEventSource = window.EventSource;
+    if (OriginalEventSource) {
+        const HookedEventSource = function (url, config) {
+            const source = new OriginalEventSource(url, config);
+            if (matches(source.url)) {
+                const id = ++nextId;
+                send({ id, type: "start", url: source.url });
+                source.addEventListener("message", (e) => send({
+                    id,
+                    type: "chunk",
+                    data: "data: " + String(e.data).split("\\n").join("\\ndata: ") + "\\n\\n"
+                }));
+                source.addEventListener("error", () => {
+                    if (source.readyState === OriginalEventSource.CLOSED) {
+                        send({ id, type: "end", data: "" });
+                    }
+                });
+            }
+            return source;
+        };
+        HookedEventSource.prototype = OriginalEventSource.prototype;
+        Object.assign(HookedEventSource, { CONNECTING: 0, OPEN: 1, CLOSED: 2 });
+        window.EventSource = HookedEventSource;
+    }
+})();
+"""
+
+
+def stream_hook_script(api_patterns: List[str]) -> str:
+    """Hook script matching the interceptor's API URL patterns"""
+    return (
+        STREAM_HOOK_SCRIPT
+        .replace("__PATTERNS__", json.dumps(api_patterns))
+        .replace("__BINDING__", BINDING_NAME)
+    )
@@ -0,0 +1,141 @@
+"""
+Incremental parser for Lovable streaming responses (SSE and JSON lines)
+"""
+
+from typing import List, Union
+
+
+# A single event/line larger than this is dropped instead of buffered
+MAX_EVENT_BYTES = 4 * 1024 * 1024
+
+DONE_PAYLOAD = "[DONE]"
+
+
+class StreamParser:
+    """
+    Line-based state machine over the raw stream bytes
+
+    Each fragment passed to feed() is scanned once: complete lines are
+    consumed, only the trailing partial line stays buffered. Supported
+    line formats, which may be mixed in one stream:
+
+        data: <payload>     SSE; consecutive data lines are joined with
+                            "\\n" and emitted at the blank line ending the event
+        event:/id:/retry:   SSE fields, ignored
+        : <comment>         SSE keep-alive, ignored
+        chunk: <payload>    custom format, emitted immediately
+        <anything else>     JSON lines, one payload per non-empty line
+
+    A "[DONE]" payload sets `done` and is not emitted. Memory is bounded by
+    max_event_bytes: an oversized line or event is dropped (counted in
+    `dropped`) and parsing resumes at the next line.
+    """
+
+    def __init__(self, max_event_bytes: int = MAX_EVENT_BYTES):
+        self.max_event_bytes = max_event_bytes
+        self.done = False
+        self.dropped = 0
+
+        self._buffer = bytearray()
+        self._discarding = False  # Inside an oversized line, skip to the next newline
+        self._event: List[str] = []
+        self._event_bytes = 0
+        self._event_overflow = False
+
+    @property
+    def buffered_bytes(self) -> int:
+        return len(self._buffer) + sum(len(value) for value in self._event)
+
+    def feed(self, data: Union[str, bytes]) -> List[str]:
+        """Consume a fragment and return the payloads it completed"""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        payloads: List[str] = []
+        start = 0
+
+        while True:
+            end = data.find(b"\n", start)
+            if end == -1:
+                break
+
+            if self._discarding:
+                self._discarding = False
+            elif len(self._buffer) + end - start > self.max_event_bytes:
+                self._buffer.clear()
+                self.dropped += 1
+            elif self._buffer:
+                self._buffer += data[start:end]
+                line = bytes(self._buffer)
+                self._buffer.clear()
+                self._line(line, payloads)
+            else:
+                self._line(data[start:end], payloads)
+
+            start = end + 1
+
+        rest = len(data) - start
+        if rest and not self._discarding:
+            if len(self._buffer) + rest > self.max_event_bytes:
+                self._buffer.clear()
+                self._discarding = True
+                self.dropped += 1
+            else:
+                self._buffer += data[start:]
+
+        return payloads
+
+    def close(self) -> List[str]:
+        """End of stream: flush the last line and any unterminated SSE event"""
+        payloads: List[str] = []
+
+        if self._buffer and not self._discarding:
+            self._line(bytes(self._buffer), payloads)
+        self._buffer.clear()
+        self._discarding = False
+
+        self._end_event(payloads)
+        return payloads
+
+    def _line(self, raw: bytes, payloads: List[str]) -> None:
+        line = raw.decode("utf-8", errors="replace")
+        if line.endswith("\r"):
+            line = line[:-1]
+
+        if not line:
+            self._end_event(payloads)
+            return
+
+        if line.startswith("data:"):
+            value = line[6:] if line.startswith("data: ") else line[5:]
+            self._event_bytes += len(value) + 1
+            if self._event_bytes > self.max_event_bytes:
+                # Keep counting so the rest of the event is skipped too
+                if not self._event_overflow:
+                    self._event_overflow = True
+                    self._event.clear()
+                    self.dropped += 1
+                return
+            self._event.append(value)
+            return
+
+        if line.startswith(":") or line.startswith(("event:", "id:", "retry:")):
+            return
+
+        if line.startswith("chunk:"):
+            line = line[7:] if line.startswith("chunk: ") else line[6:]
+
+        self._emit(line.strip(), payloads)
+
+    def _end_event(self, payloads: List[str]) -> None:
+        if self._event:
+            self._emit("\n".join(self._event), payloads)
+        self._event.clear()
+        self._event_bytes = 0
+        self._event_overflow = False
+
+    def _emit(self, payload: str, payloads: List[str]) -> None:
+        if payload == DONE_PAYLOAD:
+            self.done = True
+        elif payload:
+            payloads.append(payload)
@@ -26,10 +26,18 @@ class Settings(BaseSettings):
     # Rate Limiting
     max_messages_per_minute: int = 10
     max_concurrent_sessions: int = 5
+    max_messages_per_session: int = 1  # Messages one session works on at a time
+    queue_workers: int = 0  # Queue consumers; 0 = one per leasable session slot
     
     # Browser Settings
     browser_headless: bool = True
     browser_timeout: int = 30
+    browser_max_pages_per_context: int = 3
+    browser_page_memory_budget_mb: int = 1024  # JS heap of all open pages, 0 = unlimited
+    browser_page_idle_timeout: int = 600  # Seconds before an idle page is closed
+    browser_response_timeout: int = 180  # Ceiling for one chat response, in seconds
+    browser_response_quiet_ms: int = 1500  # DOM quiet period that ends a response
+    browser_shards: int = 1  # Browser processes; 0 = one per CPU core
     
     # Monitoring
     prometheus_port: int = 9090
@@ -97,6 +105,11 @@ def get_browser_config() -> Dict[str, Any]:
     return {
         "headless": settings.browser_headless,
         "timeout": settings.browser_timeout * 1000,  # Convert to milliseconds
+        "max_pages_per_context": settings.browser_max_pages_per_context,
+        "page_memory_budget": settings.browser_page_memory_budget_mb * 1024 * 1024,
+        "page_idle_timeout": settings.browser_page_idle_timeout,
+        "response_timeout": settings.browser_response_timeout,
+        "response_quiet_ms": settings.browser_response_quiet_ms,
         "args": [
             "--no-sandbox",
             "--disable-setuid-sandbox",
@@ -57,7 +57,7 @@ def log_session_event(event: str, session_id: str, **kwargs) -> None:
     logger = get_logger("session")
     logger.info(
         "session_event",
-        event=event,
+        event_type=event,
         session_id=session_id,
         **kwargs
     )
@@ -68,7 +68,7 @@ def log_browser_event(event: str, browser_id: str, **kwargs) -> None:
     logger = get_logger("browser")
     logger.info(
         "browser_event",
-        event=event,
+        event_type=event,
         browser_id=browser_id,
         **kwargs
     )
@@ -79,7 +79,7 @@ def log_queue_event(event: str, message_id: str, **kwargs) -> None:
     logger = get_logger("queue")
     logger.info(
         "queue_event",
-        event=event,
+        event_type=event,
         message_id=message_id,
         **kwargs
     )
@@ -90,7 +90,7 @@ def log_api_event(event: str, endpoint: str, **kwargs) -> None:
     logger = get_logger("api")
     logger.info(
         "api_event",
-        event=event,
+        event_type=event,
         endpoint=endpoint,
         **kwargs
     )
@@ -4,7 +4,7 @@ Message models for Lovable Automation Service
 
 from datetime import datetime
 from typing import Optional, Dict, Any, List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from enum import Enum
 
 
@@ -56,6 +56,9 @@ class ChatMessage(BaseModel):
     error_message: Optional[str] = None
     error_details: Dict[str, Any] = Field(default_factory=dict)
     
+    # Redis processing lease held by the worker that dequeued this copy
+    _lease_token: Optional[str] = PrivateAttr(default=None)
+    
     def mark_processing(self, session_id: str) -> None:
         """Mark message as being processed"""
         self.status = MessageStatus.PROCESSING
@@ -151,6 +154,12 @@ class ChatResponse(BaseModel):
         self.error_code = error_code
 
 
+# Priority gained per minute of waiting: a LOW message overtakes newly
+# queued NORMAL ones after 10 minutes
+AGING_PER_MINUTE = 0.1
+QUEUE_EPOCH = datetime(2024, 1, 1)
+
+
 class QueuedMessage(BaseModel):
     """Message in the processing queue"""
     message: ChatMessage
@@ -161,8 +170,8 @@ class QueuedMessage(BaseModel):
     queued_at: datetime = Field(default_factory=datetime.utcnow)
     priority_score: float = 0.0
     
-    def calculate_priority_score(self) -> float:
-        """Calculate priority score for queue ordering"""
+    def base_priority_score(self) -> float:
+        """Priority before aging: message priority plus a bonus per retry"""
         base_score = {
             MessagePriority.LOW: 1.0,
             MessagePriority.NORMAL: 2.0,
@@ -173,12 +182,25 @@ class QueuedMessage(BaseModel):
         # Increase priority for retries
         retry_bonus = self.message.retry_count * 0.5
         
-        # Decrease priority for age (older messages get lower priority)
-        age_minutes = (datetime.utcnow() - self.message.created_at).total_seconds() / 60
-        age_penalty = min(age_minutes * 0.01, 1.0)  # Max 1.0 penalty
+        return base_score + retry_bonus
+    
+    def calculate_priority_score(self, now: Optional[datetime] = None) -> float:
+        """Effective priority: grows with the time spent waiting in the queue"""
+        waited_minutes = ((now or datetime.utcnow()) - self.queued_at).total_seconds() / 60
         
-        self.priority_score = base_score + retry_bonus - age_penalty
+        self.priority_score = self.base_priority_score() + AGING_PER_MINUTE * max(waited_minutes, 0.0)
         return self.priority_score
+    
+    def rank(self) -> float:
+        """
+        Time-independent ordering key (higher is served first)
+        
+        Aging is linear and the same for every message, so comparing
+        effective priorities at any instant gives the same order as
+        comparing base score minus the aging accrued up to queued_at.
+        """
+        queued_minutes = (self.queued_at - QUEUE_EPOCH).total_seconds() / 60
+        return self.base_priority_score() - AGING_PER_MINUTE * queued_minutes
 
 
 class MessageBatch(BaseModel):
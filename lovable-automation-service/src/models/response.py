@@ -2,9 +2,11 @@
 Response models for Lovable Automation Service
 """
 
-from datetime import datetime
-from typing import Optional, Dict, Any, List, Union
-from pydantic import BaseModel, Field
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Union, Iterator
+from pydantic import BaseModel, Field, PrivateAttr, computed_field, model_validator
 from enum import Enum
 
 
@@ -45,6 +47,100 @@ class StreamingChunk(BaseModel):
         return self.type == StreamingChunkType.COMPLETE
 
 
+class ChunkStore:
+    """
+    Append-only storage for the chunks of one streaming response
+
+    Chunks are kept as plain strings with parallel type/timestamp arrays
+    (no per-chunk model, id string or metadata dict). Code chunks are
+    indexed on append, text chunks are collected as parts and joined only
+    when text() is read after new ones arrived, and StreamingChunk objects
+    are built only when a chunk is read or the response is serialized.
+    A chunk's id and sequence are its position (chunk_{index}, index).
+    """
+
+    __slots__ = (
+        "_contents", "_types", "_times", "_metadata",
+        "_text_parts", "_code_indexes", "_text", "_size"
+    )
+
+    _TYPES = list(StreamingChunkType)
+    _CODES = {chunk_type: code for code, chunk_type in enumerate(_TYPES)}
+    _CODE_TYPES = {StreamingChunkType.CODE, StreamingChunkType.FILE_CHANGE}
+
+    def __init__(self):
+        self._contents: List[str] = []
+        self._types = array("B")
+        self._times = array("d")
+        self._metadata: Dict[int, Dict[str, Any]] = {}  # Sparse, most chunks have none
+        self._text_parts: List[str] = []
+        self._code_indexes = array("I")
+        self._text: Optional[str] = ""  # Joined _text_parts, None once stale
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._contents)
+
+    def __getitem__(self, index: int) -> StreamingChunk:
+        if index < 0:
+            index += len(self._contents)
+        chunk_type = self._TYPES[self._types[index]]
+        return StreamingChunk(
+            id=f"chunk_{index}",
+            type=chunk_type,
+            content=self._contents[index],
+            sequence=index,
+            timestamp=datetime.utcfromtimestamp(self._times[index]),
+            metadata=self._metadata.get(index, {})
+        )
+
+    def __iter__(self) -> Iterator[StreamingChunk]:
+        return (self[index] for index in range(len(self._contents)))
+
+    @property
+    def size(self) -> int:
+        """Total characters of chunk content"""
+        return self._size
+
+    def append(
+        self,
+        chunk_type: StreamingChunkType,
+        content: str,
+        timestamp: Optional[float] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """Store a chunk and return its sequence number"""
+        index = len(self._contents)
+        chunk_type = StreamingChunkType(chunk_type)
+
+        self._contents.append(content)
+        self._types.append(self._CODES[chunk_type])
+        self._times.append(time.time() if timestamp is None else timestamp)
+        if metadata:
+            self._metadata[index] = metadata
+
+        if chunk_type == StreamingChunkType.TEXT:
+            self._text_parts.append(content)
+            self._text = None
+        elif chunk_type in self._CODE_TYPES:
+            self._code_indexes.append(index)
+
+        self._size += len(content)
+        return index
+
+    def text(self) -> str:
+        """All text chunks joined (one join per batch of new chunks)"""
+        if self._text is None:
+            self._text = "".join(self._text_parts)
+        return self._text
+
+    def code_chunks(self) -> List[StreamingChunk]:
+        return [self[index] for index in self._code_indexes]
+
+    def materialize(self) -> List[StreamingChunk]:
+        return list(self)
+
+
 class FileChange(BaseModel):
     """Represents a file change from Lovable"""
     file_path: str = Field(..., description="Path to the file")
@@ -119,8 +215,7 @@ class LovableResponse(BaseModel):
     content: Optional[str] = None
     code_changes: Optional[CodeChanges] = None
     
-    # Streaming data
-    streaming_chunks: List[StreamingChunk] = Field(default_factory=list)
+    # Streaming data (chunks in a ChunkStore, see streaming_chunks)
     is_streaming: bool = False
     is_streaming_complete: bool = False
     
@@ -138,34 +233,71 @@ class LovableResponse(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     completed_at: Optional[datetime] = None
     
+    _chunks: ChunkStore = PrivateAttr(default_factory=ChunkStore)
+    
+    @model_validator(mode="wrap")
+    @classmethod
+    def _load_streaming_chunks(cls, data: Any, handler) -> "LovableResponse":
+        """Serialized streaming_chunks (a read-only field) go back into the chunk store"""
+        chunks = None
+        if isinstance(data, dict) and "streaming_chunks" in data:
+            data = dict(data)
+            chunks = data.pop("streaming_chunks")
+        
+        response = handler(data)
+        for chunk in chunks or []:
+            response._store_chunk(StreamingChunk.model_validate(chunk))
+        
+        return response
+    
+    @computed_field
+    @property
+    def streaming_chunks(self) -> List[StreamingChunk]:
+        """Chunk objects, built on access (serialization); prefer `chunks`"""
+        return self._chunks.materialize()
+    
+    @property
+    def chunks(self) -> ChunkStore:
+        return self._chunks
+    
+    def append_chunk(self, chunk_type: StreamingChunkType, content: str) -> int:
+        """Add a streaming chunk without building a StreamingChunk; returns its sequence"""
+        index = self._chunks.append(chunk_type, content)
+        self.is_streaming = True
+        
+        if chunk_type == StreamingChunkType.COMPLETE:
+            self.is_streaming_complete = True
+            self.completed_at = datetime.utcnow()
+        
+        return index
+    
     def add_streaming_chunk(self, chunk: StreamingChunk) -> None:
         """Add a streaming chunk"""
-        self.streaming_chunks.append(chunk)
+        self._store_chunk(chunk)
         self.is_streaming = True
         
         if chunk.is_complete():
             self.is_streaming_complete = True
             self.completed_at = datetime.utcnow()
     
+    def _store_chunk(self, chunk: StreamingChunk) -> None:
+        timestamp = chunk.timestamp
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)  # utcnow() default
+        
+        self._chunks.append(chunk.type, chunk.content, timestamp.timestamp(), chunk.metadata)
+    
     def get_full_content(self) -> str:
         """Get full content from streaming chunks or direct content"""
         if self.content:
             return self.content
         
-        # Combine text chunks
-        text_chunks = [
-            chunk.content for chunk in self.streaming_chunks
-            if chunk.type == StreamingChunkType.TEXT
-        ]
-        
-        return "".join(text_chunks)
+        # Combine text chunks (cached, extended as chunks arrive)
+        return self._chunks.text()
     
     def get_code_chunks(self) -> List[StreamingChunk]:
         """Get all code-related chunks"""
-        return [
-            chunk for chunk in self.streaming_chunks
-            if chunk.type in [StreamingChunkType.CODE, StreamingChunkType.FILE_CHANGE]
-        ]
+        return self._chunks.code_chunks()
     
     def mark_error(self, error_message: str, error_code: str = None) -> None:
         """Mark response as having an error"""
@@ -3,11 +3,12 @@ Queue management module for Lovable Automation Service
 """
 
 from .manager import LovableQueueManager
-from .processor import MessageProcessor
+from .processor import MessageProcessor, create_message_processor
 from .retry import RetryManager
 
 __all__ = [
     "LovableQueueManager",
     "MessageProcessor",
+    "create_message_processor",
     "RetryManager"
 ]
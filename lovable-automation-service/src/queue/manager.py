@@ -3,6 +3,10 @@ Queue Manager for Lovable Automation Service
 """
 
 import asyncio
+import heapq
+import itertools
+import math
+import time
 import uuid
 from typing import Optional, List, Dict, Any, AsyncIterator
 from datetime import datetime, timedelta
@@ -10,20 +14,138 @@ import redis.asyncio as redis
 from collections import deque
 
 from ..core.config import settings, get_redis_config
-from ..core.exceptions import QueueError, QueueFullError, MessageProcessingError, RateLimitExceededError
+from ..core.exceptions import (
+    QueueError, QueueFullError, MessageProcessingError, RateLimitExceededError,
+    SessionPoolExhaustedError
+)
 from ..core.logging import LoggerMixin, log_queue_event
 from ..models.message import ChatMessage, QueuedMessage, MessageStatus, MessagePriority, MessageBatch
 from ..models.response import ChatLoveResponse
+from .processor import MessageProcessor
+
+
+QUEUE_KEY = "lovable_priority_queue"
+MESSAGES_KEY = "lovable_messages"
+PROCESSING_KEY = "lovable_processing"  # id -> lease deadline (unix seconds)
+PROCESSING_RANKS_KEY = "lovable_processing_ranks"  # id -> queue score, for reclaims
+PROCESSING_OWNERS_KEY = "lovable_processing_owners"  # id -> lease token of the holder
+PROCESSING_KEYS = [QUEUE_KEY, MESSAGES_KEY, PROCESSING_KEY, PROCESSING_RANKS_KEY, PROCESSING_OWNERS_KEY]
+
+# KEYS: queue zset, message hash. ARGV: id, score, message json, size limit
+# (0 = none). Returns the new queue size, or -1 when the queue is full.
+ENQUEUE_SCRIPT = """
+local size = redis.call("ZCARD", KEYS[1])
+local limit = tonumber(ARGV[4])
+if limit > 0 and size >= limit and not redis.call("ZSCORE", KEYS[1], ARGV[1]) then
+    return -1
+end
+redis.call("HSET", KEYS[2], ARGV[1], ARGV[3])
+if redis.call("ZADD", KEYS[1], ARGV[2], ARGV[1]) == 1 then
+    size = size + 1
+end
+return size
+"""
+
+# The scripts below take PROCESSING_KEYS: queue zset, message hash,
+# processing zset, processing ranks hash, processing owners hash.
+
+# ARGV: max messages, lease deadline, lease token. Moves the highest ranked
+# ids from the queue to the processing set under the token (data stays in
+# the hash until released) and returns the message json list.
+DEQUEUE_SCRIPT = """
+local popped = redis.call("ZPOPMAX", KEYS[1], tonumber(ARGV[1]))
+local messages = {}
+for i = 1, #popped, 2 do
+    local data = redis.call("HGET", KEYS[2], popped[i])
+    if data then
+        redis.call("ZADD", KEYS[3], ARGV[2], popped[i])
+        redis.call("HSET", KEYS[4], popped[i], popped[i + 1])
+        redis.call("HSET", KEYS[5], popped[i], ARGV[3])
+        messages[#messages + 1] = data
+    end
+end
+return messages
+"""
+
+# ARGV: id, lease token. Ends the lease if the token still holds it and
+# drops the data; returns 0 when the lease was lost (reclaimed or requeued).
+RELEASE_SCRIPT = """
+if redis.call("HGET", KEYS[5], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call("ZREM", KEYS[3], ARGV[1])
+redis.call("HDEL", KEYS[4], ARGV[1])
+redis.call("HDEL", KEYS[5], ARGV[1])
+if not redis.call("ZSCORE", KEYS[1], ARGV[1]) then
+    redis.call("HDEL", KEYS[2], ARGV[1])
+end
+return 1
+"""
+
+# ARGV: id, lease token, score, message json. Moves a leased message back
+# to the queue with its new data in one step, if the token still holds the
+# lease. Returns the queue size, or -1 when the lease was lost.
+REQUEUE_SCRIPT = """
+if redis.call("HGET", KEYS[5], ARGV[1]) ~= ARGV[2] then
+    return -1
+end
+redis.call("ZREM", KEYS[3], ARGV[1])
+redis.call("HDEL", KEYS[4], ARGV[1])
+redis.call("HDEL", KEYS[5], ARGV[1])
+redis.call("HSET", KEYS[2], ARGV[1], ARGV[4])
+redis.call("ZADD", KEYS[1], ARGV[3], ARGV[1])
+return redis.call("ZCARD", KEYS[1])
+"""
+
+# ARGV: lease deadline, then id / lease token pairs. Extends the leases the
+# tokens still hold; returns how many.
+RENEW_SCRIPT = """
+local renewed = 0
+for i = 2, #ARGV, 2 do
+    if redis.call("HGET", KEYS[5], ARGV[i]) == ARGV[i + 1] then
+        redis.call("ZADD", KEYS[3], "XX", ARGV[1], ARGV[i])
+        renewed = renewed + 1
+    end
+end
+return renewed
+"""
+
+# ARGV: now. Puts messages whose lease expired (their worker or process
+# died) back in the queue at their original rank; returns how many.
+RECLAIM_SCRIPT = """
+local expired = redis.call("ZRANGEBYSCORE", KEYS[3], "-inf", ARGV[1])
+for _, id in ipairs(expired) do
+    local score = redis.call("HGET", KEYS[4], id) or 0
+    redis.call("ZADD", KEYS[1], score, id)
+    redis.call("ZREM", KEYS[3], id)
+    redis.call("HDEL", KEYS[4], id)
+    redis.call("HDEL", KEYS[5], id)
+end
+return #expired
+"""
 
 
 class LovableQueueManager(LoggerMixin):
     """
     Manages message queue with priority, rate limiting, and retry logic
+    
+    With a MessageProcessor, a pool of workers drains the queue: each worker
+    leases a session, runs one message through the processor and records the
+    outcome. The pool follows the session capacity (active sessions x
+    max_messages_per_session) unless QUEUE_WORKERS fixes its size.
     """
     
-    def __init__(self):
+    def __init__(self, processor: Optional[MessageProcessor] = None):
+        self.processor = processor
         self.redis_client: Optional[redis.Redis] = None
-        self.local_queue: deque = deque()
+        self._enqueue_script = None
+        self._dequeue_script = None
+        self._release_script = None
+        self._requeue_script = None
+        self._reclaim_script = None
+        self._renew_script = None
+        self._leases: Dict[tuple, ChatMessage] = {}  # (id, token) -> copy this process holds
+        self.local_queue = LocalPriorityQueue()
         self.processing_messages: Dict[str, ChatMessage] = {}
         self.rate_limiter = RateLimiter(
             max_messages=settings.max_messages_per_minute,
@@ -33,11 +155,28 @@ class LovableQueueManager(LoggerMixin):
         # Queue settings
         self.max_queue_size = 1000
         self.batch_size = 10
-        self.processing_timeout = 300  # 5 minutes
+        # Worst case for one message: waiting for a session slot (a busy
+        # slot frees up within browser_response_timeout), then the request
+        # itself (sharded: browser_response_timeout + 120). Enforced by the
+        # worker, so an overdue message is failed by its own worker.
+        self.processing_timeout = 2 * settings.browser_response_timeout + 120
+        # Redis leases are short and renewed while held; an expired lease
+        # means the holding process is gone
+        self.lease_seconds = 30.0
+        self.lease_renew_interval = 10.0
+        self.estimated_processing_seconds = 30  # Per message, for wait estimates
+        self.idle_poll_interval = 1.0  # Empty queue re-check (enqueues in other processes)
+        self.worker_resize_interval = 10.0
+        self.session_retry_delay = 5.0  # Back-off when no session could be leased
         
         # Background tasks
         self._processor_task: Optional[asyncio.Task] = None
         self._cleanup_task: Optional[asyncio.Task] = None
+        self._workers: Dict[int, asyncio.Task] = {}
+        self._worker_target = 0
+        self._message_available = asyncio.Event()
+        self._ready: deque = deque()  # Fetched in a batch (leased in Redis), not yet taken by a worker
+        self._busy_workers = 0
         self._is_running = False
     
     async def start(self) -> None:
@@ -57,8 +196,17 @@ class LovableQueueManager(LoggerMixin):
             
             # Test Redis connection
             await self.redis_client.ping()
+            self._enqueue_script = self.redis_client.register_script(ENQUEUE_SCRIPT)
+            self._dequeue_script = self.redis_client.register_script(DEQUEUE_SCRIPT)
+            self._release_script = self.redis_client.register_script(RELEASE_SCRIPT)
+            self._requeue_script = self.redis_client.register_script(REQUEUE_SCRIPT)
+            self._reclaim_script = self.redis_client.register_script(RECLAIM_SCRIPT)
+            self._renew_script = self.redis_client.register_script(RENEW_SCRIPT)
             self.logger.info("Redis connection established")
             
+            # Leases left by a process that died mid-message
+            await self._reclaim_expired()
+            
         except Exception as e:
             self.logger.warning(f"Redis connection failed, using local queue: {str(e)}")
             self.redis_client = None
@@ -87,6 +235,17 @@ class LovableQueueManager(LoggerMixin):
             except asyncio.CancelledError:
                 pass
         
+        # Stop workers; in-flight messages are put back in the queue
+        workers = list(self._workers.values())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._workers.clear()
+        
+        # Batch leftovers go back too
+        while self._ready:
+            await self._push(self._ready.popleft())
+        
         if self._cleanup_task:
             self._cleanup_task.cancel()
             try:
@@ -107,27 +266,15 @@ class LovableQueueManager(LoggerMixin):
             if not await self.rate_limiter.allow_request(message.user_id):
                 raise RateLimitExceededError(f"Rate limit exceeded for user {message.user_id}")
             
-            # Check queue size
-            queue_size = await self.get_queue_size()
-            if queue_size >= self.max_queue_size:
-                raise QueueFullError("Message queue is full")
-            
-            # Create queued message
-            queued_message = QueuedMessage(message=message)
-            queued_message.calculate_priority_score()
-            
-            # Add to queue
-            if self.redis_client:
-                await self._enqueue_to_redis(queued_message)
-            else:
-                await self._enqueue_to_local(queued_message)
+            # Add to queue (size check and insert are one atomic step)
+            queue_size = await self._push(message, limit=self.max_queue_size)
             
             log_queue_event(
                 "message_enqueued",
                 message.id,
                 user_id=message.user_id,
                 priority=message.priority,
-                queue_size=queue_size + 1
+                queue_size=queue_size
             )
             
             return message.id
@@ -138,15 +285,20 @@ class LovableQueueManager(LoggerMixin):
     
     async def dequeue_message(self) -> Optional[ChatMessage]:
         """Get next message from queue"""
+        messages = await self.dequeue_messages(1)
+        return messages[0] if messages else None
+    
+    async def dequeue_messages(self, count: int) -> List[ChatMessage]:
+        """Get up to count messages, highest priority first"""
         try:
             if self.redis_client:
-                return await self._dequeue_from_redis()
+                return await self._dequeue_from_redis(count)
             else:
-                return await self._dequeue_from_local()
+                return await self._dequeue_from_local(count)
         
         except Exception as e:
-            self.logger.error(f"Failed to dequeue message: {str(e)}")
-            return None
+            self.logger.error(f"Failed to dequeue messages: {str(e)}")
+            return []
     
     async def mark_message_processing(self, message: ChatMessage, session_id: str) -> None:
         """Mark message as being processed"""
@@ -190,7 +342,9 @@ class LovableQueueManager(LoggerMixin):
         # Retry if allowed
         if retry and message.can_retry():
             message.mark_retrying()
-            await self.enqueue_message(message)
+            
+            # Retries already passed the rate limit once
+            await self._push(message)
             
             log_queue_event(
                 "message_retry",
@@ -210,9 +364,9 @@ class LovableQueueManager(LoggerMixin):
         """Get current queue size"""
         try:
             if self.redis_client:
-                return await self.redis_client.llen("lovable_queue")
+                return await self.redis_client.zcard(QUEUE_KEY) + len(self._ready)
             else:
-                return len(self.local_queue)
+                return len(self.local_queue) + len(self._ready)
         except:
             return 0
     
@@ -224,7 +378,7 @@ class LovableQueueManager(LoggerMixin):
         # Calculate average wait time
         avg_wait_time = 0
         if queue_size > 0:
-            avg_wait_time = (queue_size * 30)  # Estimate 30 seconds per message
+            avg_wait_time = self._estimate_wait_time(queue_size)
         
         return {
             "queue_size": queue_size,
@@ -232,84 +386,198 @@ class LovableQueueManager(LoggerMixin):
             "max_queue_size": self.max_queue_size,
             "avg_wait_time_seconds": avg_wait_time,
             "rate_limit_remaining": await self.rate_limiter.get_remaining_quota(),
+            "workers": len(self._workers),
+            "worker_target": self._worker_target,
             "is_running": self._is_running
         }
     
-    async def _enqueue_to_redis(self, queued_message: QueuedMessage) -> None:
-        """Add message to Redis queue"""
-        message_data = {
-            "message": queued_message.message.dict(),
-            "priority_score": queued_message.priority_score,
-            "queued_at": queued_message.queued_at.isoformat()
+    async def get_message_position(self, message_id: str) -> Optional[Dict[str, Any]]:
+        """Position of a queued message (0 = next) and its estimated wait"""
+        try:
+            if self.redis_client:
+                position = await self.redis_client.zrevrank(QUEUE_KEY, message_id)
+            else:
+                position = self.local_queue.position(message_id)
+        except Exception as e:
+            self.logger.error(f"Failed to get queue position: {str(e)}")
+            return None
+        
+        if position is None:
+            return None
+        
+        return {
+            "message_id": message_id,
+            "queue_position": position,
+            "estimated_wait_time": self._estimate_wait_time(position)
         }
+    
+    def _estimate_wait_time(self, messages_ahead: int) -> int:
+        """Seconds until a message with messages_ahead in front of it starts"""
+        workers = max(self._worker_target, 1)
+        return math.ceil(messages_ahead / workers) * self.estimated_processing_seconds
+    
+    async def _push(self, message: ChatMessage, limit: int = 0) -> int:
+        """
+        Queue a message by priority and wake idle workers; returns the
+        queue size. With a limit, raises QueueFullError instead of growing
+        the queue past it. A leased message moves back from the processing
+        set in the same script call, so it is never in neither place.
+        """
+        queued_message = QueuedMessage(message=message)
+        queued_message.calculate_priority_score()
+        
+        if self.redis_client and message._lease_token:
+            queue_size = await self._requeue_to_redis(queued_message)
+            if queue_size < 0:
+                return 0
+        elif self.redis_client:
+            queue_size = await self._enqueue_to_redis(queued_message, limit)
+        else:
+            queue_size = await self._enqueue_to_local(queued_message, limit)
         
-        # Use priority queue (sorted set)
-        await self.redis_client.zadd(
-            "lovable_priority_queue",
-            {queued_message.message.id: queued_message.priority_score}
-        )
+        if queue_size < 0:
+            raise QueueFullError("Message queue is full")
         
-        # Store message data
-        await self.redis_client.hset(
-            "lovable_messages",
-            queued_message.message.id,
-            queued_message.message.json()
+        self._message_available.set()
+        return queue_size
+    
+    async def _enqueue_to_redis(self, queued_message: QueuedMessage, limit: int = 0) -> int:
+        """Add message to Redis queue: data and sorted-set entry in one script call"""
+        # Use priority queue (sorted set), scored by the aging-aware rank
+        return await self._enqueue_script(
+            keys=[QUEUE_KEY, MESSAGES_KEY],
+            args=[
+                queued_message.message.id,
+                queued_message.rank(),
+                queued_message.message.json(),
+                limit
+            ]
         )
     
-    async def _enqueue_to_local(self, queued_message: QueuedMessage) -> None:
+    async def _requeue_to_redis(self, queued_message: QueuedMessage) -> int:
+        """Move a leased message back to the queue; -1 if the lease was lost"""
+        message = queued_message.message
+        token, message._lease_token = message._lease_token, None
+        self._leases.pop((message.id, token), None)
+        
+        queue_size = await self._requeue_script(
+            keys=PROCESSING_KEYS,
+            args=[message.id, token, queued_message.rank(), message.json()]
+        )
+        
+        if queue_size < 0:
+            # Reclaimed meanwhile: the queued copy is someone else's now
+            self.logger.warning(f"Lease of message {message.id} was lost, not requeueing")
+        
+        return queue_size
+    
+    async def _enqueue_to_local(self, queued_message: QueuedMessage, limit: int = 0) -> int:
         """Add message to local queue"""
-        # Insert based on priority
-        inserted = False
-        for i, existing in enumerate(self.local_queue):
-            if queued_message.priority_score > existing.priority_score:
-                self.local_queue.insert(i, queued_message)
-                inserted = True
-                break
+        if limit and len(self.local_queue) >= limit:
+            return -1
         
-        if not inserted:
-            self.local_queue.append(queued_message)
+        self.local_queue.push(queued_message)
+        return len(self.local_queue)
     
-    async def _dequeue_from_redis(self) -> Optional[ChatMessage]:
-        """Get next message from Redis queue"""
+    async def _dequeue_from_redis(self, count: int = 1) -> List[ChatMessage]:
+        """
+        Pop up to count messages from Redis in one atomic script call
+
+        The messages move to the processing set under a lease rather than
+        leaving Redis. Each copy carries the lease token: _push moves it back
+        to the queue and _release ends the lease only while that token still
+        holds it. The cleanup loop renews the leases this process holds, so
+        only a lease whose holder is gone expires and is reclaimed.
+        """
+        token = uuid.uuid4().hex
+        
         try:
-            # Get highest priority message
-            result = await self.redis_client.zpopmax("lovable_priority_queue")
-            
-            if not result:
-                return None
-            
-            message_id, priority_score = result[0]
-            
-            # Get message data
-            message_data = await self.redis_client.hget("lovable_messages", message_id)
-            
-            if not message_data:
-                return None
-            
-            # Parse message
-            message = ChatMessage.parse_raw(message_data)
+            results = await self._dequeue_script(
+                keys=PROCESSING_KEYS,
+                args=[count, time.time() + self.lease_seconds, token]
+            )
             
-            # Remove from storage
-            await self.redis_client.hdel("lovable_messages", message_id)
+            messages = [ChatMessage.parse_raw(message_data) for message_data in results]
+            for message in messages:
+                message._lease_token = token
+                self._leases[(message.id, token)] = message
             
-            return message
+            return messages
             
         except Exception as e:
             self.logger.error(f"Error dequeuing from Redis: {str(e)}")
-            return None
+            return []
     
-    async def _dequeue_from_local(self) -> Optional[ChatMessage]:
-        """Get next message from local queue"""
+    async def _dequeue_from_local(self, count: int = 1) -> List[ChatMessage]:
+        """Get up to count messages from local queue"""
+        messages = []
+        
         try:
-            if not self.local_queue:
-                return None
-            
-            queued_message = self.local_queue.popleft()
-            return queued_message.message
+            while self.local_queue and len(messages) < count:
+                queued_message = self.local_queue.pop()
+                log_queue_event(
+                    "message_dequeued",
+                    queued_message.message.id,
+                    priority_score=queued_message.priority_score,
+                    wait_seconds=(datetime.utcnow() - queued_message.queued_at).total_seconds()
+                )
+                messages.append(queued_message.message)
             
         except Exception as e:
             self.logger.error(f"Error dequeuing from local queue: {str(e)}")
-            return None
+        
+        return messages
+    
+    async def _release(self, message: ChatMessage) -> None:
+        """End the Redis processing lease of a dequeued message, if still held"""
+        if not self.redis_client or not message._lease_token:
+            return
+        
+        token, message._lease_token = message._lease_token, None
+        self._leases.pop((message.id, token), None)
+        
+        try:
+            await self._release_script(keys=PROCESSING_KEYS, args=[message.id, token])
+        except Exception as e:
+            self.logger.error(f"Error releasing message {message.id}: {str(e)}")
+    
+    async def _renew_leases(self) -> None:
+        """Extend the Redis leases of every message this process holds"""
+        if not self.redis_client or not self._leases:
+            return
+        
+        args = [time.time() + self.lease_seconds]
+        for message_id, token in list(self._leases):
+            args += [message_id, token]
+        
+        try:
+            renewed = await self._renew_script(keys=PROCESSING_KEYS, args=args)
+        except Exception as e:
+            self.logger.error(f"Error renewing message leases: {str(e)}")
+            return
+        
+        if renewed < len(self._leases):
+            self.logger.warning(f"{len(self._leases) - renewed} message leases were lost before renewal")
+    
+    async def _reclaim_expired(self) -> int:
+        """Requeue messages whose processing lease expired"""
+        if not self.redis_client:
+            return 0
+        
+        try:
+            reclaimed = await self._reclaim_script(
+                keys=PROCESSING_KEYS,
+                args=[time.time()]
+            )
+        except Exception as e:
+            self.logger.error(f"Error reclaiming expired messages: {str(e)}")
+            return 0
+        
+        if reclaimed:
+            self.logger.warning(f"Requeued {reclaimed} messages with expired processing leases")
+            self._message_available.set()
+        
+        return reclaimed
     
     async def _store_result(self, message_id: str, response: ChatLoveResponse) -> None:
         """Store processing result in Redis"""
@@ -331,17 +599,15 @@ class LovableQueueManager(LoggerMixin):
             self.logger.error(f"Error storing result: {str(e)}")
     
     async def _process_queue_loop(self) -> None:
-        """Background task to process queue"""
+        """Background task keeping the worker pool sized to session capacity"""
+        if not self.processor:
+            self.logger.warning("No message processor configured, queued messages will wait")
+            return
+        
         while self._is_running:
             try:
-                # Process messages in batches
-                batch = await self._get_message_batch()
-                
-                if batch:
-                    await self._process_message_batch(batch)
-                else:
-                    # No messages, wait a bit
-                    await asyncio.sleep(1)
+                self._resize_workers()
+                await asyncio.sleep(self.worker_resize_interval)
                 
             except asyncio.CancelledError:
                 break
@@ -349,61 +615,201 @@ class LovableQueueManager(LoggerMixin):
                 self.logger.error(f"Error in queue processing loop: {str(e)}")
                 await asyncio.sleep(5)  # Wait before retrying
     
+    def _target_worker_count(self) -> int:
+        """Workers to run: QUEUE_WORKERS, or one per leasable session slot"""
+        if settings.queue_workers > 0:
+            return settings.queue_workers
+        
+        return self.processor.session_manager.lease_capacity()
+    
+    def _resize_workers(self) -> None:
+        """Start missing workers; surplus workers retire once idle"""
+        target = self._target_worker_count()
+        
+        if target != self._worker_target:
+            self.logger.info(
+                "Resizing queue workers",
+                workers=len(self._workers),
+                target=target
+            )
+        
+        self._worker_target = target
+        
+        for worker_id in range(target):
+            if worker_id not in self._workers:
+                self._workers[worker_id] = asyncio.create_task(self._worker_loop(worker_id))
+    
+    async def _worker_loop(self, worker_id: int) -> None:
+        """Take messages off the queue one at a time while this worker is wanted"""
+        try:
+            while self._is_running and worker_id < self._worker_target:
+                try:
+                    message = await self._next_message()
+                    
+                    if not message:
+                        await self._wait_for_message()
+                        continue
+                    
+                    self._busy_workers += 1
+                    try:
+                        await self._process_queued_message(message)
+                    finally:
+                        self._busy_workers -= 1
+                    
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.logger.error(f"Error in queue worker {worker_id}: {str(e)}")
+                    await asyncio.sleep(5)  # Wait before retrying
+        
+        finally:
+            if self._workers.get(worker_id) is asyncio.current_task():
+                del self._workers[worker_id]
+    
+    async def _next_message(self) -> Optional[ChatMessage]:
+        """
+        Message for an idle worker. One round-trip fetches a message for
+        every idle worker; the extras wait in _ready for the others. With
+        Redis they are leased in the processing set meanwhile, so a crash
+        here loses nothing: the lease expires and they are reclaimed.
+        """
+        if self._ready:
+            return self._ready.popleft()
+        
+        idle_workers = max(len(self._workers) - self._busy_workers, 1)
+        messages = await self.dequeue_messages(min(idle_workers, self.batch_size))
+        
+        if not messages:
+            return None
+        
+        if len(messages) > 1:
+            self._ready.extend(messages[1:])
+            self._message_available.set()
+        
+        return messages[0]
+    
+    async def _wait_for_message(self) -> None:
+        """Sleep until something is enqueued here or the poll interval passes"""
+        if self._ready:
+            return
+        
+        self._message_available.clear()
+        try:
+            await asyncio.wait_for(self._message_available.wait(), timeout=self.idle_poll_interval)
+        except asyncio.TimeoutError:
+            pass
+    
+    async def _process_queued_message(self, message: ChatMessage) -> None:
+        """Run one dequeued message on a leased session and record the outcome"""
+        try:
+            await asyncio.wait_for(self._run_queued_message(message), timeout=self.processing_timeout)
+        
+        except asyncio.TimeoutError:
+            await self.mark_message_failed(message, "Processing timeout", retry=True)
+        
+        except asyncio.CancelledError:
+            # Shutting down mid-message: keep it for the next run
+            self.processing_messages.pop(message.id, None)
+            message.status = MessageStatus.PENDING
+            await self._push(message)
+            raise
+        
+        finally:
+            # No-op when the message was requeued (that moved the lease back)
+            await self._release(message)
+    
+    async def _run_queued_message(self, message: ChatMessage) -> None:
+        """Process one message; failures are retried or requeued"""
+        session_manager = self.processor.session_manager
+        
+        try:
+            async with session_manager.get_session_context() as session:
+                await self.mark_message_processing(message, session.id)
+                response = await self.processor.process_message(message, session)
+        
+        except SessionPoolExhaustedError as e:
+            # Not the message's fault: put it back without spending a retry
+            self.logger.warning(f"No session for message {message.id}, requeueing: {str(e)}")
+            message.status = MessageStatus.PENDING
+            await self._push(message)
+            await asyncio.sleep(self.session_retry_delay)
+            return
+        
+        if response.success:
+            await self.mark_message_completed(message, response)
+            return
+        
+        await self.mark_message_failed(message, response.message, retry=True)
+        
+        # Out of retries: keep the error as the message's result
+        if message.status == MessageStatus.FAILED and self.redis_client:
+            await self._store_result(message.id, response)
+    
     async def _cleanup_loop(self) -> None:
-        """Background task to cleanup expired messages"""
+        """
+        Background task keeping Redis leases current
+        
+        Overdue messages are failed by their own worker (processing_timeout),
+        so nothing a live worker holds is requeued from here.
+        """
         while self._is_running:
             try:
-                await asyncio.sleep(60)  # Run every minute
-                
-                # Cleanup expired processing messages
-                expired_messages = []
-                current_time = datetime.utcnow()
+                await asyncio.sleep(self.lease_renew_interval)
                 
-                for message_id, message in self.processing_messages.items():
-                    if message.is_expired(timeout_minutes=self.processing_timeout // 60):
-                        expired_messages.append(message_id)
+                await self._renew_leases()
                 
-                # Handle expired messages
-                for message_id in expired_messages:
-                    message = self.processing_messages[message_id]
-                    await self.mark_message_failed(
-                        message,
-                        "Processing timeout",
-                        retry=True
-                    )
-                
-                if expired_messages:
-                    self.logger.info(f"Cleaned up {len(expired_messages)} expired messages")
+                # Messages leased by workers that are gone (e.g. a crashed replica)
+                await self._reclaim_expired()
                 
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 self.logger.error(f"Error in cleanup loop: {str(e)}")
+
+
+class LocalPriorityQueue:
+    """
+    Binary heap of queued messages, used when Redis is unavailable
+    
+    Ordered by QueuedMessage.rank(), so a message that waits long enough
+    overtakes higher priorities queued after it; equal ranks are FIFO.
+    Push and pop are O(log n). The effective priority_score is computed
+    when the message is popped.
+    """
     
-    async def _get_message_batch(self) -> List[ChatMessage]:
-        """Get a batch of messages for processing"""
-        batch = []
+    def __init__(self):
+        self._heap: List[tuple] = []
+        self._keys: Dict[str, tuple] = {}
+        self._sequence = itertools.count()
+    
+    def __len__(self) -> int:
+        return len(self._heap)
+    
+    def push(self, queued_message: QueuedMessage) -> None:
+        """Add a message"""
+        key = (-queued_message.rank(), next(self._sequence))
+        heapq.heappush(self._heap, (key, queued_message))
+        self._keys[queued_message.message.id] = key
+    
+    def pop(self) -> Optional[QueuedMessage]:
+        """Remove and return the message with the highest effective priority"""
+        if not self._heap:
+            return None
         
-        for _ in range(self.batch_size):
-            message = await self.dequeue_message()
-            if message:
-                batch.append(message)
-            else:
-                break
+        key, queued_message = heapq.heappop(self._heap)
+        if self._keys.get(queued_message.message.id) == key:
+            del self._keys[queued_message.message.id]
         
-        return batch
+        queued_message.calculate_priority_score()
+        return queued_message
     
-    async def _process_message_batch(self, batch: List[ChatMessage]) -> None:
-        """Process a batch of messages"""
-        # This would be implemented to actually process messages
-        # For now, just log that we received a batch
-        self.logger.debug(f"Processing batch of {len(batch)} messages")
+    def position(self, message_id: str) -> Optional[int]:
+        """Number of messages that will be served before this one"""
+        key = self._keys.get(message_id)
+        if key is None:
+            return None
         
-        # In real implementation, this would:
-        # 1. Get available sessions
-        # 2. Assign messages to sessions
-        # 3. Process messages through browser automation
-        # 4. Handle responses and errors
+        return sum(1 for entry_key, _ in self._heap if entry_key < key)
 
 
 class RateLimiter:
@@ -4,15 +4,17 @@ Message Processor for Lovable Automation Service
 
 import asyncio
 import uuid
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Union
 from datetime import datetime
 
 from ..core.logging import LoggerMixin, log_queue_event
 from ..core.exceptions import MessageProcessingError, SessionPoolExhaustedError
 from ..models.message import ChatMessage, MessageStatus
 from ..models.response import ChatLoveResponse
+from ..models.session import Session
 from ..session.manager import LovableSessionManager
 from ..browser.automation import LovableBrowserAutomation
+from ..browser.sharding import ShardedBrowserAutomation, create_browser_automation
 
 
 class MessageProcessor(LoggerMixin):
@@ -20,49 +22,31 @@ class MessageProcessor(LoggerMixin):
     Processes messages through browser automation
     """
     
-    def __init__(self, session_manager: LovableSessionManager, browser_automation: LovableBrowserAutomation):
+    def __init__(
+        self,
+        session_manager: LovableSessionManager,
+        browser_automation: Union[LovableBrowserAutomation, ShardedBrowserAutomation]
+    ):
         self.session_manager = session_manager
         self.browser_automation = browser_automation
         self.processing_tasks: Dict[str, asyncio.Task] = {}
     
-    async def process_message(self, message: ChatMessage) -> ChatLoveResponse:
-        """Process a single message"""
+    async def process_message(self, message: ChatMessage, session: Optional[Session] = None) -> ChatLoveResponse:
+        """
+        Process a single message
+        
+        Without a session one is leased for the duration of the message; queue
+        workers pass the session they already leased.
+        """
         try:
             self.logger.info(f"Processing message: {message.id}")
             
-            # Get active session
+            if session is not None:
+                return await self._process_with_session(message, session)
+            
+            # Lease a session
             async with self.session_manager.get_session_context() as session:
-                # Mark message as processing
-                message.mark_processing(session.id)
-                
-                # Navigate to project
-                page = await self.browser_automation.navigate_to_project(session, message.project_id)
-                
-                # Handle authentication if needed
-                if not await self.browser_automation.handle_authentication(page, session):
-                    raise MessageProcessingError("Authentication failed")
-                
-                # Send message and get response
-                lovable_response = await self.browser_automation.send_chat_message(page, message)
-                
-                # Check for errors
-                error_message = await self.browser_automation.check_for_errors(page)
-                if error_message:
-                    raise MessageProcessingError(f"Lovable error: {error_message}")
-                
-                # Convert to ChatLove response
-                tokens_saved = len(message.content) / 4  # Estimate
-                response = ChatLoveResponse.from_lovable_response(lovable_response, tokens_saved)
-                
-                # Mark message as completed
-                message.mark_completed()
-                
-                # Update session usage
-                session.increment_message_count()
-                
-                self.logger.info(f"Message processed successfully: {message.id}")
-                
-                return response
+                return await self._process_with_session(message, session)
         
         except Exception as e:
             self.logger.error(f"Failed to process message {message.id}: {str(e)}")
@@ -76,6 +60,28 @@ class MessageProcessor(LoggerMixin):
                 error_code="PROCESSING_ERROR"
             )
     
+    async def _process_with_session(self, message: ChatMessage, session: Session) -> ChatLoveResponse:
+        """Run a message through the browser on a leased session"""
+        # Mark message as processing
+        message.mark_processing(session.id)
+        
+        # Navigate, send and capture (in this process or in the session's browser shard)
+        lovable_response = await self.browser_automation.run_chat(session, message)
+        
+        # Convert to ChatLove response
+        tokens_saved = len(message.content) / 4  # Estimate
+        response = ChatLoveResponse.from_lovable_response(lovable_response, tokens_saved)
+        
+        # Mark message as completed
+        message.mark_completed()
+        
+        # Update session usage
+        session.increment_message_count()
+        
+        self.logger.info(f"Message processed successfully: {message.id}")
+        
+        return response
+    
     async def process_message_async(self, message: ChatMessage) -> str:
         """Process message asynchronously and return task ID"""
         task_id = str(uuid.uuid4())
@@ -190,3 +196,8 @@ class MessageProcessor(LoggerMixin):
             del self.processing_tasks[task_id]
         
         return len(completed_tasks)
+
+
+def create_message_processor(session_manager: LovableSessionManager) -> MessageProcessor:
+    """MessageProcessor over the configured browser automation (sharded when BROWSER_SHARDS > 1)"""
+    return MessageProcessor(session_manager, create_browser_automation())
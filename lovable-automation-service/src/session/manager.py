@@ -27,7 +27,10 @@ class LovableSessionManager(LoggerMixin):
     
     def __init__(self):
         self.authenticator = FirebaseAuthenticator()
-        self.pool_manager = SessionPoolManager(max_sessions=settings.max_concurrent_sessions)
+        self.pool_manager = SessionPoolManager(
+            max_sessions=settings.max_concurrent_sessions,
+            max_leases_per_session=settings.max_messages_per_session
+        )
         self.accounts = [Account(**acc) for acc in get_lovable_accounts()]
         self._cleanup_task: Optional[asyncio.Task] = None
         self._is_running = False
@@ -173,6 +176,47 @@ class LovableSessionManager(LoggerMixin):
         session.update_last_used()
         return session
     
+    async def lease_session(self, timeout: Optional[float] = None) -> Session:
+        """
+        Lease a session for one message, waiting while all active sessions
+        are busy. The caller must hand it back with release_session().
+        """
+        session = await self.pool_manager.lease_session(timeout=timeout)
+        
+        if not session:
+            # Try to create a new session if pool is not full
+            if len(self.pool_manager.pool.sessions) < settings.max_concurrent_sessions:
+                if await self._create_emergency_session():
+                    session = self.pool_manager.try_lease_session()
+            
+            if not session:
+                raise SessionPoolExhaustedError("No session available for a new message")
+        
+        # Check if session needs refresh
+        if session.time_until_expiry() and session.time_until_expiry().total_seconds() < 300:  # 5 minutes
+            try:
+                await self.refresh_session(session)
+            except Exception as e:
+                self.logger.warning(
+                    "Failed to refresh leased session, will try another",
+                    session_id=session.id,
+                    error=str(e)
+                )
+                session.mark_expired()
+                await self.pool_manager.release_session(session)
+                return await self.lease_session(timeout=timeout)
+        
+        session.update_last_used()
+        return session
+    
+    async def release_session(self, session: Session) -> None:
+        """Give back a session obtained from lease_session()"""
+        await self.pool_manager.release_session(session)
+    
+    def lease_capacity(self) -> int:
+        """Messages the pool can process concurrently"""
+        return self.pool_manager.lease_capacity()
+    
     async def _create_emergency_session(self) -> Optional[Session]:
         """Create an emergency session when pool is low"""
         # Find an account that doesn't have an active session
@@ -232,14 +276,17 @@ class LovableSessionManager(LoggerMixin):
             raise SessionError("Failed to handle session expiry")
     
     @asynccontextmanager
-    async def get_session_context(self):
-        """Context manager for getting and releasing sessions"""
-        session = await self.get_active_session()
+    async def get_session_context(self, timeout: Optional[float] = None):
+        """Context manager for leasing and releasing sessions"""
+        if timeout is None:
+            # A busy slot frees up at the latest when its response times out
+            timeout = settings.browser_response_timeout
+        
+        session = await self.lease_session(timeout=timeout)
         try:
             yield session
         finally:
-            # Session is automatically returned to pool
-            pass
+            await self.release_session(session)
     
     async def _cleanup_loop(self) -> None:
         """Background task to cleanup expired sessions"""
@@ -281,7 +328,8 @@ class LovableSessionManager(LoggerMixin):
             "is_running": self._is_running,
             "configured_accounts": len(self.accounts),
             "pool_stats": pool_stats,
-            "max_sessions": settings.max_concurrent_sessions
+            "max_sessions": settings.max_concurrent_sessions,
+            "max_messages_per_session": settings.max_messages_per_session
         }
     
     async def create_session_pool(self, accounts: List[Account]) -> SessionPool:
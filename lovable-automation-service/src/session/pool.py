@@ -16,9 +16,14 @@ class SessionPoolManager(LoggerMixin):
     and health monitoring
     """
     
-    def __init__(self, max_sessions: int = 5):
+    def __init__(self, max_sessions: int = 5, max_leases_per_session: int = 1):
         self.pool = SessionPool(max_sessions=max_sessions)
+        self.max_leases_per_session = max(1, max_leases_per_session)
         self._lock = asyncio.Lock()
+        
+        # Messages in flight per session id, bounded by max_leases_per_session
+        self._leases: Dict[str, int] = {}
+        self._released = asyncio.Condition()
     
     def add_session(self, session: Session) -> None:
         """Add a session to the pool"""
@@ -42,6 +47,78 @@ class SessionPoolManager(LoggerMixin):
         
         return session
     
+    def lease_capacity(self) -> int:
+        """Number of messages the active sessions can work on at once"""
+        active_count = len([s for s in self.pool.sessions if s.is_active()])
+        return active_count * self.max_leases_per_session
+    
+    def leased_count(self) -> int:
+        """Number of leases currently held"""
+        return sum(self._leases.values())
+    
+    def try_lease_session(self) -> Optional[Session]:
+        """Lease the least loaded active session with a free slot, without waiting"""
+        free_sessions = [
+            s for s in self.pool.sessions
+            if s.is_active() and self._leases.get(s.id, 0) < self.max_leases_per_session
+        ]
+        
+        if not free_sessions:
+            return None
+        
+        # Fewest leases first, then the one idle the longest
+        session = min(
+            free_sessions,
+            key=lambda s: (self._leases.get(s.id, 0), s.last_used_at or datetime.min)
+        )
+        self._leases[session.id] = self._leases.get(session.id, 0) + 1
+        
+        log_session_event(
+            "session_leased",
+            session.id,
+            leases=self._leases[session.id],
+            message_count=session.message_count
+        )
+        
+        return session
+    
+    async def lease_session(self, timeout: Optional[float] = None) -> Optional[Session]:
+        """
+        Lease a session slot, waiting while every active session is at
+        max_leases_per_session. Returns None when the pool has no active
+        session or no slot frees up within timeout.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout is not None else None
+        
+        async with self._released:
+            while True:
+                session = self.try_lease_session()
+                if session or not self.lease_capacity():
+                    return session
+                
+                remaining = deadline - loop.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return None
+                
+                try:
+                    await asyncio.wait_for(self._released.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    return None
+    
+    async def release_session(self, session: Session) -> None:
+        """Return a leased slot and wake one waiter"""
+        async with self._released:
+            count = self._leases.get(session.id, 0) - 1
+            if count > 0:
+                self._leases[session.id] = count
+            else:
+                self._leases.pop(session.id, None)
+            
+            self._released.notify()
+        
+        log_session_event("session_released", session.id, leases=max(count, 0))
+    
     def get_least_used_session(self) -> Optional[Session]:
         """Get the session with the lowest message count"""
         session = self.pool.get_least_used_session()
@@ -89,6 +166,10 @@ class SessionPoolManager(LoggerMixin):
     def get_stats(self) -> Dict[str, Any]:
         """Get detailed pool statistics"""
         stats = self.pool.get_stats()
+        stats.update({
+            "lease_capacity": self.lease_capacity(),
+            "leased": self.leased_count()
+        })
         
         # Add additional statistics
         sessions = self.pool.sessions
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The service is run from its root (python main.py), which puts src/ on the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
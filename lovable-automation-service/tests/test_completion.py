@@ -0,0 +1,102 @@
+"""
+Tests for response completion signals
+"""
+
+import asyncio
+import itertools
+import json
+import shutil
+
+import pytest
+
+from src.browser.completion import wait_for_dom_settled, wait_for_first
+
+
+NODE = shutil.which("node")
+
+# Minimal page: window globals, an empty document and a MutationObserver
+# that counts connected observers
+NODE_PAGE = r"""
+globalThis.window = globalThis;
+globalThis.__observers = 0;
+globalThis.document = { body: {}, querySelectorAll: () => [] };
+globalThis.MutationObserver = class {
+    observe() { this.connected = true; globalThis.__observers++; }
+    disconnect() { if (this.connected) { this.connected = false; globalThis.__observers--; } }
+};
+
+require("readline").createInterface({ input: process.stdin }).on("line", async (line) => {
+    const { id, script, arg } = JSON.parse(line);
+    let reply;
+    try {
+        reply = { id, result: await (0, eval)("(" + script + ")")(arg) };
+    } catch (e) {
+        reply = { id, error: String(e) };
+    }
+    process.stdout.write(JSON.stringify(reply) + "\n");
+});
+"""
+
+
+class NodePage:
+    """Stand-in for a Playwright page whose evaluate() runs in one node process"""
+
+    async def start(self):
+        self._ids = itertools.count()
+        self._waiting = {}
+        self.process = await asyncio.create_subprocess_exec(
+            NODE, "-e", NODE_PAGE,
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE
+        )
+        self._reader = asyncio.create_task(self._read())
+        return self
+
+    async def _read(self):
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                return
+            reply = json.loads(line)
+            future = self._waiting.pop(reply["id"])
+            if future.done():
+                continue  # The caller stopped waiting (cancelled)
+            if "error" in reply:
+                future.set_exception(RuntimeError(reply["error"]))
+            else:
+                future.set_result(reply.get("result"))
+
+    async def evaluate(self, script, arg=None):
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = future
+        self.process.stdin.write((json.dumps({"id": request_id, "script": script, "arg": arg}) + "\n").encode())
+        await self.process.stdin.drain()
+        return await future
+
+    async def close(self):
+        self.process.kill()
+        await self.process.wait()
+        self._reader.cancel()
+
+
+@pytest.mark.skipif(NODE is None, reason="node is required to run the page script")
+@pytest.mark.asyncio
+async def test_network_win_disconnects_dom_observer():
+    page = await NodePage().start()
+
+    async def network_completed():
+        await asyncio.sleep(0.3)
+        return True
+
+    try:
+        for _ in range(3):  # Same page reused for several messages
+            signal = await wait_for_first({
+                "dom": wait_for_dom_settled(page, ".message", ".loading", 0, 100, 60),
+                "network": network_completed()
+            }, timeout=10)
+            assert signal == "network"
+
+        assert await page.evaluate("() => __observers") == 0
+        assert await page.evaluate("() => Object.keys(window.__chatloveSettledWaits).length") == 0
+    finally:
+        await page.close()
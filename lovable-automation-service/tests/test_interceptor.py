@@ -0,0 +1,105 @@
+"""
+Tests for live stream capture: hook events are handled in the order sent
+"""
+
+import asyncio
+import random
+
+import pytest
+
+from src.browser.interceptor import NetworkInterceptor
+from src.models.response import LovableResponse
+
+STREAM_URL = "https://api.lovable.dev/projects/p1/chat"
+
+
+class FakeRequest:
+    method = "POST"
+
+
+class FakeResponse:
+    """A streaming chat response whose body has already finished"""
+
+    url = STREAM_URL
+    status = 200
+    headers = {"content-type": "text/event-stream"}
+    request = FakeRequest()
+
+    async def finished(self):
+        return None
+
+
+def dispatch(interceptor, event):
+    # Playwright runs each expose_binding call as its own task
+    return asyncio.create_task(interceptor._on_stream_event({}, event))
+
+
+def stream_events(count):
+    yield {"id": 1, "type": "start", "url": STREAM_URL}
+    for index in range(count):
+        yield {"id": 1, "type": "chunk", "data": f"data: part{index}\n\n"}
+    yield {"id": 1, "type": "end", "data": ""}
+
+
+def capture(on_chunk):
+    interceptor = NetworkInterceptor(page=None)
+    response = LovableResponse(message_id="m1")
+    interceptor.setup_response_capture(response, on_chunk=on_chunk)
+    return interceptor, response
+
+
+@pytest.mark.asyncio
+async def test_chunks_keep_order_with_a_slow_consumer():
+    delivered = []
+
+    async def on_chunk(chunk):
+        await asyncio.sleep(random.uniform(0, 0.005))
+        delivered.append(chunk.content)
+
+    interceptor, response = capture(on_chunk)
+    for event in stream_events(20):
+        dispatch(interceptor, event)
+
+    await asyncio.wait_for(interceptor.wait_for_completion(), 5)
+
+    expected = [f"part{index}" for index in range(20)]
+    # Completion only after every earlier chunk went through the consumer
+    assert delivered == expected
+    assert [chunk.content for chunk in response.chunks] == expected
+
+
+@pytest.mark.asyncio
+async def test_finished_response_does_not_cut_the_live_tail():
+    async def on_chunk(chunk):
+        await asyncio.sleep(0.01)
+
+    interceptor, response = capture(on_chunk)
+    events = list(stream_events(5))
+    dispatch(interceptor, events[0])
+    for event in events[1:-1]:
+        dispatch(interceptor, event)
+    await asyncio.sleep(0)
+
+    # The network response finishes while hook events are still queued
+    await interceptor._on_response(FakeResponse())
+    assert not interceptor.completed.is_set()
+
+    dispatch(interceptor, events[-1])
+    await asyncio.wait_for(interceptor.wait_for_completion(), 5)
+    assert len(response.chunks) == 5
+
+
+@pytest.mark.asyncio
+async def test_new_capture_drops_the_previous_stream():
+    interceptor, first = capture(None)
+    dispatch(interceptor, {"id": 1, "type": "start", "url": STREAM_URL})
+    await asyncio.sleep(0)
+
+    second = LovableResponse(message_id="m2")
+    interceptor.setup_response_capture(second)
+    dispatch(interceptor, {"id": 1, "type": "chunk", "data": "data: late\n\n"})
+    await asyncio.sleep(0.01)
+
+    assert len(first.chunks) == 0
+    assert len(second.chunks) == 0
+    assert not interceptor.completed.is_set()
@@ -0,0 +1,44 @@
+"""
+Tests for the message processor construction path
+"""
+
+import os
+
+from src.browser.automation import LovableBrowserAutomation
+from src.browser.sharding import ShardedBrowserAutomation
+from src.core.config import settings
+from src.queue import LovableQueueManager, create_message_processor
+
+
+class FakeSessionManager:
+    pass
+
+
+def test_single_browser_when_one_shard(monkeypatch):
+    monkeypatch.setattr(settings, "browser_shards", 1)
+
+    processor = create_message_processor(FakeSessionManager())
+
+    assert type(processor.browser_automation) is LovableBrowserAutomation
+
+
+def test_sharded_browsers_when_configured(monkeypatch):
+    monkeypatch.setattr(settings, "browser_shards", 3)
+    session_manager = FakeSessionManager()
+
+    processor = create_message_processor(session_manager)
+    queue_manager = LovableQueueManager(processor=processor)
+
+    assert isinstance(processor.browser_automation, ShardedBrowserAutomation)
+    assert processor.browser_automation.shard_count == 3
+    assert processor.session_manager is session_manager
+    assert queue_manager.processor is processor
+
+
+def test_zero_shards_means_one_per_core(monkeypatch):
+    monkeypatch.setattr(settings, "browser_shards", 0)
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+
+    processor = create_message_processor(FakeSessionManager())
+
+    assert processor.browser_automation.shard_count == 4
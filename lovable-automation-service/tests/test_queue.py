@@ -0,0 +1,219 @@
+"""
+Tests for the Redis queue: dequeued messages stay in Redis until released
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+import pytest_asyncio
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")  # fakeredis runs the Lua scripts with it
+
+from src.models.message import ChatMessage, MessagePriority
+from src.queue import manager as queue_module
+from src.queue.manager import (
+    LovableQueueManager, MESSAGES_KEY, PROCESSING_KEY, PROCESSING_OWNERS_KEY, QUEUE_KEY
+)
+
+
+def make_message(message_id, priority=MessagePriority.NORMAL):
+    return ChatMessage(
+        id=message_id,
+        user_id=f"user-{message_id}",
+        project_id="project",
+        content="hello",
+        priority=priority
+    )
+
+
+def die(manager):
+    """The process is gone: its background tasks stop without cleanup"""
+    manager._processor_task.cancel()
+    manager._cleanup_task.cancel()
+
+
+class HangingProcessor:
+    """Processor whose message never finishes; no pool workers, the test drives it"""
+
+    class session_manager:
+        class session:
+            id = "session-1"
+
+        @staticmethod
+        def lease_capacity():
+            return 0
+
+        @classmethod
+        @asynccontextmanager
+        async def get_session_context(cls):
+            yield cls.session
+
+    async def process_message(self, message, session):
+        await asyncio.Event().wait()
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    """Every client, the managers' included, talks to one in-process server"""
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        queue_module.redis,
+        "from_url",
+        lambda url, **kwargs: fakeredis.aioredis.FakeRedis(server=server, **kwargs)
+    )
+    return server
+
+
+@pytest.fixture
+def inspect(redis_server):
+    return fakeredis.aioredis.FakeRedis(server=redis_server, decode_responses=True)
+
+
+@pytest_asyncio.fixture
+async def queue(redis_server):
+    manager = LovableQueueManager()
+    await manager.start()
+    yield manager
+    await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_crashed_replica_messages_are_reclaimed(redis_server, inspect):
+    crashed = LovableQueueManager()
+    crashed.lease_seconds = 0  # Lease ends unless renewed right away
+    await crashed.start()
+    for message_id, priority in [
+        ("a", MessagePriority.LOW), ("b", MessagePriority.URGENT), ("c", MessagePriority.NORMAL)
+    ]:
+        await crashed.enqueue_message(make_message(message_id, priority))
+
+    taken = await crashed.dequeue_messages(2)
+    assert [message.id for message in taken] == ["b", "c"]
+    # Leased, not gone: still in Redis while only this process knows of them
+    assert await inspect.zcard(QUEUE_KEY) == 1
+    assert set(await inspect.zrange(PROCESSING_KEY, 0, -1)) == {"b", "c"}
+    assert await inspect.hlen(MESSAGES_KEY) == 3
+    die(crashed)
+
+    replica = LovableQueueManager()
+    await replica.start()
+    try:
+        assert await replica.get_queue_size() == 3
+        assert await inspect.zcard(PROCESSING_KEY) == 0
+        assert await inspect.hlen(PROCESSING_OWNERS_KEY) == 0
+        recovered = await replica.dequeue_messages(3)
+        assert [message.id for message in recovered] == ["b", "c", "a"]
+    finally:
+        await replica.stop()
+
+
+@pytest.mark.asyncio
+async def test_live_lease_is_not_reclaimed(queue, inspect):
+    await queue.enqueue_message(make_message("a"))
+    assert [message.id for message in await queue.dequeue_messages(1)] == ["a"]
+
+    replica = LovableQueueManager()
+    await replica.start()
+    try:
+        assert await replica.get_queue_size() == 0
+        assert await inspect.zrange(PROCESSING_KEY, 0, -1) == ["a"]
+    finally:
+        await replica.stop()
+
+
+@pytest.mark.asyncio
+async def test_release_drops_finished_messages_and_keeps_retries(queue, inspect):
+    await queue.enqueue_message(make_message("done"))
+    await queue.enqueue_message(make_message("retry"))
+    for message in await queue.dequeue_messages(2):
+        if message.id == "retry":
+            await queue.mark_message_failed(message, "boom", retry=True)
+        await queue._release(message)
+
+    assert await inspect.zcard(PROCESSING_KEY) == 0
+    assert await inspect.hkeys(MESSAGES_KEY) == ["retry"]
+    retried = await queue.dequeue_messages(2)
+    assert [(message.id, message.retry_count) for message in retried] == [("retry", 1)]
+
+
+@pytest.mark.asyncio
+async def test_release_after_requeue_keeps_the_new_lease(queue, inspect):
+    await queue.enqueue_message(make_message("a"))
+
+    # Worker 1 requeues (e.g. no session), worker 2 takes the message again
+    [first] = await queue.dequeue_messages(1)
+    await queue._push(first)
+    [second] = await queue.dequeue_messages(1)
+
+    # Worker 1's late release must not end worker 2's lease
+    await queue._release(first)
+    assert await inspect.zrange(PROCESSING_KEY, 0, -1) == ["a"]
+    assert await inspect.hkeys(MESSAGES_KEY) == ["a"]
+
+    await queue._release(second)
+    assert await inspect.zcard(PROCESSING_KEY) == 0
+    assert await inspect.hlen(MESSAGES_KEY) == 0
+
+
+@pytest.mark.asyncio
+async def test_requeue_after_lost_lease_does_not_duplicate(queue, inspect):
+    await queue.enqueue_message(make_message("a"))
+    [stale] = await queue.dequeue_messages(1)
+
+    # The lease expired and the message went to another worker meanwhile
+    await inspect.zadd(PROCESSING_KEY, {"a": 0})
+    assert await queue._reclaim_expired() == 1
+    [current] = await queue.dequeue_messages(1)
+
+    await queue._push(stale)
+    assert await inspect.zcard(QUEUE_KEY) == 0
+    assert await inspect.zrange(PROCESSING_KEY, 0, -1) == ["a"]
+
+    await queue._release(current)
+    assert await inspect.hlen(MESSAGES_KEY) == 0
+
+
+@pytest.mark.asyncio
+async def test_held_leases_are_renewed(redis_server, inspect):
+    holder = LovableQueueManager()
+    holder.lease_seconds = 0.2
+    holder.lease_renew_interval = 0.05
+    await holder.start()
+    await holder.enqueue_message(make_message("a"))
+    await holder.dequeue_messages(1)
+
+    replica = LovableQueueManager()
+    await replica.start()
+    try:
+        # Well past the first deadline, but the holder is alive
+        await asyncio.sleep(0.5)
+        assert await replica._reclaim_expired() == 0
+        assert await inspect.zrange(PROCESSING_KEY, 0, -1) == ["a"]
+
+        die(holder)
+        await asyncio.sleep(0.3)
+        assert await replica._reclaim_expired() == 1
+        assert await replica.get_queue_size() == 1
+    finally:
+        await replica.stop()
+
+
+@pytest.mark.asyncio
+async def test_overdue_message_is_failed_by_its_worker(redis_server, inspect):
+    queue = LovableQueueManager(processor=HangingProcessor())
+    queue.processing_timeout = 0.1
+    await queue.start()
+    try:
+        await queue.enqueue_message(make_message("a"))
+        [message] = await queue.dequeue_messages(1)
+
+        await queue._process_queued_message(message)
+
+        assert queue.processing_messages == {}
+        assert await inspect.zcard(PROCESSING_KEY) == 0
+        [retried] = await queue.dequeue_messages(1)
+        assert (retried.id, retried.retry_count) == ("a", 1)
+    finally:
+        await queue.stop()
@@ -0,0 +1,81 @@
+"""
+Tests for SelectorResolver
+"""
+
+import asyncio
+
+import pytest
+
+from src.browser.resolver import SelectorResolver
+
+
+class FakeElement:
+    def __init__(self, enabled_after: float = 0.0):
+        self.enabled_at = asyncio.get_running_loop().time() + enabled_after
+
+    async def is_visible(self):
+        return True
+
+    async def is_enabled(self):
+        return asyncio.get_running_loop().time() >= self.enabled_at
+
+    async def wait_for_element_state(self, state, timeout):
+        assert state == "enabled"
+        delay = self.enabled_at - asyncio.get_running_loop().time()
+        if delay > timeout / 1000:
+            await asyncio.sleep(timeout / 1000)
+            raise TimeoutError("element not enabled")
+        await asyncio.sleep(max(delay, 0))
+
+
+class FakePage:
+    """Elements by selector; missing selectors never appear"""
+
+    def __init__(self, elements):
+        self.elements = elements
+        self.queries = []
+
+    async def query_selector(self, selector):
+        self.queries.append(selector)
+        return self.elements.get(selector)
+
+    async def wait_for_selector(self, selector, state, timeout):
+        element = self.elements.get(selector)
+        if element is None:
+            await asyncio.sleep(timeout / 1000)
+            raise TimeoutError(selector)
+        return element
+
+
+@pytest.mark.asyncio
+async def test_waits_for_disabled_send_button_to_enable():
+    button = FakeElement(enabled_after=0.3)
+    page = FakePage({"button.send": button})
+    resolver = SelectorResolver()
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    element = await resolver.resolve(page, "send_button", ["button.send"], timeout=2, enabled=True)
+
+    assert element is button
+    assert await element.is_enabled()
+    assert loop.time() - start >= 0.25
+
+
+@pytest.mark.asyncio
+async def test_stale_selector_drops_behind_replacement_after_drift():
+    resolver = SelectorResolver()
+    candidates = ["button.old", "button.new"]
+    button = FakeElement()
+
+    # The old selector was right for a long time
+    for _ in range(1000):
+        await resolver.resolve(FakePage({"button.old": button}), "send_button", candidates)
+    assert resolver.rank("send_button", candidates) == candidates
+
+    # UI drift: only the new selector matches now
+    for _ in range(5):
+        await resolver.resolve(FakePage({"button.new": button}), "send_button", candidates)
+
+    assert resolver.rank("send_button", candidates) == ["button.new", "button.old"]
+    assert resolver.hit_rate("send_button", "button.old") < resolver.hit_rate("send_button", "button.new")
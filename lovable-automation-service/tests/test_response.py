@@ -0,0 +1,44 @@
+"""
+Tests for LovableResponse chunk storage and its serialized round-trip
+"""
+
+from src.models.response import LovableResponse, StreamingChunk, StreamingChunkType
+
+
+def streamed_response():
+    response = LovableResponse(message_id="m1")
+    response.append_chunk(StreamingChunkType.TEXT, "Hello, ")
+    response.append_chunk(StreamingChunkType.CODE, "export const a = 1")
+    response.add_streaming_chunk(StreamingChunk(
+        id="ignored", type=StreamingChunkType.METADATA, content="{}", sequence=9, metadata={"model": "m"}
+    ))
+    response.append_chunk(StreamingChunkType.TEXT, "world")
+    response.mark_complete()
+    return response
+
+
+def test_serialized_chunks_survive_validation():
+    original = streamed_response()
+    data = original.model_dump(mode="json")
+
+    loaded = LovableResponse.model_validate(data)
+
+    assert loaded.model_dump(mode="json") == data
+    assert [chunk.id for chunk in loaded.chunks] == ["chunk_0", "chunk_1", "chunk_2", "chunk_3"]
+    assert loaded.chunks[2].metadata == {"model": "m"}
+    assert loaded.completed_at == original.completed_at
+    assert loaded.get_full_content() == "Hello, world"
+    assert [chunk.content for chunk in loaded.get_code_chunks()] == ["export const a = 1"]
+
+
+def test_text_joins_only_after_new_text_chunks():
+    response = LovableResponse(message_id="m1")
+    response.append_chunk(StreamingChunkType.TEXT, "a")
+    first = response.get_full_content()
+
+    assert response.get_full_content() is first
+    response.append_chunk(StreamingChunkType.CODE, "class A {}")
+    assert response.get_full_content() is first
+
+    response.append_chunk(StreamingChunkType.TEXT, "b")
+    assert response.get_full_content() == "ab"
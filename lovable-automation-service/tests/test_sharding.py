@@ -0,0 +1,81 @@
+"""
+Tests for shard replies: streamed chunks reach on_chunk in the order sent
+"""
+
+import asyncio
+import random
+
+import pytest
+
+from src.browser.sharding import ShardedBrowserAutomation
+
+
+class Requests(list):
+    put = list.append
+
+
+class FakeShard:
+    """Shard handle whose process is alive and records what it was asked"""
+
+    index = 0
+    is_alive = True
+
+    def __init__(self):
+        self.pending = set()
+        self.requests = Requests()
+
+
+def chunk_reply(request_id, index):
+    return {
+        "id": request_id,
+        "chunk": {"id": f"chunk_{index}", "type": "text", "content": f"part{index}", "sequence": index}
+    }
+
+
+@pytest.mark.asyncio
+async def test_chunks_are_delivered_in_order_before_the_result():
+    automation = ShardedBrowserAutomation(2)
+    automation._loop = asyncio.get_running_loop()
+    shard = FakeShard()
+    delivered = []
+
+    async def on_chunk(chunk):
+        await asyncio.sleep(random.uniform(0, 0.005))
+        delivered.append(chunk.content)
+
+    request = asyncio.create_task(automation._request(shard, {"op": "chat"}, on_chunk))
+    await asyncio.sleep(0)
+    [sent] = shard.requests
+
+    # The reader thread hands replies over with call_soon_threadsafe, in order
+    for index in range(20):
+        automation._loop.call_soon(automation._dispatch, chunk_reply(sent["id"], index))
+    automation._loop.call_soon(automation._dispatch, {"id": sent["id"], "result": {"ok": True}})
+
+    assert await asyncio.wait_for(request, 5) == {"ok": True}
+    assert delivered == [f"part{index}" for index in range(20)]
+    assert automation._chunk_queues == {}
+
+
+@pytest.mark.asyncio
+async def test_failing_callback_does_not_stop_later_chunks():
+    automation = ShardedBrowserAutomation(2)
+    automation._loop = asyncio.get_running_loop()
+    shard = FakeShard()
+    delivered = []
+
+    async def on_chunk(chunk):
+        if chunk.content == "part0":
+            raise RuntimeError("consumer hiccup")
+        delivered.append(chunk.content)
+
+    request = asyncio.create_task(automation._request(shard, {"op": "chat"}, on_chunk))
+    await asyncio.sleep(0)
+    [sent] = shard.requests
+
+    automation._dispatch(chunk_reply(sent["id"], 0))
+    automation._dispatch(chunk_reply(sent["id"], 1))
+    automation._dispatch({"id": sent["id"], "result": {"ok": True}})
+
+    assert await asyncio.wait_for(request, 5) == {"ok": True}
+    assert delivered == ["part1"]